@@ -2,13 +2,12 @@ import streamlit as st
 import logging
 from utils.auth import Auth
 from utils.schema import criar_banco_dados
+from utils.agendador import get_agendador
+from utils.logger import configurar_logging
 from utils.constants import TITULO_APP, ICONE_APP, TEMA_APP
 
 # Configuração do logger
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+configurar_logging()
 logger = logging.getLogger(__name__)
 
 # Configuração da página
@@ -42,6 +41,9 @@ def main():
         # Cria o banco de dados se não existir
         criar_banco_dados()
         
+        # Inicia a geração agendada de relatórios (uma vez por processo)
+        get_agendador()
+        
         # Inicializa a autenticação
         auth = Auth()
         
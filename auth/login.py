@@ -2,7 +2,8 @@ import streamlit as st
 import sqlite3
 import logging
 from utils.common import logger
-from utils.security import SecurityManager
+from utils.security import SecurityManager, limitador_login, HashIndisponivel
+from utils.constants import ERRO_BLOQUEIO
 
 # Inicializa o gerenciador de segurança
 security_manager = SecurityManager()
@@ -17,6 +18,13 @@ def login():
         submit = st.form_submit_button("Entrar")
         
         if submit:
+            # Recusa tentativas de usuários bloqueados antes de calcular hashes
+            minutos = limitador_login.minutos_bloqueado(username)
+            if minutos:
+                logger.warning(f"Login bloqueado para o usuário {username}")
+                st.error(ERRO_BLOQUEIO.format(minutos))
+                return
+                
             try:
                 conn = sqlite3.connect('database.db')
                 cursor = conn.cursor()
@@ -29,6 +37,19 @@ def login():
                 user = cursor.fetchone()
                 
                 if user and security_manager.verify_password(password, user[2]):
+                    limitador_login.registrar_sucesso(username)
+                    
+                    # Substitui hashes legados (SHA-256) pelo bcrypt
+                    if security_manager.needs_rehash(user[2]):
+                        try:
+                            cursor.execute(
+                                "UPDATE users SET password = ? WHERE id = ?",
+                                (security_manager.hash_password(password), user[0])
+                            )
+                            conn.commit()
+                        except Exception as e:
+                            logger.error(f"Erro ao atualizar hash da senha: {str(e)}")
+                        
                     # Gera o token JWT
                     token_data = {
                         'user_id': user[0],
@@ -48,9 +69,14 @@ def login():
                     st.success("Login realizado com sucesso!")
                     st.rerun()
                 else:
+                    limitador_login.registrar_falha(username)
                     logger.warning(f"Tentativa de login falhou para o usuário {username}")
                     st.error("Usuário ou senha inválidos")
                     
+            except HashIndisponivel as e:
+                # Sobrecarga do pool de hash: não conta como tentativa falha
+                logger.warning(f"Login de {username} adiado: {str(e)}")
+                st.warning(str(e))
             except Exception as e:
                 logger.error(f"Erro durante o login: {str(e)}")
                 st.error("Erro ao realizar login. Tente novamente.")
@@ -63,6 +89,10 @@ def logout():
     if 'authenticated' in st.session_state:
         logger.info(f"Usuário {st.session_state.username} fez logout")
         
+        # O token deixa de valer mesmo que ainda não tenha expirado
+        if 'token' in st.session_state:
+            security_manager.revoke_token(st.session_state.token)
+        
         # Limpa os dados da sessão
         for key in ['authenticated', 'user_id', 'username', 'role', 'token']:
             if key in st.session_state:
@@ -1,7 +1,14 @@
 import streamlit as st
 from utils.common import require_auth, setup_page, show_error, show_success, logger
 from utils.backup import BackupManager
-from utils.reports import ReportGenerator
+from utils.reports import ReportGenerator, NOMES_RELATORIOS
+from utils.exportacao import exportar_comprovantes
+from utils.agendador import get_agendador
+from utils.auditoria import get_auditoria
+from utils.log_index import get_indice_log, arquivo_do_dia, dias_disponiveis, formatar_registro
+from utils.constants import ARQUIVO_LOG, LOG_LINHAS_POR_PAGINA, AUDITORIA_LINHAS_POR_PAGINA
+from utils.database import Database
+from utils.db import DB_PATH
 import os
 from datetime import datetime
 
@@ -16,8 +23,8 @@ def main():
     report_generator = ReportGenerator()
     
     # Criar abas
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "Backup", "Relatórios", "Logs", "Configurações"
+    tab1, tab2, tab3, tab4, tab5 = st.tabs([
+        "Backup", "Relatórios", "Logs", "Auditoria", "Configurações"
     ])
     
     # Aba de Backup
@@ -27,9 +34,13 @@ def main():
         col1, col2 = st.columns(2)
         
         with col1:
+            completo = st.checkbox(
+                "Backup completo",
+                help="Por padrão o backup é incremental (só as páginas alteradas desde o anterior)"
+            )
             if st.button("Criar Backup"):
                 with st.spinner("Criando backup..."):
-                    sucesso, mensagem = backup_manager.create_backup()
+                    sucesso, mensagem = backup_manager.create_backup(completo)
                     if sucesso:
                         show_success(mensagem)
                     else:
@@ -43,7 +54,7 @@ def main():
                 st.subheader("Backups Disponíveis")
                 
                 for backup in backups:
-                    with st.expander(f"Backup de {backup['modified'].strftime('%d/%m/%Y %H:%M')}"):
+                    with st.expander(f"Backup {backup['tipo']} de {backup['modified'].strftime('%d/%m/%Y %H:%M')}"):
                         st.write(f"Arquivo: {backup['filename']}")
                         st.write(f"Tamanho: {backup['size'] / 1024:.2f} KB")
                         
@@ -62,19 +73,51 @@ def main():
     with tab2:
         st.header("Geração de Relatórios")
         
+        # Últimos relatórios gerados pelo agendador: download imediato
+        st.subheader("Relatórios Agendados")
+        agendador = get_agendador(DB_PATH)
+        for coluna, agendamento in zip(st.columns(3), agendador.listar()):
+            with coluna:
+                nome = f"Relatório {NOMES_RELATORIOS[agendamento['tipo']].capitalize()}"
+                st.markdown(f"**{nome}** (`{agendamento['expressao']}`)")
+                if agendamento['ultimo_blob']:
+                    caminho = report_generator.blobs.caminho(agendamento['ultimo_blob'])
+                    if os.path.exists(caminho):
+                        with open(caminho, "rb") as f:
+                            st.download_button(
+                                f"Download {nome}",
+                                f,
+                                file_name=report_generator.blobs.nome_arquivo(caminho),
+                                mime="application/pdf",
+                                key=f"agendado_{agendamento['tipo']}"
+                            )
+                    st.caption(f"Gerado em {agendamento['gerado_em']}")
+                else:
+                    st.caption("Ainda não gerado")
+                if agendamento['ultimo_erro']:
+                    st.warning(agendamento['ultimo_erro'])
+                st.caption(f"Próxima execução: {agendamento['proxima_execucao']}")
+        
+        st.subheader("Gerar Agora")
+        
+        incluir_graficos = st.checkbox(
+            "Incluir gráficos",
+            help="Renderiza os gráficos como imagens no PDF (mais lento; requer kaleido)"
+        )
+        
         col1, col2, col3 = st.columns(3)
         
         with col1:
             if st.button("Relatório Diário"):
                 with st.spinner("Gerando relatório diário..."):
-                    sucesso, pdf_path = report_generator.gerar_relatorio_diario()
+                    sucesso, pdf_path = report_generator.gerar_relatorio_diario(incluir_graficos)
                     if sucesso:
                         show_success("Relatório diário gerado com sucesso!")
                         with open(pdf_path, "rb") as f:
                             st.download_button(
                                 "Download Relatório Diário",
                                 f,
-                                file_name=os.path.basename(pdf_path),
+                                file_name=report_generator.blobs.nome_arquivo(pdf_path),
                                 mime="application/pdf"
                             )
                     else:
@@ -83,14 +126,14 @@ def main():
         with col2:
             if st.button("Relatório Semanal"):
                 with st.spinner("Gerando relatório semanal..."):
-                    sucesso, pdf_path = report_generator.gerar_relatorio_semanal()
+                    sucesso, pdf_path = report_generator.gerar_relatorio_semanal(incluir_graficos)
                     if sucesso:
                         show_success("Relatório semanal gerado com sucesso!")
                         with open(pdf_path, "rb") as f:
                             st.download_button(
                                 "Download Relatório Semanal",
                                 f,
-                                file_name=os.path.basename(pdf_path),
+                                file_name=report_generator.blobs.nome_arquivo(pdf_path),
                                 mime="application/pdf"
                             )
                     else:
@@ -99,28 +142,85 @@ def main():
         with col3:
             if st.button("Relatório Mensal"):
                 with st.spinner("Gerando relatório mensal..."):
-                    sucesso, pdf_path = report_generator.gerar_relatorio_mensal()
+                    sucesso, pdf_path = report_generator.gerar_relatorio_mensal(incluir_graficos)
                     if sucesso:
                         show_success("Relatório mensal gerado com sucesso!")
                         with open(pdf_path, "rb") as f:
                             st.download_button(
                                 "Download Relatório Mensal",
                                 f,
-                                file_name=os.path.basename(pdf_path),
+                                file_name=report_generator.blobs.nome_arquivo(pdf_path),
                                 mime="application/pdf"
                             )
                     else:
                         show_error(pdf_path)
+        
+        # Exportação de comprovantes
+        st.subheader("Exportar Comprovantes")
+        
+        db = Database(DB_PATH)
+        veiculos = db.execute_query("SELECT id, placa FROM veiculos ORDER BY placa")
+        condutores = db.execute_query("SELECT id, nome FROM condutores ORDER BY nome")
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            periodo = st.date_input(
+                "Período",
+                value=(datetime.now().date().replace(day=1), datetime.now().date())
+            )
+        
+        with col2:
+            veiculo_id = st.selectbox(
+                "Veículo",
+                [None] + [v['id'] for v in veiculos],
+                format_func=lambda x: "Todos" if x is None else next(
+                    v['placa'] for v in veiculos if v['id'] == x
+                )
+            )
+        
+        with col3:
+            condutor_id = st.selectbox(
+                "Condutor",
+                [None] + [c['id'] for c in condutores],
+                format_func=lambda x: "Todos" if x is None else next(
+                    c['nome'] for c in condutores if c['id'] == x
+                )
+            )
+        
+        if st.button("Exportar Comprovantes"):
+            if len(periodo) != 2:
+                show_error("Selecione a data inicial e a final.")
+            else:
+                inicio, fim = periodo
+                os.makedirs('data/exportacoes', exist_ok=True)
+                zip_path = os.path.join(
+                    'data/exportacoes',
+                    f"comprovantes_{inicio:%Y%m%d}_{fim:%Y%m%d}.zip"
+                )
+                with st.spinner("Gerando comprovantes..."):
+                    try:
+                        total = exportar_comprovantes(
+                            DB_PATH, zip_path, inicio, fim, veiculo_id, condutor_id
+                        )
+                        show_success(f"{total} comprovantes exportados!")
+                        with open(zip_path, "rb") as f:
+                            st.download_button(
+                                "Download Comprovantes",
+                                f,
+                                file_name=os.path.basename(zip_path),
+                                mime="application/zip"
+                            )
+                    except Exception as e:
+                        logger.error(f"Erro ao exportar comprovantes: {str(e)}")
+                        show_error(f"Erro ao exportar comprovantes: {str(e)}")
     
     # Aba de Logs
     with tab3:
         st.header("Visualização de Logs")
         
-        log_file = 'logs/app.log'
-        if os.path.exists(log_file):
-            with open(log_file, 'r') as f:
-                logs = f.readlines()
-            
+        dias = dias_disponiveis(ARQUIVO_LOG)
+        if dias:
             # Filtros
             col1, col2 = st.columns(2)
             
@@ -133,31 +233,101 @@ def main():
             with col2:
                 data = st.date_input(
                     "Data",
-                    value=datetime.now()
+                    value=dias[0]
                 )
             
-            # Filtrar logs
-            logs_filtrados = []
-            for log in logs:
-                if nivel != "Todos" and nivel not in log:
-                    continue
-                
-                try:
-                    log_date = datetime.strptime(log.split()[0], '%Y-%m-%d').date()
-                    if log_date != data:
-                        continue
-                except:
-                    continue
-                
-                logs_filtrados.append(log)
+            # Consultar o índice (registros mais recentes primeiro)
+            indice = get_indice_log(arquivo_do_dia(ARQUIVO_LOG, data))
+            nivel_filtro = None if nivel == "Todos" else nivel
+            total = indice.contar(data, nivel_filtro)
+            paginas = max((total + LOG_LINHAS_POR_PAGINA - 1) // LOG_LINHAS_POR_PAGINA, 1)
+            pagina = st.number_input("Página", min_value=1, max_value=paginas, value=1) - 1
+            logs_filtrados = [formatar_registro(registro) for registro in indice.pagina(data, nivel_filtro, pagina)]
             
             # Exibir logs
-            st.text_area("Logs", value="".join(logs_filtrados), height=400)
+            st.caption(f"{total} registros")
+            st.text_area("Logs", value="\n".join(logs_filtrados), height=400)
         else:
             st.info("Nenhum arquivo de log encontrado.")
     
-    # Aba de Configurações
+    # Aba de Auditoria
     with tab4:
+        st.header("Trilha de Auditoria")
+        
+        auditoria = get_auditoria(DB_PATH)
+        db = Database(DB_PATH)
+        usuarios = db.execute_query("SELECT id, nome FROM usuarios ORDER BY nome")
+        veiculos = db.execute_query("SELECT id, placa FROM veiculos ORDER BY placa")
+        
+        # Filtros
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            usuario = st.selectbox(
+                "Usuário",
+                [None] + [u['id'] for u in usuarios],
+                format_func=lambda id: "Todos" if id is None else next(u['nome'] for u in usuarios if u['id'] == id),
+                key="auditoria_usuario"
+            )
+        
+        with col2:
+            acao = st.selectbox(
+                "Ação",
+                [None] + auditoria.acoes(),
+                format_func=lambda a: "Todas" if a is None else a,
+                key="auditoria_acao"
+            )
+        
+        with col3:
+            veiculo = st.selectbox(
+                "Veículo",
+                [None] + [v['id'] for v in veiculos],
+                format_func=lambda id: "Todos" if id is None else next(v['placa'] for v in veiculos if v['id'] == id),
+                key="auditoria_veiculo"
+            )
+        
+        with col4:
+            periodo = st.date_input(
+                "Período",
+                value=(datetime.now().date().replace(day=1), datetime.now().date()),
+                key="auditoria_periodo"
+            )
+        
+        inicio, fim = periodo if len(periodo) == 2 else (None, None)
+        filtros = {
+            'usuario_id': usuario,
+            'acao': acao,
+            'entidade': 'veiculo' if veiculo is not None else None,
+            'entidade_id': veiculo,
+            'inicio': inicio,
+            'fim': fim
+        }
+        total = auditoria.contar(**filtros)
+        paginas = max((total + AUDITORIA_LINHAS_POR_PAGINA - 1) // AUDITORIA_LINHAS_POR_PAGINA, 1)
+        pagina = st.number_input("Página", min_value=1, max_value=paginas, value=1, key="auditoria_pagina") - 1
+        registros = auditoria.consultar(pagina, **filtros)
+        
+        st.caption(f"{total} registros")
+        if registros:
+            st.dataframe(
+                [
+                    {
+                        "Data/Hora": r['momento'],
+                        "Usuário": r['usuario_nome'] or r['usuario_id'],
+                        "Ação": r['acao'],
+                        "Objeto": f"{r['entidade']} {r['entidade_id']}" if r['entidade'] else "",
+                        "Detalhes": r['detalhes']
+                    }
+                    for r in registros
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
+        else:
+            st.info("Nenhum registro de auditoria no filtro selecionado.")
+    
+    # Aba de Configurações
+    with tab5:
         st.header("Configurações do Sistema")
         
         # Configurações de Backup
@@ -174,6 +344,26 @@ def main():
             value=report_generator.output_dir
         )
         
+        # Agendamentos (cron: minuto hora dia mês dia_da_semana)
+        st.subheader("Agendamento de Relatórios")
+        for agendamento in agendador.listar():
+            tipo = agendamento['tipo']
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                expressao = st.text_input(
+                    f"Relatório {NOMES_RELATORIOS[tipo]} (cron)",
+                    value=agendamento['expressao'],
+                    key=f"cron_{tipo}"
+                )
+            with col2:
+                ativo = st.checkbox("Ativo", value=bool(agendamento['ativo']), key=f"ativo_{tipo}")
+            if expressao != agendamento['expressao'] or ativo != bool(agendamento['ativo']):
+                try:
+                    agendador.atualizar(tipo, expressao, ativo)
+                    show_success(f"Agendamento do relatório {NOMES_RELATORIOS[tipo]} atualizado!")
+                except ValueError as e:
+                    show_error(str(e))
+        
         # Configurações de Log
         st.subheader("Configurações de Log")
         log_level = st.selectbox(
@@ -2,9 +2,11 @@ import streamlit as st
 import os
 from datetime import datetime
 from utils.db import get_connection
+from utils.blobs import BlobStore
 import pandas as pd
 import sqlite3
 import logging
+from typing import Optional
 from utils.auth import Auth
 from utils.database import Database
 from utils.validators import (
@@ -41,32 +43,43 @@ if 'autenticado' not in st.session_state or not st.session_state.autenticado:
 st.title("👤 Cadastro de Condutores")
 
 # Função para salvar o arquivo da CNH
-def salvar_arquivo_cnh(uploaded_file):
-    if uploaded_file is not None:
-        # Criar diretório se não existir
-        os.makedirs('data/arquivos/cnhs', exist_ok=True)
-        
-        # Gerar nome único para o arquivo
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        file_extension = os.path.splitext(uploaded_file.name)[1]
-        filename = f"cnh_{timestamp}{file_extension}"
+def salvar_arquivo_cnh(db: Database, uploaded_file) -> Optional[str]:
+    """
+    Grava a CNH digitalizada no armazenamento de blobs do banco.
+    
+    Chamada dentro de db.transaction(), o registro do blob faz parte da
+    mesma transação do condutor.
+    
+    Args:
+        db: Instância do banco de dados
+        uploaded_file: Arquivo enviado pelo st.file_uploader (ou None)
         
-        # Salvar arquivo
-        file_path = os.path.join('data/arquivos/cnhs', filename)
-        with open(file_path, 'wb') as f:
-            f.write(uploaded_file.getbuffer())
+    Returns:
+        Hash do blob (valor de condutores.cnh_blob) ou None se não houver arquivo
+    """
+    if uploaded_file is None:
+        return None
         
-        return file_path
-    return None
+    # Gerar nome para download
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    file_extension = os.path.splitext(uploaded_file.name)[1]
+    filename = f"cnh_{timestamp}{file_extension}"
+    
+    return BlobStore(db.db_path).salvar(
+        uploaded_file.getvalue(),
+        uploaded_file.type,
+        filename
+    )
 
 # Função para cadastrar condutor
-def cadastrar_condutor(db: Database, dados: dict) -> tuple[bool, str]:
+def cadastrar_condutor(db: Database, dados: dict, arquivo_cnh=None) -> tuple[bool, str]:
     """
     Cadastra um novo condutor.
     
     Args:
         db: Instância do banco de dados
         dados: Dados do condutor
+        arquivo_cnh: CNH digitalizada enviada pelo formulário (opcional)
         
     Returns:
         Tuple com (bool indicando sucesso, mensagem)
@@ -100,21 +113,30 @@ def cadastrar_condutor(db: Database, dados: dict) -> tuple[bool, str]:
         if condutor:
             return False, "CNH já cadastrada"
             
-        # Insere condutor
-        query = """
-            INSERT INTO condutores (
-                nome, cnh, categoria, validade_cnh, 
-                telefone, email
-            ) VALUES (?, ?, ?, ?, ?, ?)
-        """
-        db.execute_query(query, (
-            dados['nome'],
-            dados['cnh'],
-            dados['categoria'],
-            dados['validade_cnh'],
-            dados['telefone'],
-            dados['email']
-        ))
+        # Insere condutor e, só depois dele, a CNH digitalizada, na mesma
+        # transação: se o INSERT falhar, nenhum blob é gravado
+        with db.transaction() as conn:
+            query = """
+                INSERT INTO condutores (
+                    nome, cnh, categoria, validade_cnh, 
+                    telefone, email
+                ) VALUES (?, ?, ?, ?, ?, ?)
+            """
+            cursor = conn.execute(query, (
+                dados['nome'],
+                dados['cnh'],
+                dados['categoria'],
+                dados['validade_cnh'],
+                dados['telefone'],
+                dados['email']
+            ))
+            
+            cnh_blob = salvar_arquivo_cnh(db, arquivo_cnh)
+            if cnh_blob:
+                conn.execute(
+                    "UPDATE condutores SET cnh_blob = ? WHERE id = ?",
+                    (cnh_blob, cursor.lastrowid)
+                )
         
         logger.info(f"Condutor {dados['nome']} cadastrado com sucesso")
         return True, SUCESSO_REGISTRO
@@ -124,7 +146,7 @@ def cadastrar_condutor(db: Database, dados: dict) -> tuple[bool, str]:
         return False, str(e)
 
 # Função para atualizar condutor
-def atualizar_condutor(db: Database, id: int, dados: dict) -> tuple[bool, str]:
+def atualizar_condutor(db: Database, id: int, dados: dict, arquivo_cnh=None) -> tuple[bool, str]:
     """
     Atualiza os dados de um condutor.
     
@@ -132,6 +154,7 @@ def atualizar_condutor(db: Database, id: int, dados: dict) -> tuple[bool, str]:
         db: Instância do banco de dados
         id: ID do condutor
         dados: Novos dados do condutor
+        arquivo_cnh: Nova CNH digitalizada (opcional; sem arquivo, mantém a atual)
         
     Returns:
         Tuple com (bool indicando sucesso, mensagem)
@@ -165,22 +188,31 @@ def atualizar_condutor(db: Database, id: int, dados: dict) -> tuple[bool, str]:
         if condutor:
             return False, "CNH já cadastrada para outro condutor"
             
-        # Atualiza condutor
-        query = """
-            UPDATE condutores 
-            SET nome = ?, cnh = ?, categoria = ?, 
-                validade_cnh = ?, telefone = ?, email = ?
-            WHERE id = ?
-        """
-        db.execute_query(query, (
-            dados['nome'],
-            dados['cnh'],
-            dados['categoria'],
-            dados['validade_cnh'],
-            dados['telefone'],
-            dados['email'],
-            id
-        ))
+        # Atualiza condutor e, só depois, a CNH digitalizada, se enviada
+        # (sem arquivo novo, mantém a atual)
+        with db.transaction() as conn:
+            query = """
+                UPDATE condutores 
+                SET nome = ?, cnh = ?, categoria = ?, 
+                    validade_cnh = ?, telefone = ?, email = ?
+                WHERE id = ?
+            """
+            conn.execute(query, (
+                dados['nome'],
+                dados['cnh'],
+                dados['categoria'],
+                dados['validade_cnh'],
+                dados['telefone'],
+                dados['email'],
+                id
+            ))
+            
+            cnh_blob = salvar_arquivo_cnh(db, arquivo_cnh)
+            if cnh_blob:
+                conn.execute(
+                    "UPDATE condutores SET cnh_blob = ? WHERE id = ?",
+                    (cnh_blob, id)
+                )
         
         logger.info(f"Condutor {dados['nome']} atualizado com sucesso")
         return True, SUCESSO_ATUALIZACAO
@@ -265,6 +297,7 @@ with st.form("cadastro_condutor"):
     with col2:
         telefone = st.text_input("Telefone")
         email = st.text_input("Email")
+        arquivo_cnh = st.file_uploader("CNH digitalizada (opcional)", type=["pdf", "png", "jpg", "jpeg"])
     
     submitted = st.form_submit_button("Cadastrar Condutor")
     
@@ -283,7 +316,8 @@ with st.form("cadastro_condutor"):
                     'validade_cnh': validade_cnh.strftime('%Y-%m-%d'),
                     'telefone': telefone,
                     'email': email
-                }
+                },
+                arquivo_cnh
             )
             
             if sucesso:
@@ -440,6 +474,12 @@ def main():
                         value=st.session_state.get('editando_condutor', {}).get('email', '')
                     )
                     
+                    arquivo_cnh = st.file_uploader(
+                        "CNH digitalizada (opcional)",
+                        type=["pdf", "png", "jpg", "jpeg"],
+                        key="form_condutor_cnh"
+                    )
+                    
                 # Botões
                 col1, col2 = st.columns(2)
                 
@@ -458,7 +498,8 @@ def main():
                             sucesso, mensagem = atualizar_condutor(
                                 db,
                                 st.session_state['editando_condutor']['id'],
-                                dados
+                                dados,
+                                arquivo_cnh
                             )
                         else:
                             sucesso, mensagem = cadastrar_condutor(
@@ -470,7 +511,8 @@ def main():
                                     'validade_cnh': validade_cnh.strftime('%Y-%m-%d'),
                                     'telefone': telefone,
                                     'email': email
-                                }
+                                },
+                                arquivo_cnh
                             )
                             
                         if sucesso:
@@ -11,7 +11,8 @@ from utils.constants import (
     SUCESSO_REGISTRO,
     SUCESSO_ATUALIZACAO,
     SUCESSO_EXCLUSAO,
-    AVISO_CAMPO_OBRIGATORIO
+    AVISO_CAMPO_OBRIGATORIO,
+    VEICULO_DISPONIVEL
 )
 
 # Configuração do logger
@@ -102,7 +103,7 @@ def cadastrar_veiculo(db: Database, dados: dict) -> tuple[bool, str]:
             dados['ano'],
             dados['placa'],
             dados['quilometragem'],
-            'disponível'
+            VEICULO_DISPONIVEL
         ))
         
         logger.info(f"Veículo {dados['placa']} cadastrado com sucesso")
@@ -2,10 +2,10 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
 import logging
 from utils.auth import Auth
 from utils.database import Database
+from utils.estatisticas import obter_dados_dashboard
 from utils.constants import TITULO_APP, ICONE_APP
 
 # Configuração do logger
@@ -29,33 +29,7 @@ def get_estatisticas_gerais(db: Database) -> dict:
         Dicionário com as estatísticas
     """
     try:
-        # Total de condutores
-        total_condutores = db.execute_query("SELECT COUNT(*) as total FROM condutores")[0]['total']
-        
-        # Total de veículos
-        total_veiculos = db.execute_query("SELECT COUNT(*) as total FROM veiculos")[0]['total']
-        
-        # Veículos em uso
-        veiculos_em_uso = db.execute_query("""
-            SELECT COUNT(*) as total 
-            FROM registros 
-            WHERE data_entrada IS NULL
-        """)[0]['total']
-        
-        # Total de registros no mês atual
-        primeiro_dia_mes = datetime.now().replace(day=1).strftime('%Y-%m-%d')
-        registros_mes = db.execute_query(f"""
-            SELECT COUNT(*) as total 
-            FROM registros 
-            WHERE strftime('%Y-%m-%d', data_saida) >= ?
-        """, (primeiro_dia_mes,))[0]['total']
-        
-        return {
-            'total_condutores': total_condutores,
-            'total_veiculos': total_veiculos,
-            'veiculos_em_uso': veiculos_em_uso,
-            'registros_mes': registros_mes
-        }
+        return dict(obter_dados_dashboard(db)['estatisticas'])
     except Exception as e:
         logger.error(f"Erro ao obter estatísticas gerais: {str(e)}")
         return {
@@ -76,18 +50,7 @@ def get_registros_por_dia(db: Database) -> pd.DataFrame:
         DataFrame com os registros por dia
     """
     try:
-        data_inicial = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-        registros = db.execute_query("""
-            SELECT 
-                strftime('%Y-%m-%d', data_saida) as data,
-                COUNT(*) as total
-            FROM registros
-            WHERE strftime('%Y-%m-%d', data_saida) >= ?
-            GROUP BY strftime('%Y-%m-%d', data_saida)
-            ORDER BY data
-        """, (data_inicial,))
-        
-        return pd.DataFrame(registros)
+        return pd.DataFrame(obter_dados_dashboard(db)['registros_por_dia'])
     except Exception as e:
         logger.error(f"Erro ao obter registros por dia: {str(e)}")
         return pd.DataFrame(columns=['data', 'total'])
@@ -103,19 +66,7 @@ def get_veiculos_mais_utilizados(db: Database) -> pd.DataFrame:
         DataFrame com os veículos mais utilizados
     """
     try:
-        veiculos = db.execute_query("""
-            SELECT 
-                v.marca || ' ' || v.modelo as veiculo,
-                v.placa,
-                COUNT(r.id) as total_usos
-            FROM veiculos v
-            LEFT JOIN registros r ON v.id = r.veiculo_id
-            GROUP BY v.id
-            ORDER BY total_usos DESC
-            LIMIT 5
-        """)
-        
-        return pd.DataFrame(veiculos)
+        return pd.DataFrame(obter_dados_dashboard(db)['veiculos_mais_utilizados'])
     except Exception as e:
         logger.error(f"Erro ao obter veículos mais utilizados: {str(e)}")
         return pd.DataFrame(columns=['veiculo', 'placa', 'total_usos'])
@@ -131,18 +82,7 @@ def get_condutores_mais_ativos(db: Database) -> pd.DataFrame:
         DataFrame com os condutores mais ativos
     """
     try:
-        condutores = db.execute_query("""
-            SELECT 
-                c.nome,
-                COUNT(r.id) as total_usos
-            FROM condutores c
-            LEFT JOIN registros r ON c.id = r.condutor_id
-            GROUP BY c.id
-            ORDER BY total_usos DESC
-            LIMIT 5
-        """)
-        
-        return pd.DataFrame(condutores)
+        return pd.DataFrame(obter_dados_dashboard(db)['condutores_mais_ativos'])
     except Exception as e:
         logger.error(f"Erro ao obter condutores mais ativos: {str(e)}")
         return pd.DataFrame(columns=['nome', 'total_usos'])
@@ -2,9 +2,14 @@ import streamlit as st
 import sqlite3
 import logging
 import os
-from datetime import datetime
-from utils.db import get_connection
+from utils.db import get_connection, DB_PATH
+from utils.database import Database
+from utils.common import audit_action
 from utils.checklist import get_checklist_entrada_form
+from utils.estatisticas import invalidar_cache_dashboard
+from utils.periodos import agora
+from utils.fila_pdf import get_fila_pdf, exibir_status_pdf
+from utils.constants import VEICULO_DISPONIVEL
 
 # Configuração de logging
 logger = logging.getLogger(__name__)
@@ -49,66 +54,92 @@ def get_veiculos_em_uso():
 
 # Função para registrar entrada
 def registrar_entrada(registro_id, km_entrada, checklist, observacoes):
-    conn = None
     try:
         logger.info(f"Iniciando registro de entrada - Registro ID: {registro_id}")
         
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Obter dados do registro
-        cursor.execute("""
-        SELECT v.id, v.marca, v.modelo, v.placa, r.km_saida
-        FROM registros r
-        JOIN veiculos v ON r.veiculo_id = v.id
-        WHERE r.id = ?
-        """, (registro_id,))
-        
-        registro = cursor.fetchone()
-        if not registro:
-            logger.error(f"Registro {registro_id} não encontrado")
-            return False, "Registro não encontrado."
+        db = Database(DB_PATH)
+        fila = get_fila_pdf(DB_PATH)
         
-        # Validar quilometragem
-        if km_entrada < registro[4]:
-            logger.warning(f"Quilometragem de entrada ({km_entrada}) menor que a de saída ({registro[4]})")
-            return False, "Quilometragem de entrada não pode ser menor que a quilometragem de saída."
+        # Atualizações e comprovante em uma única transação
+        with db.transaction() as conn:
+            cursor = conn.cursor()
+            
+            # Obter dados do registro
+            cursor.execute("""
+            SELECT v.id, v.marca, v.modelo, v.placa, r.km_saida
+            FROM registros r
+            JOIN veiculos v ON r.veiculo_id = v.id
+            WHERE r.id = ?
+            """, (registro_id,))
+            
+            registro = cursor.fetchone()
+            if not registro:
+                logger.error(f"Registro {registro_id} não encontrado")
+                return False, "Registro não encontrado."
+            
+            # Validar quilometragem
+            if km_entrada < registro[4]:
+                logger.warning(f"Quilometragem de entrada ({km_entrada}) menor que a de saída ({registro[4]})")
+                return False, "Quilometragem de entrada não pode ser menor que a quilometragem de saída."
+            
+            # Atualizar registro
+            data_entrada = agora()
+            cursor.execute("""
+            UPDATE registros
+            SET data_entrada = ?,
+                km_entrada = ?,
+                checklist_entrada = ?,
+                observacoes_entrada = ?
+            WHERE id = ?
+            """, (
+                data_entrada,
+                km_entrada,
+                checklist,
+                observacoes,
+                registro_id
+            ))
+            
+            # Atualizar status do veículo
+            cursor.execute("""
+            UPDATE veiculos
+            SET status = ?,
+                quilometragem = ?
+            WHERE id = ?
+            """, (VEICULO_DISPONIVEL, km_entrada, registro[0]))
+            
+            # Comprovante gerado em segundo plano
+            dados_pdf = {
+                'veiculo_placa': registro[3],
+                'veiculo_modelo': f"{registro[1]} {registro[2]}",
+                'quilometragem': km_entrada,
+                'checklist': {item: True for item in checklist.split("\n") if item},
+                'observacoes': observacoes,
+                'data_hora': data_entrada
+            }
+            trabalho_id = fila.enfileirar('entrada', dados_pdf, registro_id)
         
-        # Atualizar registro
-        cursor.execute("""
-        UPDATE registros
-        SET data_entrada = ?,
-            km_entrada = ?,
-            checklist_entrada = ?,
-            observacoes_entrada = ?
-        WHERE id = ?
-        """, (
-            datetime.now(),
-            km_entrada,
-            checklist,
-            observacoes,
-            registro_id
-        ))
-        
-        # Atualizar status do veículo
-        cursor.execute("""
-        UPDATE veiculos
-        SET status = 'disponivel',
-            quilometragem = ?
-        WHERE id = ?
-        """, (km_entrada, registro[0]))
+        invalidar_cache_dashboard()
+        st.session_state['pdf_entrada_trabalho'] = trabalho_id
+        audit_action(
+            'registrar_entrada',
+            f"Veículo {registro[3]} devolvido com {km_entrada} km (registro {registro_id})",
+            'veiculo',
+            registro[0]
+        )
         
-        conn.commit()
         logger.info(f"Registro de entrada concluído com sucesso - ID: {registro_id}")
         return True, "Entrada registrada com sucesso!"
     except Exception as e:
         logger.error(f"Erro ao registrar entrada: {str(e)}")
-        if conn:
-            conn.rollback()
         return False, f"Erro ao registrar entrada: {str(e)}"
-    finally:
-        if conn:
-            conn.close()
+
+# Comprovante da última entrada registrada nesta sessão
+if st.session_state.get('pdf_entrada_trabalho'):
+    exibir_status_pdf(
+        get_fila_pdf(DB_PATH),
+        st.session_state['pdf_entrada_trabalho'],
+        "pdf_entrada"
+    )
 
 # Obter veículos em uso
 veiculos = get_veiculos_em_uso()
@@ -1,17 +1,22 @@
 import streamlit as st
 import pandas as pd
 import logging
-from datetime import datetime
 from utils.auth import Auth
-from utils.database import Database
+from utils.common import audit_action
+from utils.database import Database, ConflitoConcorrencia
 from utils.checklist import Checklist
-from utils.pdf_generator import PDFGenerator
+from utils.fila_pdf import get_fila_pdf, exibir_status_pdf
+from utils.estatisticas import invalidar_cache_dashboard
 from utils.validators import validar_quilometragem
+from utils.periodos import agora
 from utils.constants import (
     TITULO_APP,
     ICONE_APP,
     SUCESSO_SAIDA,
-    AVISO_CAMPO_OBRIGATORIO
+    AVISO_CAMPO_OBRIGATORIO,
+    ERRO_CONFLITO_SAIDA,
+    VEICULO_DISPONIVEL,
+    VEICULO_EM_USO
 )
 
 # Configuração do logger
@@ -35,19 +40,7 @@ def get_condutores_disponiveis(db: Database) -> list:
         Lista de condutores disponíveis
     """
     try:
-        condutores = db.execute_query("""
-            SELECT 
-                c.id,
-                c.nome,
-                c.cnh
-            FROM condutores c
-            LEFT JOIN registros r ON c.id = r.condutor_id
-            WHERE r.data_entrada IS NOT NULL
-            OR r.id IS NULL
-            ORDER BY c.nome
-        """)
-        
-        return condutores
+        return db.get_condutores_disponiveis()
     except Exception as e:
         logger.error(f"Erro ao obter condutores disponíveis: {str(e)}")
         return []
@@ -63,21 +56,7 @@ def get_veiculos_disponiveis(db: Database) -> list:
         Lista de veículos disponíveis
     """
     try:
-        veiculos = db.execute_query("""
-            SELECT 
-                v.id,
-                v.marca,
-                v.modelo,
-                v.placa,
-                v.quilometragem
-            FROM veiculos v
-            LEFT JOIN registros r ON v.id = r.veiculo_id
-            WHERE r.data_entrada IS NOT NULL
-            OR r.id IS NULL
-            ORDER BY v.marca, v.modelo
-        """)
-        
-        return veiculos
+        return db.get_veiculos_disponiveis()
     except Exception as e:
         logger.error(f"Erro ao obter veículos disponíveis: {str(e)}")
         return []
@@ -109,73 +88,85 @@ def registrar_saida(
         if not all([condutor_id, veiculo_id, quilometragem]):
             return False, AVISO_CAMPO_OBRIGATORIO
             
-        # Verifica se condutor está disponível
-        condutor = db.execute_query("""
-            SELECT c.* 
-            FROM condutores c
-            LEFT JOIN registros r ON c.id = r.condutor_id
-            WHERE c.id = ?
-            AND (r.data_entrada IS NOT NULL OR r.id IS NULL)
-        """, (condutor_id,))
-        
-        if not condutor:
-            return False, "Condutor não está disponível"
-            
-        # Verifica se veículo está disponível
-        veiculo = db.execute_query("""
-            SELECT v.*
-            FROM veiculos v
-            LEFT JOIN registros r ON v.id = r.veiculo_id
-            WHERE v.id = ?
-            AND (r.data_entrada IS NOT NULL OR r.id IS NULL)
-        """, (veiculo_id,))
+        fila = get_fila_pdf(db.db_path)
         
-        if not veiculo:
-            return False, "Veículo não está disponível"
+        # Leitura, reserva do veículo e inserção em uma única transação
+        with db.transaction() as conn:
+            condutor = db.get_condutores_disponiveis(condutor_id)
+            if not condutor:
+                return False, ERRO_CONFLITO_SAIDA.format("Condutor")
+                
+            veiculo = db.execute_query(
+                "SELECT * FROM veiculos WHERE id = ?",
+                (veiculo_id,)
+            )
+            if not veiculo:
+                return False, "Veículo não encontrado"
+                
+            # Valida quilometragem
+            valido, msg = validar_quilometragem(quilometragem, veiculo[0]['quilometragem'])
+            if not valido:
+                return False, msg
+                
+            # Reserva o veículo apenas se ainda estiver disponível
+            cursor = conn.execute("""
+                UPDATE veiculos
+                SET status = ?, quilometragem = ?
+                WHERE id = ?
+                AND status = ?
+                AND NOT EXISTS (
+                    SELECT 1 FROM registros r
+                    WHERE r.veiculo_id = veiculos.id
+                    AND r.data_entrada IS NULL
+                )
+            """, (VEICULO_EM_USO, quilometragem, veiculo_id, VEICULO_DISPONIVEL))
+            if cursor.rowcount == 0:
+                raise ConflitoConcorrencia(ERRO_CONFLITO_SAIDA.format("Veículo"))
+                
+            # Registra saída
+            data_saida = agora()
+            cursor = conn.execute("""
+                INSERT INTO registros (
+                    condutor_id, veiculo_id, data_saida,
+                    km_saida, checklist_saida, observacoes_saida
+                ) VALUES (?, ?, ?, ?, ?, ?)
+            """, (
+                condutor_id,
+                veiculo_id,
+                data_saida,
+                quilometragem,
+                str(checklist),
+                observacoes
+            ))
             
-        # Valida quilometragem
-        valido, msg = validar_quilometragem(quilometragem, veiculo[0]['quilometragem'])
-        if not valido:
-            return False, msg
+            # Comprovante gerado em segundo plano, gravado na mesma transação
+            dados_pdf = {
+                'condutor_nome': condutor[0]['nome'],
+                'condutor_cnh': condutor[0]['cnh'],
+                'veiculo_placa': veiculo[0]['placa'],
+                'veiculo_modelo': f"{veiculo[0]['marca']} {veiculo[0]['modelo']}",
+                'quilometragem': quilometragem,
+                'checklist': checklist,
+                'observacoes': observacoes,
+                'data_hora': data_saida
+            }
+            trabalho_id = fila.enfileirar('saida', dados_pdf, cursor.lastrowid)
             
-        # Registra saída
-        query = """
-            INSERT INTO registros (
-                condutor_id, veiculo_id, data_saida,
-                km_saida, checklist_saida, observacoes_saida
-            ) VALUES (?, ?, ?, ?, ?, ?)
-        """
-        db.execute_query(query, (
-            condutor_id,
-            veiculo_id,
-            datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            quilometragem,
-            str(checklist),
-            observacoes
-        ))
-        
-        # Atualiza quilometragem do veículo
-        db.execute_query(
-            "UPDATE veiculos SET quilometragem = ? WHERE id = ?",
-            (quilometragem, veiculo_id)
+        invalidar_cache_dashboard()
+        st.session_state['pdf_saida_trabalho'] = trabalho_id
+        audit_action(
+            'registrar_saida',
+            f"Veículo {veiculo[0]['placa']} retirado por {condutor[0]['nome']} com {quilometragem} km",
+            'veiculo',
+            veiculo_id
         )
         
-        # Gera PDF
-        pdf = PDFGenerator()
-        dados_pdf = {
-            'condutor_nome': condutor[0]['nome'],
-            'condutor_cnh': condutor[0]['cnh'],
-            'veiculo_placa': veiculo[0]['placa'],
-            'veiculo_modelo': f"{veiculo[0]['marca']} {veiculo[0]['modelo']}",
-            'quilometragem': quilometragem,
-            'checklist': checklist,
-            'observacoes': observacoes
-        }
-        pdf.gerar_pdf_saida(dados_pdf)
-        
         logger.info(f"Saída registrada: Condutor {condutor[0]['nome']}, Veículo {veiculo[0]['placa']}")
         return True, SUCESSO_SAIDA
         
+    except ConflitoConcorrencia as e:
+        logger.warning(f"Conflito ao registrar saída do veículo {veiculo_id}: {str(e)}")
+        return False, str(e)
     except Exception as e:
         logger.error(f"Erro ao registrar saída: {str(e)}")
         return False, str(e)
@@ -197,6 +188,14 @@ def main():
         # Título
         st.title("Registro de Saída")
         
+        # Comprovante da última saída registrada nesta sessão
+        if st.session_state.get('pdf_saida_trabalho'):
+            exibir_status_pdf(
+                get_fila_pdf(db.db_path),
+                st.session_state['pdf_saida_trabalho'],
+                "pdf_saida"
+            )
+        
         # Obtém condutores e veículos disponíveis
         condutores = get_condutores_disponiveis(db)
         veiculos = get_veiculos_disponiveis(db)
@@ -0,0 +1,54 @@
+import sqlite3
+
+import pytest
+
+from utils.migrations import aplicar_migracoes
+from utils.periodos import filtro_periodo
+
+
+@pytest.fixture
+def conn(tmp_path):
+    caminho = str(tmp_path / "veiculos.db")
+    aplicar_migracoes(caminho)
+    conexao = sqlite3.connect(caminho)
+    yield conexao
+    conexao.close()
+
+
+def plano(conn, query, params=()):
+    """Retorna as linhas de detalhe do EXPLAIN QUERY PLAN da query."""
+    return [linha[3] for linha in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+
+
+def assert_sem_scan(detalhes):
+    assert not any(d.startswith("SCAN") for d in detalhes), detalhes
+
+
+def test_viagem_aberta_do_veiculo_usa_indice_parcial(conn):
+    detalhes = plano(conn, """
+        SELECT 1 FROM registros
+        WHERE veiculo_id = ? AND data_entrada IS NULL
+    """, (1,))
+    assert any("idx_registros_abertos_veiculo" in d for d in detalhes), detalhes
+    assert_sem_scan(detalhes)
+
+
+def test_viagem_aberta_do_condutor_usa_indice_parcial(conn):
+    detalhes = plano(conn, """
+        SELECT COUNT(*) FROM registros
+        WHERE condutor_id = ? AND data_entrada IS NULL
+    """, (1,))
+    assert any("idx_registros_abertos_condutor" in d for d in detalhes), detalhes
+    assert_sem_scan(detalhes)
+
+
+def test_periodo_de_data_saida_usa_indice_de_cobertura(conn):
+    filtro, params = filtro_periodo("data_saida", ("2024-01-01 00:00:00", "2024-02-01 00:00:00"))
+    detalhes = plano(conn, f"""
+        SELECT veiculo_id, km_saida, km_entrada FROM registros
+        WHERE {filtro}
+    """, params)
+    assert any(
+        "COVERING INDEX idx_registros_data_saida" in d for d in detalhes
+    ), detalhes
+    assert_sem_scan(detalhes)
@@ -0,0 +1,393 @@
+import hashlib
+import logging
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+from utils.database import Database
+from utils.db import DB_PATH
+from utils.migrations import aplicar_migracoes
+from utils.periodos import (
+    agora,
+    filtro_dias,
+    filtro_periodo,
+    formatar_timestamp,
+    intervalo_dia,
+    intervalo_mes,
+    intervalo_semana
+)
+from utils.constants import AGENDADOR_INTERVALO_VERIFICACAO
+
+logger = logging.getLogger(__name__)
+
+# Limites de cada campo da expressão cron
+CAMPOS_CRON = (
+    (0, 59),   # minuto
+    (0, 23),   # hora
+    (1, 31),   # dia do mês
+    (1, 12),   # mês
+    (0, 6),    # dia da semana (0 = domingo)
+)
+
+def _valores_campo(campo: str, minimo: int, maximo: int) -> Set[int]:
+    """
+    Expande um campo cron (*, n, a-b, */n, a-b/n e listas separadas por vírgula).
+
+    Args:
+        campo: Texto do campo
+        minimo: Menor valor permitido
+        maximo: Maior valor permitido
+
+    Returns:
+        Conjunto de valores aceitos
+    """
+    valores = set()
+    for parte in campo.split(','):
+        faixa, _, passo = parte.partition('/')
+        if faixa == '*':
+            inicio, fim = minimo, maximo
+        elif '-' in faixa:
+            inicio, fim = (int(v) for v in faixa.split('-'))
+        else:
+            inicio = fim = int(faixa)
+        if inicio < minimo or fim > maximo or inicio > fim:
+            raise ValueError(f"Valor fora do intervalo em '{campo}'")
+        valores.update(range(inicio, fim + 1, int(passo) if passo else 1))
+    return valores
+
+def proxima_execucao(expressao: str, apos: datetime) -> datetime:
+    """
+    Calcula o próximo horário que satisfaz uma expressão cron.
+
+    Como no cron, se dia do mês e dia da semana forem restritos, basta um
+    dos dois coincidir.
+
+    Args:
+        expressao: Expressão com cinco campos (minuto hora dia mês dia_da_semana)
+        apos: Momento de referência (exclusivo)
+
+    Returns:
+        Próximo horário de execução
+
+    Raises:
+        ValueError: Se a expressão for inválida
+    """
+    campos = expressao.split()
+    if len(campos) != 5:
+        raise ValueError(f"Expressão cron inválida: '{expressao}'")
+    minutos, horas, dias, meses, dias_semana = (
+        _valores_campo(campo, *limites) for campo, limites in zip(campos, CAMPOS_CRON)
+    )
+    dia_restrito, semana_restrita = campos[2] != '*', campos[4] != '*'
+
+    def dia_valido(momento: datetime) -> bool:
+        if momento.month not in meses:
+            return False
+        no_dia = momento.day in dias
+        na_semana = (momento.weekday() + 1) % 7 in dias_semana
+        if dia_restrito and semana_restrita:
+            return no_dia or na_semana
+        return no_dia and na_semana
+
+    momento = apos.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    limite = momento + timedelta(days=366 * 5)
+    while momento < limite:
+        if not dia_valido(momento):
+            momento = momento.replace(hour=0, minute=0) + timedelta(days=1)
+        elif momento.hour not in horas:
+            momento = momento.replace(minute=0) + timedelta(hours=1)
+        elif momento.minute not in minutos:
+            momento += timedelta(minutes=1)
+        else:
+            return momento
+    raise ValueError(f"Expressão cron sem execução possível: '{expressao}'")
+
+def referencia_periodo(tipo: str, momento: datetime) -> date:
+    """
+    Dia de referência do último período completo antes de um momento.
+
+    Os agendamentos rodam logo após a virada do período, então o relatório
+    cobre o dia, a semana ISO (segunda a domingo) ou o mês anterior.
+
+    Args:
+        tipo: 'diario', 'semanal' ou 'mensal'
+        momento: Momento da execução
+
+    Returns:
+        Ontem, a segunda-feira da semana anterior ou o último dia do mês anterior
+    """
+    dia = momento.date()
+    if tipo == 'diario':
+        return dia - timedelta(days=1)
+    if tipo == 'semanal':
+        return dia - timedelta(days=dia.weekday() + 7)
+    return dia.replace(day=1) - timedelta(days=1)
+
+def assinatura_dados(db: Database, tipo: str, referencia: date) -> str:
+    """
+    Calcula uma assinatura dos dados que alimentam um relatório.
+
+    Inclui o período (vai no cabeçalho do relatório) e agregados das tabelas
+    lidas. Se a assinatura não mudou desde a última execução, o relatório
+    gerado seria idêntico.
+
+    Args:
+        db: Instância do banco de dados
+        tipo: 'diario', 'semanal' ou 'mensal'
+        referencia: Dia do período do relatório (ver referencia_periodo)
+
+    Returns:
+        Hash SHA-256 da assinatura
+    """
+    if tipo == 'diario':
+        filtro, params = filtro_periodo('data_saida', intervalo_dia(referencia))
+        consulta = f"""
+            SELECT
+                (SELECT COUNT(*) || ':' || COALESCE(SUM(km_saida), 0) || ':'
+                        || COALESCE(SUM(km_entrada), 0) || ':' || COALESCE(MAX(id), 0)
+                 FROM registros WHERE {filtro}),
+                (SELECT group_concat(status || '=' || total) FROM (
+                    SELECT status, COUNT(*) as total FROM veiculos GROUP BY status ORDER BY status
+                ))
+        """
+    else:
+        intervalo = intervalo_semana(referencia) if tipo == 'semanal' else intervalo_mes(referencia)
+        filtro, params = filtro_dias('dia', intervalo)
+        consulta = f"""
+            SELECT
+                COUNT(*) || ':' || COALESCE(SUM(viagens), 0) || ':'
+                    || COALESCE(SUM(km), 0) || ':' || COALESCE(SUM(horas_uso), 0)
+            FROM uso_diario WHERE {filtro}
+        """
+        if tipo == 'mensal':
+            # A lista de viagens do mês também usa os km de entrada/saída
+            filtro_viagens, params_viagens = filtro_periodo('data_saida', intervalo_mes(referencia))
+            consulta = f"""
+                SELECT ({consulta}),
+                    (SELECT COUNT(*) || ':' || COALESCE(SUM(km_saida), 0) || ':'
+                            || COALESCE(SUM(km_entrada), 0) || ':' || COALESCE(MAX(id), 0)
+                     FROM registros WHERE {filtro_viagens})
+            """
+            params = (*params, *params_viagens)
+
+    linha = db.execute_query(consulta, params)[0]
+    texto = '|'.join([tipo, referencia.isoformat()] + [str(valor) for valor in tuple(linha)])
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+class AgendadorRelatorios:
+    """
+    Gera os relatórios agendados na tabela agendamentos em segundo plano.
+
+    Cada agendamento tem uma expressão cron. Quando vence, o agendamento é
+    reservado (a próxima execução é gravada antes de gerar, evitando que
+    dois processos gerem o mesmo relatório) e o relatório só é gerado se
+    os dados mudaram desde o último artefato.
+    """
+
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+        self.db = Database(db_path)
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._gerador = None
+
+    def iniciar(self):
+        """
+        Inicia a thread do agendador (apenas uma vez por processo).
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+            aplicar_migracoes(self.db_path)
+            self._calcular_pendentes()
+
+            self._parar.clear()
+            self._thread = threading.Thread(
+                target=self._executar,
+                name="agendador-relatorios",
+                daemon=True
+            )
+            self._thread.start()
+
+    def parar(self, timeout: Optional[float] = None):
+        """
+        Encerra a thread do agendador.
+
+        Args:
+            timeout: Tempo máximo de espera, em segundos
+        """
+        with self._lock:
+            self._parar.set()
+            if self._thread is not None:
+                self._thread.join(timeout)
+            self._thread = None
+
+    def _calcular_pendentes(self):
+        """
+        Preenche a próxima execução dos agendamentos que ainda não a têm.
+        """
+        agendamentos = self.db.execute_query(
+            "SELECT id, expressao FROM agendamentos WHERE proxima_execucao IS NULL"
+        )
+        for agendamento in agendamentos:
+            self.db.execute_query(
+                "UPDATE agendamentos SET proxima_execucao = ? WHERE id = ?",
+                (
+                    formatar_timestamp(proxima_execucao(agendamento['expressao'], datetime.now())),
+                    agendamento['id']
+                )
+            )
+
+    def listar(self) -> List[Dict[str, Any]]:
+        """
+        Lista os agendamentos e o último artefato de cada um.
+
+        Returns:
+            Lista de dicionários com os dados de agendamentos
+        """
+        return [dict(linha) for linha in self.db.execute_query(
+            "SELECT * FROM agendamentos ORDER BY id"
+        )]
+
+    def ultimo_artefato(self, tipo: str) -> Optional[Dict[str, Any]]:
+        """
+        Retorna o último relatório gerado de um tipo.
+
+        Args:
+            tipo: 'diario', 'semanal' ou 'mensal'
+
+        Returns:
+            Dicionário com blob e gerado_em, ou None se nunca foi gerado
+        """
+        resultado = self.db.execute_query(
+            "SELECT ultimo_blob as blob, gerado_em FROM agendamentos WHERE tipo = ? AND ultimo_blob IS NOT NULL",
+            (tipo,)
+        )
+        return dict(resultado[0]) if resultado else None
+
+    def atualizar(self, tipo: str, expressao: str, ativo: bool = True):
+        """
+        Altera a expressão cron de um agendamento.
+
+        Args:
+            tipo: 'diario', 'semanal' ou 'mensal'
+            expressao: Nova expressão cron
+            ativo: Se o agendamento está ativo
+
+        Raises:
+            ValueError: Se a expressão for inválida
+        """
+        proxima = formatar_timestamp(proxima_execucao(expressao, datetime.now()))
+        self.db.execute_query("""
+            UPDATE agendamentos
+            SET expressao = ?, ativo = ?, proxima_execucao = ?
+            WHERE tipo = ?
+        """, (expressao, int(ativo), proxima, tipo))
+
+    def _reservar_vencido(self) -> Optional[Dict[str, Any]]:
+        """
+        Reserva um agendamento vencido, já gravando sua próxima execução.
+
+        Returns:
+            Agendamento reservado ou None
+        """
+        with self.db.transaction() as conn:
+            agendamento = conn.execute("""
+                SELECT * FROM agendamentos
+                WHERE ativo = 1 AND proxima_execucao <= ?
+                ORDER BY proxima_execucao
+                LIMIT 1
+            """, (agora(),)).fetchone()
+            if agendamento is None:
+                return None
+
+            conn.execute("""
+                UPDATE agendamentos
+                SET proxima_execucao = ?, ultima_execucao = ?
+                WHERE id = ?
+            """, (
+                formatar_timestamp(proxima_execucao(agendamento['expressao'], datetime.now())),
+                agora(),
+                agendamento['id']
+            ))
+            return dict(agendamento)
+
+    def executar(self, agendamento: Dict[str, Any], forcar: bool = False) -> Optional[str]:
+        """
+        Gera o relatório do último período completo de um agendamento, se
+        os dados mudaram.
+
+        Args:
+            agendamento: Linha da tabela agendamentos
+            forcar: Gera mesmo que a assinatura não tenha mudado
+
+        Returns:
+            Hash do blob gerado ou None se a geração foi dispensada
+        """
+        tipo = agendamento['tipo']
+        referencia = referencia_periodo(tipo, datetime.now())
+        assinatura = assinatura_dados(self.db, tipo, referencia)
+        if not forcar and agendamento['ultimo_blob'] and assinatura == agendamento['assinatura']:
+            logger.info(f"Relatório {tipo} sem alterações nos dados; geração dispensada")
+            return None
+
+        if self._gerador is None:
+            # Importação tardia: reports carrega pandas e utils.common
+            from utils.reports import ReportGenerator
+            self._gerador = ReportGenerator()
+
+        sucesso, resultado = getattr(self._gerador, f"gerar_relatorio_{tipo}")(referencia=referencia)
+        if not sucesso:
+            self.db.execute_query(
+                "UPDATE agendamentos SET ultimo_erro = ? WHERE id = ?",
+                (resultado, agendamento['id'])
+            )
+            return None
+
+        hash_blob = os.path.basename(resultado)
+        self.db.execute_query("""
+            UPDATE agendamentos
+            SET assinatura = ?, ultimo_blob = ?, gerado_em = ?, ultimo_erro = NULL
+            WHERE id = ?
+        """, (assinatura, hash_blob, agora(), agendamento['id']))
+        return hash_blob
+
+    def _executar(self):
+        """
+        Laço da thread do agendador.
+        """
+        while not self._parar.is_set():
+            try:
+                agendamento = self._reservar_vencido()
+                while agendamento is not None and not self._parar.is_set():
+                    self.executar(agendamento)
+                    agendamento = self._reservar_vencido()
+            except Exception as e:
+                logger.error(f"Erro no agendador de relatórios: {str(e)}")
+            self._parar.wait(AGENDADOR_INTERVALO_VERIFICACAO)
+
+# Um agendador por arquivo de banco de dados
+_agendadores: Dict[str, AgendadorRelatorios] = {}
+_agendadores_lock = threading.Lock()
+
+def get_agendador(db_path: str = DB_PATH) -> AgendadorRelatorios:
+    """
+    Obtém o agendador do banco informado, iniciando-o se necessário.
+
+    Args:
+        db_path: Caminho do banco de dados
+
+    Returns:
+        Agendador compartilhado pelo processo
+    """
+    chave = os.path.abspath(db_path)
+    with _agendadores_lock:
+        agendador = _agendadores.get(chave)
+        if agendador is None:
+            agendador = AgendadorRelatorios(db_path)
+            _agendadores[chave] = agendador
+    agendador.iniciar()
+    return agendador
@@ -0,0 +1,218 @@
+import atexit
+import logging
+import os
+import threading
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+from utils.database import Database
+from utils.db import DB_PATH
+from utils.migrations import aplicar_migracoes
+from utils.periodos import agora, filtro_periodo, intervalo_datas
+from utils.constants import (
+    AUDITORIA_LOTE,
+    AUDITORIA_INTERVALO_MS,
+    AUDITORIA_LINHAS_POR_PAGINA
+)
+
+logger = logging.getLogger(__name__)
+
+class GravadorAuditoria:
+    """
+    Grava a trilha de auditoria na tabela auditoria em lotes.
+
+    registrar() apenas acumula o registro em memória; uma thread grava o
+    buffer com um único executemany quando ele chega a AUDITORIA_LOTE
+    registros ou a cada AUDITORIA_INTERVALO_MS. O buffer restante é gravado
+    ao encerrar o processo.
+    """
+
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+        self.db = Database(db_path)
+        self._buffer: List[Tuple] = []
+        self._condicao = threading.Condition()
+        self._gravacao = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def iniciar(self):
+        """
+        Inicia a thread de gravação (apenas uma vez por processo).
+        """
+        with self._condicao:
+            if self._thread is not None:
+                return
+
+            os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+            aplicar_migracoes(self.db_path)
+
+            self._thread = threading.Thread(
+                target=self._executar,
+                name="gravador-auditoria",
+                daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.descarregar)
+
+    def registrar(
+        self,
+        usuario_id: Optional[int],
+        acao: str,
+        detalhes: Optional[str] = None,
+        entidade: Optional[str] = None,
+        entidade_id: Optional[int] = None
+    ):
+        """
+        Acrescenta uma ação à trilha de auditoria.
+
+        Args:
+            usuario_id: ID do usuário que executou a ação
+            acao: Nome da ação (ex.: 'registrar_saida')
+            detalhes: Texto livre
+            entidade: Tipo do objeto afetado (ex.: 'veiculo')
+            entidade_id: ID do objeto afetado
+        """
+        with self._condicao:
+            self._buffer.append((agora(), usuario_id, acao, entidade, entidade_id, detalhes))
+            if len(self._buffer) >= AUDITORIA_LOTE:
+                self._condicao.notify()
+
+    def descarregar(self):
+        """
+        Grava imediatamente os registros acumulados.
+        """
+        with self._gravacao:
+            with self._condicao:
+                lote, self._buffer = self._buffer, []
+            if not lote:
+                return
+
+            try:
+                with self.db.transaction() as conn:
+                    conn.executemany("""
+                        INSERT INTO auditoria (
+                            momento, usuario_id, acao, entidade, entidade_id, detalhes
+                        ) VALUES (?, ?, ?, ?, ?, ?)
+                    """, lote)
+            except Exception as e:
+                logger.error(f"Erro ao gravar {len(lote)} registro(s) de auditoria: {str(e)}")
+                # Devolve o lote ao buffer para a próxima tentativa
+                with self._condicao:
+                    self._buffer[:0] = lote
+
+    def _executar(self):
+        """
+        Laço da thread de gravação.
+        """
+        while True:
+            with self._condicao:
+                if len(self._buffer) < AUDITORIA_LOTE:
+                    self._condicao.wait(AUDITORIA_INTERVALO_MS / 1000)
+            self.descarregar()
+
+    def _filtro(
+        self,
+        usuario_id: Optional[int] = None,
+        acao: Optional[str] = None,
+        entidade: Optional[str] = None,
+        entidade_id: Optional[int] = None,
+        inicio: Optional[date] = None,
+        fim: Optional[date] = None
+    ) -> Tuple[str, Tuple]:
+        """Monta a cláusula WHERE dos filtros da consulta (todos opcionais)."""
+        condicoes, params = [], []
+        for coluna, valor in (
+            ('a.usuario_id', usuario_id),
+            ('a.acao', acao),
+            ('a.entidade', entidade),
+            ('a.entidade_id', entidade_id)
+        ):
+            if valor is not None:
+                condicoes.append(f"{coluna} = ?")
+                params.append(valor)
+        if inicio is not None and fim is not None:
+            filtro, params_periodo = filtro_periodo('a.momento', intervalo_datas(inicio, fim))
+            condicoes.append(filtro)
+            params.extend(params_periodo)
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        return where, tuple(params)
+
+    def contar(self, **filtros) -> int:
+        """
+        Conta os registros de auditoria de um filtro.
+
+        Args:
+            **filtros: usuario_id, acao, entidade, entidade_id, inicio e fim
+
+        Returns:
+            Quantidade de registros
+        """
+        self.descarregar()
+        where, params = self._filtro(**filtros)
+        return self.db.execute_query(
+            f"SELECT COUNT(*) as total FROM auditoria a {where}",
+            params
+        )[0]['total']
+
+    def consultar(
+        self,
+        pagina: int = 0,
+        por_pagina: int = AUDITORIA_LINHAS_POR_PAGINA,
+        **filtros
+    ) -> List[Dict[str, Any]]:
+        """
+        Consulta a trilha de auditoria, dos registros mais recentes aos mais antigos.
+
+        Args:
+            pagina: Número da página, a partir de 0
+            por_pagina: Registros por página
+            **filtros: usuario_id, acao, entidade, entidade_id, inicio e fim
+
+        Returns:
+            Registros da página, com o nome do usuário
+        """
+        self.descarregar()
+        where, params = self._filtro(**filtros)
+        registros = self.db.execute_query(f"""
+            SELECT a.*, u.nome as usuario_nome
+            FROM auditoria a
+            LEFT JOIN usuarios u ON u.id = a.usuario_id
+            {where}
+            ORDER BY a.momento DESC, a.id DESC
+            LIMIT ? OFFSET ?
+        """, (*params, por_pagina, pagina * por_pagina))
+        return [dict(registro) for registro in registros]
+
+    def acoes(self) -> List[str]:
+        """
+        Lista as ações já registradas.
+
+        Returns:
+            Nomes das ações, em ordem alfabética
+        """
+        self.descarregar()
+        return [linha['acao'] for linha in self.db.execute_query(
+            "SELECT DISTINCT acao FROM auditoria ORDER BY acao"
+        )]
+
+# Um gravador por arquivo de banco de dados
+_gravadores: Dict[str, GravadorAuditoria] = {}
+_gravadores_lock = threading.Lock()
+
+def get_auditoria(db_path: str = DB_PATH) -> GravadorAuditoria:
+    """
+    Obtém o gravador de auditoria do banco informado, iniciando-o se necessário.
+
+    Args:
+        db_path: Caminho do banco de dados
+
+    Returns:
+        Gravador compartilhado pelo processo
+    """
+    chave = os.path.abspath(db_path)
+    with _gravadores_lock:
+        gravador = _gravadores.get(chave)
+        if gravador is None:
+            gravador = GravadorAuditoria(db_path)
+            _gravadores[chave] = gravador
+    gravador.iniciar()
+    return gravador
@@ -1,14 +1,15 @@
 import streamlit as st
-import hashlib
 import logging
 from typing import Optional, Tuple
 from utils.database import Database
+from utils.security import security_manager, limitador_login, HashIndisponivel
 from utils.validators import validar_senha, validar_email
 from utils.constants import (
     ERRO_SENHA_INVALIDA,
     ERRO_EMAIL_INVALIDO,
     ERRO_USUARIO_NAO_ENCONTRADO,
-    ERRO_SENHA_INCORRETA
+    ERRO_SENHA_INCORRETA,
+    ERRO_BLOQUEIO
 )
 
 logger = logging.getLogger(__name__)
@@ -19,7 +20,7 @@ class Auth:
         
     def _hash_senha(self, senha: str) -> str:
         """
-        Gera o hash da senha.
+        Gera o hash da senha (bcrypt, calculado no pool de hash).
         
         Args:
             senha: Senha em texto plano
@@ -27,7 +28,23 @@ class Auth:
         Returns:
             Hash da senha
         """
-        return hashlib.sha256(senha.encode()).hexdigest()
+        return security_manager.hash_password(senha)
+        
+    def _atualizar_hash(self, usuario_id: int, senha: str) -> None:
+        """
+        Substitui um hash legado (SHA-256) pelo bcrypt após um login válido.
+        
+        Args:
+            usuario_id: ID do usuário
+            senha: Senha em texto plano, já verificada
+        """
+        try:
+            query = "UPDATE usuarios SET senha = ? WHERE id = ?"
+            self.db.execute_query(query, (self._hash_senha(senha), usuario_id))
+            logger.info(f"Hash da senha do usuário {usuario_id} atualizado para bcrypt")
+        except Exception as e:
+            # O login continua válido; a troca é tentada de novo no próximo
+            logger.error(f"Erro ao atualizar hash da senha: {str(e)}")
         
     def login(self, email: str, senha: str) -> Tuple[bool, str]:
         """
@@ -46,19 +63,31 @@ class Auth:
             if not email_valido:
                 return False, msg_erro
                 
+            # Recusa tentativas de usuários bloqueados antes de calcular hashes
+            chave = email.strip().lower()
+            minutos = limitador_login.minutos_bloqueado(chave)
+            if minutos:
+                logger.warning(f"Login bloqueado para o usuário {email}")
+                return False, ERRO_BLOQUEIO.format(minutos)
+                
             # Busca usuário
             query = "SELECT * FROM usuarios WHERE email = ?"
             usuarios = self.db.execute_query(query, (email,))
             
             if not usuarios:
+                limitador_login.registrar_falha(chave)
                 return False, ERRO_USUARIO_NAO_ENCONTRADO
                 
             usuario = usuarios[0]
-            senha_hash = self._hash_senha(senha)
             
-            if senha_hash != usuario['senha']:
+            if not security_manager.verify_password(senha, usuario['senha']):
+                limitador_login.registrar_falha(chave)
                 return False, ERRO_SENHA_INCORRETA
                 
+            limitador_login.registrar_sucesso(chave)
+            if security_manager.needs_rehash(usuario['senha']):
+                self._atualizar_hash(usuario['id'], senha)
+                
             # Salva dados na sessão
             st.session_state['usuario_id'] = usuario['id']
             st.session_state['usuario_nome'] = usuario['nome']
@@ -68,6 +97,10 @@ class Auth:
             logger.info(f"Usuário {email} logado com sucesso")
             return True, ""
             
+        except HashIndisponivel as e:
+            # Sobrecarga do pool de hash: não conta como tentativa falha
+            logger.warning(f"Login de {email} adiado: {str(e)}")
+            return False, str(e)
         except Exception as e:
             logger.error(f"Erro no login: {str(e)}")
             return False, str(e)
@@ -151,8 +184,7 @@ class Auth:
             if not usuarios:
                 return False, "Usuário não encontrado"
                 
-            senha_atual_hash = self._hash_senha(senha_atual)
-            if senha_atual_hash != usuarios[0]['senha']:
+            if not security_manager.verify_password(senha_atual, usuarios[0]['senha']):
                 return False, "Senha atual incorreta"
                 
             # Atualiza senha
@@ -1,11 +1,43 @@
+import gzip
+import hashlib
+import json
 import os
 import shutil
+import struct
+import time
 from datetime import datetime
 import sqlite3
 from utils.common import logger
+from utils.database import pools_do_banco
+from utils.db import DB_PATH
+from utils.migrations import aplicar_migracoes
+from utils.constants import (
+    BACKUP_PAGINAS_POR_PASSO,
+    BACKUP_PAUSA_ENTRE_PASSOS,
+    BACKUP_NIVEL_COMPRESSAO,
+    BACKUP_INCREMENTAIS_POR_COMPLETO,
+    BACKUP_RETENCAO,
+    POOL_TEMPO_ESPERA
+)
+
+# Formato dos backups: gzip contendo a assinatura, um cabeçalho JSON em uma
+# linha e registros (número da página em 4 bytes big-endian + conteúdo)
+ASSINATURA_BACKUP = b'VCBACKUP1\n'
+TAMANHO_HASH = 16  # bytes do blake2b de cada página
+
+BACKUP_COMPLETO = 'completo'
+BACKUP_INCREMENTAL = 'incremental'
+
+# Chave do período de cada nível da retenção GFS
+PERIODOS_RETENCAO = {
+    'horaria': lambda momento: momento.strftime('%Y%m%d%H'),
+    'diaria': lambda momento: momento.strftime('%Y%m%d'),
+    'semanal': lambda momento: momento.isocalendar()[:2],
+    'mensal': lambda momento: momento.strftime('%Y%m')
+}
 
 class BackupManager:
-    def __init__(self, db_path='data/database.db', backup_dir='data/backups'):
+    def __init__(self, db_path=DB_PATH, backup_dir='data/backups'):
         self.db_path = db_path
         self.backup_dir = backup_dir
         self._ensure_backup_dir()
@@ -16,27 +48,44 @@ class BackupManager:
             os.makedirs(self.backup_dir)
             logger.info(f"Diretório de backup criado: {self.backup_dir}")
     
-    def _get_backup_filename(self):
-        """Gera nome do arquivo de backup com timestamp"""
+    def _get_backup_filename(self, tipo):
+        """Gera nome do arquivo de backup com timestamp e tipo"""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        return f"backup_{timestamp}.db"
+        return f"backup_{timestamp}_{tipo}.gz"
     
-    def create_backup(self):
-        """Cria um backup do banco de dados"""
+    def create_backup(self, completo=False):
+        """
+        Cria um backup do banco de dados.
+        
+        Por padrão o backup é incremental: guarda apenas as páginas alteradas
+        desde o backup anterior. Um backup completo é feito quando não há
+        backup anterior, a cada BACKUP_INCREMENTAIS_POR_COMPLETO incrementais
+        ou quando solicitado.
+        """
         try:
             # Verifica se o banco existe
             if not os.path.exists(self.db_path):
                 logger.error(f"Banco de dados não encontrado: {self.db_path}")
                 return False, "Banco de dados não encontrado"
             
-            # Gera nome do arquivo de backup
-            backup_file = os.path.join(self.backup_dir, self._get_backup_filename())
-            
-            # Cria backup
-            shutil.copy2(self.db_path, backup_file)
-            logger.info(f"Backup criado com sucesso: {backup_file}")
+            # Retrato consistente do banco, verificado antes de ser gravado
+            temp_file = os.path.join(self.backup_dir, f"tmp_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db")
+            try:
+                self._copiar_online(temp_file)
+                
+                ok, detalhe = self._verificar_integridade(temp_file)
+                if not ok:
+                    logger.error(f"Backup corrompido ({detalhe})")
+                    return False, f"Backup falhou na verificação de integridade: {detalhe}"
+                
+                base = None if completo else self._base_incremental()
+                backup_file, paginas = self._gravar_backup(temp_file, base)
+            finally:
+                if os.path.exists(temp_file):
+                    os.remove(temp_file)
+            logger.info(f"Backup criado com sucesso: {backup_file} ({paginas} páginas gravadas)")
             
-            # Remove backups antigos (mantém apenas os 5 mais recentes)
+            # Aplica a política de retenção
             self._cleanup_old_backups()
             
             return True, f"Backup criado com sucesso: {backup_file}"
@@ -44,22 +93,240 @@ class BackupManager:
             logger.error(f"Erro ao criar backup: {str(e)}")
             return False, f"Erro ao criar backup: {str(e)}"
     
-    def _cleanup_old_backups(self, keep=5):
-        """Remove backups antigos, mantendo apenas os N mais recentes"""
+    def _copiar_online(self, destino):
+        """
+        Copia o banco em uso com a API de backup do SQLite.
+        
+        A cópia é feita em passos de BACKUP_PAGINAS_POR_PASSO páginas, com uma
+        pausa entre eles para que as escritas da aplicação não fiquem
+        bloqueadas durante todo o backup. Se o banco for alterado durante a
+        cópia, o SQLite reinicia os passos, e o resultado é sempre um retrato
+        consistente.
+        """
+        def progresso(status, restantes, total):
+            logger.debug(f"Backup: {total - restantes}/{total} páginas copiadas")
+        
+        origem = sqlite3.connect(self.db_path)
         try:
-            # Lista todos os backups
-            backups = [f for f in os.listdir(self.backup_dir) if f.startswith('backup_')]
-            backups.sort(reverse=True)
+            copia = sqlite3.connect(destino)
+            try:
+                origem.backup(
+                    copia,
+                    pages=BACKUP_PAGINAS_POR_PASSO,
+                    progress=progresso,
+                    sleep=BACKUP_PAUSA_ENTRE_PASSOS
+                )
+                # O backup herda o modo WAL; volta ao journal comum para que
+                # a cópia seja um único arquivo, sem -wal/-shm
+                copia.execute("PRAGMA journal_mode = DELETE").fetchall()
+            finally:
+                copia.close()
+        finally:
+            origem.close()
+    
+    def _verificar_integridade(self, caminho):
+        """Executa PRAGMA integrity_check em um arquivo; retorna (ok, detalhe)"""
+        try:
+            conn = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True)
+            try:
+                resultado = [linha[0] for linha in conn.execute("PRAGMA integrity_check").fetchall()]
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            return False, str(e)
+        
+        if resultado == ['ok']:
+            return True, 'ok'
+        return False, '; '.join(resultado[:5])
+    
+    def _ler_cabecalho(self, backup_file):
+        """Lê o cabeçalho JSON de um backup compactado"""
+        with gzip.open(os.path.join(self.backup_dir, backup_file), 'rb') as entrada:
+            if entrada.readline() != ASSINATURA_BACKUP:
+                raise ValueError(f"Arquivo de backup inválido: {backup_file}")
+            return json.loads(entrada.readline())
+    
+    def _base_incremental(self):
+        """
+        Retorna o backup sobre o qual o próximo incremental será gravado.
+        
+        Returns:
+            Tupla (nome do backup, cabeçalho, hashes das páginas) ou None se o
+            próximo backup deve ser completo
+        """
+        for backup in self._listar_nomes():
+            hashes_file = os.path.join(self.backup_dir, f"{backup}.hashes")
+            if not backup.endswith('.gz') or not os.path.exists(hashes_file):
+                continue
+            cabecalho = self._ler_cabecalho(backup)
+            if cabecalho['sequencia'] + 1 > BACKUP_INCREMENTAIS_POR_COMPLETO:
+                return None
+            with open(hashes_file, 'rb') as f:
+                return backup, cabecalho, f.read()
+        return None
+    
+    def _gravar_backup(self, snapshot, base):
+        """
+        Grava o retrato do banco como backup compactado.
+        
+        Cada página é identificada por um hash; num incremental, só entram as
+        páginas cujo hash difere do backup base. Os hashes do novo backup
+        ficam em <backup>.hashes para o próximo incremental.
+        
+        Args:
+            snapshot: Cópia consistente do banco
+            base: Retorno de _base_incremental() ou None para backup completo
+        
+        Returns:
+            Tupla (nome do backup, quantidade de páginas gravadas)
+        """
+        with open(snapshot, 'rb') as origem:
+            cabecalho_sqlite = origem.read(100)
+            page_size = struct.unpack('>H', cabecalho_sqlite[16:18])[0]
+            page_size = 65536 if page_size == 1 else page_size
+            total_paginas = os.path.getsize(snapshot) // page_size
+            
+            if base is not None and base[1]['page_size'] != page_size:
+                base = None
+            tipo = BACKUP_COMPLETO if base is None else BACKUP_INCREMENTAL
+            backup_file = self._get_backup_filename(tipo)
+            cabecalho = {
+                'tipo': tipo,
+                'base': base[0] if base else None,
+                'sequencia': base[1]['sequencia'] + 1 if base else 0,
+                'page_size': page_size,
+                'paginas': total_paginas,
+                'criado_em': datetime.now().isoformat(timespec='seconds')
+            }
+            hashes_base = base[2] if base else b''
+            
+            destino = os.path.join(self.backup_dir, backup_file)
+            if os.path.exists(destino):
+                raise FileExistsError(f"Já existe um backup com este horário: {backup_file}")
+            hashes = bytearray()
+            gravadas = 0
+            origem.seek(0)
+            with gzip.open(f"{destino}.tmp", 'wb', compresslevel=BACKUP_NIVEL_COMPRESSAO) as saida:
+                saida.write(ASSINATURA_BACKUP)
+                saida.write(json.dumps(cabecalho).encode('utf-8') + b'\n')
+                for numero in range(1, total_paginas + 1):
+                    pagina = origem.read(page_size)
+                    digest = hashlib.blake2b(pagina, digest_size=TAMANHO_HASH).digest()
+                    hashes += digest
+                    inicio = (numero - 1) * TAMANHO_HASH
+                    if hashes_base[inicio:inicio + TAMANHO_HASH] != digest:
+                        saida.write(struct.pack('>I', numero))
+                        saida.write(pagina)
+                        gravadas += 1
+            os.replace(f"{destino}.tmp", destino)
+        
+        with open(f"{destino}.hashes.tmp", 'wb') as f:
+            f.write(hashes)
+        os.replace(f"{destino}.hashes.tmp", f"{destino}.hashes")
+        
+        # Só o último backup da cadeia precisa dos hashes
+        if base is not None:
+            os.remove(os.path.join(self.backup_dir, f"{base[0]}.hashes"))
+        
+        return backup_file, gravadas
+    
+    def _cadeia(self, backup_file):
+        """Lista os backups necessários para restaurar um backup, do completo ao pedido"""
+        cadeia = []
+        atual = backup_file
+        while atual:
+            if not os.path.exists(os.path.join(self.backup_dir, atual)):
+                raise FileNotFoundError(f"Backup da cadeia não encontrado: {atual}")
+            cabecalho = self._ler_cabecalho(atual)
+            cadeia.append((atual, cabecalho))
+            atual = cabecalho['base']
+        cadeia.reverse()
+        return cadeia
+    
+    def reconstruir(self, backup_file, destino):
+        """
+        Reconstrói o banco de um backup, aplicando a cadeia em ordem.
+        
+        Args:
+            backup_file: Nome do backup a restaurar
+            destino: Arquivo de banco a ser criado
+        """
+        if backup_file.endswith('.db'):
+            # Backups completos sem compactação (versões anteriores)
+            shutil.copy2(os.path.join(self.backup_dir, backup_file), destino)
+            return
+        
+        with open(destino, 'wb') as saida:
+            for nome, cabecalho in self._cadeia(backup_file):
+                page_size = cabecalho['page_size']
+                with gzip.open(os.path.join(self.backup_dir, nome), 'rb') as entrada:
+                    entrada.readline()
+                    entrada.readline()
+                    while True:
+                        numero = entrada.read(4)
+                        if not numero:
+                            break
+                        saida.seek((struct.unpack('>I', numero)[0] - 1) * page_size)
+                        saida.write(entrada.read(page_size))
+                saida.truncate(cabecalho['paginas'] * page_size)
+    
+    def _momento(self, backup_file):
+        """Data e hora de um backup, a partir do nome do arquivo"""
+        return datetime.strptime(backup_file[len('backup_'):len('backup_') + 15], '%Y%m%d_%H%M%S')
+    
+    def _cleanup_old_backups(self, retencao=None):
+        """
+        Remove backups fora da política de retenção GFS.
+        
+        Para cada nível (horária, diária, semanal, mensal) é mantido um backup
+        de cada um dos N últimos períodos: o mais recente ou, acima do nível
+        horário, o completo mais recente do período. Os backups de que um
+        incremental mantido depende também são mantidos.
+        """
+        retencao = retencao or BACKUP_RETENCAO
+        try:
+            backups = self._listar_nomes()
+            
+            # O mais recente sempre fica: ele é a base do próximo incremental
+            manter = set(backups[:1])
+            for nivel, quantidade in retencao.items():
+                periodos = {}
+                for backup in backups:
+                    periodo = PERIODOS_RETENCAO[nivel](self._momento(backup))
+                    if periodo not in periodos and len(periodos) >= quantidade:
+                        break
+                    periodos.setdefault(periodo, []).append(backup)
+                for candidatos in periodos.values():
+                    # Acima do nível horário, prefere backups completos: um
+                    # incremental obrigaria a manter a cadeia inteira
+                    completos = [b for b in candidatos if not b.endswith(f"_{BACKUP_INCREMENTAL}.gz")]
+                    manter.add(completos[0] if completos and nivel != 'horaria' else candidatos[0])
+            
+            for backup in list(manter):
+                if backup.endswith('.gz'):
+                    manter.update(nome for nome, _ in self._cadeia(backup))
             
             # Remove backups excedentes
-            for backup in backups[keep:]:
-                os.remove(os.path.join(self.backup_dir, backup))
-                logger.info(f"Backup antigo removido: {backup}")
+            for backup in backups:
+                if backup not in manter:
+                    os.remove(os.path.join(self.backup_dir, backup))
+                    hashes_file = os.path.join(self.backup_dir, f"{backup}.hashes")
+                    if os.path.exists(hashes_file):
+                        os.remove(hashes_file)
+                    logger.info(f"Backup antigo removido: {backup}")
         except Exception as e:
             logger.error(f"Erro ao limpar backups antigos: {str(e)}")
     
     def restore_backup(self, backup_file):
-        """Restaura um backup específico"""
+        """
+        Restaura um backup específico com o sistema em uso.
+        
+        O banco é reconstruído e verificado em um arquivo temporário ao lado
+        do banco atual, ainda sem afetar a aplicação. Só então os pools de
+        conexão são drenados e o arquivo é trocado com os.replace (atômico);
+        a indisponibilidade se limita à drenagem e à troca. O tempo de cada
+        fase é registrado no log e na mensagem de retorno.
+        """
         try:
             backup_path = os.path.join(self.backup_dir, backup_file)
             
@@ -68,28 +335,72 @@ class BackupManager:
                 logger.error(f"Backup não encontrado: {backup_path}")
                 return False, "Backup não encontrado"
             
-            # Verifica se é um arquivo SQLite válido
+            tempos = {}
+            temp_file = f"{self.db_path}.restauracao"
             try:
-                conn = sqlite3.connect(backup_path)
-                conn.close()
-            except sqlite3.Error:
-                logger.error(f"Arquivo de backup inválido: {backup_path}")
-                return False, "Arquivo de backup inválido"
+                # Reconstrói o banco a partir da cadeia de backups
+                inicio = time.monotonic()
+                try:
+                    self.reconstruir(backup_file, temp_file)
+                except (ValueError, OSError) as e:
+                    logger.error(f"Arquivo de backup inválido: {backup_path} ({str(e)})")
+                    return False, "Arquivo de backup inválido"
+                tempos['reconstrução'] = time.monotonic() - inicio
+                
+                # Verifica a integridade e leva o esquema à versão atual
+                inicio = time.monotonic()
+                ok, detalhe = self._verificar_integridade(temp_file)
+                if not ok:
+                    logger.error(f"Backup corrompido ({detalhe}): {backup_path}")
+                    return False, f"Backup falhou na verificação de integridade: {detalhe}"
+                aplicar_migracoes(temp_file)
+                tempos['verificação'] = time.monotonic() - inicio
+                
+                # Fecha as conexões da aplicação com o banco atual
+                inicio = time.monotonic()
+                pools = pools_do_banco(self.db_path)
+                try:
+                    for pool in pools:
+                        if not pool.drenar(POOL_TEMPO_ESPERA):
+                            logger.error("Conexões em uso não foram devolvidas a tempo; restauração cancelada")
+                            return False, "Banco em uso; tente restaurar novamente"
+                    tempos['drenagem'] = time.monotonic() - inicio
+                    
+                    # Troca o arquivo; -wal/-shm do banco antigo não valem para o novo
+                    inicio = time.monotonic()
+                    for sufixo in ('-wal', '-shm'):
+                        if os.path.exists(self.db_path + sufixo):
+                            os.remove(self.db_path + sufixo)
+                    os.replace(temp_file, self.db_path)
+                    tempos['troca'] = time.monotonic() - inicio
+                finally:
+                    for pool in pools:
+                        pool.retomar()
+            finally:
+                if os.path.exists(temp_file):
+                    os.remove(temp_file)
             
-            # Restaura o backup
-            shutil.copy2(backup_path, self.db_path)
-            logger.info(f"Backup restaurado com sucesso: {backup_file}")
+            fases = ', '.join(f"{fase} {segundos:.2f}s" for fase, segundos in tempos.items())
+            logger.info(f"Backup restaurado com sucesso: {backup_file} ({fases})")
             
-            return True, f"Backup restaurado com sucesso: {backup_file}"
+            return True, f"Backup restaurado com sucesso: {backup_file} ({fases})"
         except Exception as e:
             logger.error(f"Erro ao restaurar backup: {str(e)}")
             return False, f"Erro ao restaurar backup: {str(e)}"
     
+    def _listar_nomes(self):
+        """Nomes dos arquivos de backup, do mais recente ao mais antigo"""
+        backups = [
+            f for f in os.listdir(self.backup_dir)
+            if f.startswith('backup_') and f.endswith(('.gz', '.db'))
+        ]
+        backups.sort(reverse=True)
+        return backups
+    
     def list_backups(self):
         """Lista todos os backups disponíveis"""
         try:
-            backups = [f for f in os.listdir(self.backup_dir) if f.startswith('backup_')]
-            backups.sort(reverse=True)
+            backups = self._listar_nomes()
             
             backup_info = []
             for backup in backups:
@@ -101,10 +412,11 @@ class BackupManager:
                     'filename': backup,
                     'size': size,
                     'modified': modified,
-                    'path': path
+                    'path': path,
+                    'tipo': BACKUP_INCREMENTAL if backup.endswith(f"_{BACKUP_INCREMENTAL}.gz") else BACKUP_COMPLETO
                 })
             
             return True, backup_info
         except Exception as e:
             logger.error(f"Erro ao listar backups: {str(e)}")
-            return False, f"Erro ao listar backups: {str(e)}" 
\ No newline at end of file
+            return False, f"Erro ao listar backups: {str(e)}"
\ No newline at end of file
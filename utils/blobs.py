@@ -0,0 +1,172 @@
+import argparse
+import hashlib
+import logging
+import mimetypes
+import os
+import tempfile
+from typing import Any, Dict, Optional
+from utils.database import Database
+from utils.migrations import aplicar_migracoes
+from utils.periodos import agora
+from utils.constants import DIRETORIO_BLOBS
+
+logger = logging.getLogger(__name__)
+
+# (tabela, coluna com o caminho antigo, coluna do blob)
+ARQUIVOS_LEGADOS = (
+    ('registros', 'pdf_saida', 'pdf_saida_blob'),
+    ('condutores', 'cnh_arquivo', 'cnh_blob'),
+)
+
+class BlobStore:
+    """
+    Armazena arquivos pelo hash SHA-256 do conteúdo.
+
+    Os arquivos ficam em subdiretórios com os dois primeiros pares de
+    caracteres do hash (ab/cd/abcd...), o que mantém cada diretório pequeno.
+    Conteúdos iguais são gravados uma única vez. A tabela blobs guarda
+    tamanho, tipo e nome original de cada arquivo.
+    """
+
+    def __init__(self, db_path: str = "database.db", diretorio: str = DIRETORIO_BLOBS):
+        self.db = Database(db_path)
+        self.diretorio = diretorio
+        aplicar_migracoes(db_path)
+
+    def caminho(self, hash_blob: str) -> str:
+        """
+        Retorna o caminho do arquivo de um blob.
+
+        Args:
+            hash_blob: Hash SHA-256 (hexadecimal)
+
+        Returns:
+            Caminho no diretório particionado
+        """
+        return os.path.join(self.diretorio, hash_blob[:2], hash_blob[2:4], hash_blob)
+
+    def salvar(
+        self,
+        conteudo: bytes,
+        tipo_conteudo: Optional[str] = None,
+        nome_original: Optional[str] = None
+    ) -> str:
+        """
+        Grava um conteúdo, se ainda não existir, e registra seus metadados.
+
+        Args:
+            conteudo: Bytes do arquivo
+            tipo_conteudo: Tipo MIME (ex.: application/pdf)
+            nome_original: Nome exibido no download
+
+        Returns:
+            Hash SHA-256 do conteúdo
+        """
+        hash_blob = hashlib.sha256(conteudo).hexdigest()
+        caminho = self.caminho(hash_blob)
+
+        if not os.path.exists(caminho):
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            # Grava em arquivo temporário e renomeia: nunca expõe um blob parcial
+            fd, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as arquivo:
+                    arquivo.write(conteudo)
+                os.replace(temporario, caminho)
+            except Exception:
+                if os.path.exists(temporario):
+                    os.remove(temporario)
+                raise
+
+        self.db.execute_query("""
+            INSERT OR IGNORE INTO blobs (hash, tamanho, tipo_conteudo, nome_original, criado_em)
+            VALUES (?, ?, ?, ?, ?)
+        """, (hash_blob, len(conteudo), tipo_conteudo, nome_original, agora()))
+        return hash_blob
+
+    def ler(self, hash_blob: str) -> bytes:
+        """
+        Lê o conteúdo de um blob.
+
+        Args:
+            hash_blob: Hash SHA-256 (hexadecimal)
+
+        Returns:
+            Bytes do arquivo
+        """
+        with open(self.caminho(hash_blob), 'rb') as arquivo:
+            return arquivo.read()
+
+    def metadados(self, hash_blob: str) -> Optional[Dict[str, Any]]:
+        """
+        Consulta os metadados de um blob.
+
+        Args:
+            hash_blob: Hash SHA-256 (hexadecimal)
+
+        Returns:
+            Dicionário com hash, tamanho, tipo_conteudo, nome_original e criado_em
+        """
+        resultado = self.db.execute_query("SELECT * FROM blobs WHERE hash = ?", (hash_blob,))
+        return dict(resultado[0]) if resultado else None
+
+    def nome_arquivo(self, caminho: str) -> str:
+        """
+        Retorna o nome original do arquivo de um blob, para downloads.
+
+        Args:
+            caminho: Caminho retornado por caminho()
+
+        Returns:
+            Nome original registrado ou o nome do arquivo no disco
+        """
+        hash_blob = os.path.basename(caminho)
+        meta = self.metadados(hash_blob)
+        return meta['nome_original'] if meta and meta['nome_original'] else hash_blob
+
+    def importar_legado(self) -> int:
+        """
+        Importa arquivos gravados fora do armazenamento de blobs (comprovantes
+        em registros.pdf_saida e CNHs em condutores.cnh_arquivo) e vincula
+        cada linha ao seu blob.
+
+        Returns:
+            Quantidade de linhas vinculadas
+        """
+        total = 0
+        for tabela, coluna, coluna_blob in ARQUIVOS_LEGADOS:
+            linhas = self.db.execute_query(f"""
+                SELECT id, {coluna} as caminho FROM {tabela}
+                WHERE {coluna} IS NOT NULL AND {coluna_blob} IS NULL
+            """)
+            for linha in linhas:
+                # Caminhos gravados no Windows usam barra invertida
+                caminho = linha['caminho'].replace('\\', os.sep)
+                if not os.path.exists(caminho):
+                    continue
+                with open(caminho, 'rb') as arquivo:
+                    hash_blob = self.salvar(
+                        arquivo.read(),
+                        mimetypes.guess_type(caminho)[0],
+                        os.path.basename(caminho)
+                    )
+                self.db.execute_query(
+                    f"UPDATE {tabela} SET {coluna_blob} = ? WHERE id = ?",
+                    (hash_blob, linha['id'])
+                )
+                total += 1
+
+        logger.info(f"{total} arquivos legados importados para o armazenamento de blobs")
+        return total
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa arquivos avulsos para o armazenamento de blobs")
+    parser.add_argument('--db', default='database.db', help="Caminho do banco de dados")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    total = BlobStore(args.db).importar_legado()
+    print(f"{total} arquivos importados")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import time
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+class CacheTTL:
+    """
+    Cache em memória compartilhado entre as sessões do processo.
+    
+    Cada entrada tem seu próprio prazo de validade. limpar() descarta tudo
+    e impede que cálculos iniciados antes da limpeza gravem resultados
+    desatualizados. Entradas vencidas que nunca mais são lidas são
+    removidas por definir(), no máximo uma vez a cada `intervalo_limpeza`
+    segundos.
+    """
+    
+    def __init__(self, intervalo_limpeza: float = 60):
+        self._dados: Dict[Hashable, Tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+        self._locks_calculo: Dict[Hashable, threading.Lock] = {}
+        self._geracao = 0
+        self.intervalo_limpeza = intervalo_limpeza
+        self._proxima_limpeza = time.monotonic() + intervalo_limpeza
+        
+    def obter(self, chave: Hashable) -> Optional[Any]:
+        """
+        Retorna o valor armazenado se ainda for válido.
+        
+        Args:
+            chave: Chave da entrada
+            
+        Returns:
+            Valor armazenado ou None se ausente ou expirado
+        """
+        entrada = self._dados.get(chave)
+        if entrada is None:
+            return None
+            
+        valor, expira_em = entrada
+        if time.monotonic() >= expira_em:
+            with self._lock:
+                if self._dados.get(chave) is entrada:
+                    del self._dados[chave]
+            return None
+        return valor
+        
+    def definir(self, chave: Hashable, valor: Any, ttl: float, geracao: Optional[int] = None) -> None:
+        """
+        Armazena um valor por ttl segundos.
+        
+        Args:
+            chave: Chave da entrada
+            valor: Valor a armazenar
+            ttl: Tempo de validade em segundos
+            geracao: Geração lida antes de calcular o valor; se o cache foi
+                limpo desde então, o valor é descartado
+        """
+        with self._lock:
+            if geracao is not None and geracao != self._geracao:
+                return
+            agora = time.monotonic()
+            self._dados[chave] = (valor, agora + ttl)
+            if agora >= self._proxima_limpeza:
+                self._remover_vencidas(agora)
+                
+    def _remover_vencidas(self, agora: float) -> None:
+        """Remove as entradas vencidas (chamado com o lock adquirido)."""
+        vencidas = [chave for chave, (_, expira_em) in self._dados.items() if agora >= expira_em]
+        for chave in vencidas:
+            del self._dados[chave]
+        self._proxima_limpeza = agora + self.intervalo_limpeza
+            
+    def obter_ou_calcular(self, chave: Hashable, calcular: Callable[[], Any], ttl: float) -> Any:
+        """
+        Retorna o valor em cache ou o calcula uma única vez.
+        
+        Chamadas simultâneas para a mesma chave aguardam o primeiro cálculo
+        em vez de repeti-lo.
+        
+        Args:
+            chave: Chave da entrada
+            calcular: Função que produz o valor
+            ttl: Tempo de validade em segundos
+            
+        Returns:
+            Valor em cache ou recém-calculado
+        """
+        valor = self.obter(chave)
+        if valor is not None:
+            return valor
+            
+        with self._lock:
+            lock_calculo = self._locks_calculo.setdefault(chave, threading.Lock())
+            
+        with lock_calculo:
+            valor = self.obter(chave)
+            if valor is not None:
+                return valor
+                
+            geracao = self._geracao
+            valor = calcular()
+            self.definir(chave, valor, ttl, geracao)
+            return valor
+            
+    def invalidar(self, chave: Hashable) -> None:
+        """
+        Remove uma entrada do cache.
+        
+        Args:
+            chave: Chave da entrada
+        """
+        with self._lock:
+            self._dados.pop(chave, None)
+            self._geracao += 1
+            
+    def limpar(self) -> None:
+        """
+        Remove todas as entradas do cache.
+        """
+        with self._lock:
+            self._dados.clear()
+            self._geracao += 1
@@ -1,9 +1,8 @@
 import streamlit as st
 import logging
-import os
 from functools import wraps
 from utils.security import SecurityManager
-from datetime import datetime
+from utils.logger import configurar_logging
 
 # Configuração do logger
 logger = logging.getLogger(__name__)
@@ -13,21 +12,7 @@ security_manager = SecurityManager()
 
 def setup_logging():
     """Configura o sistema de logging da aplicação."""
-    log_dir = 'logs'
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-        
-    log_file = os.path.join(log_dir, f'app_{datetime.now().strftime("%Y%m%d")}.log')
-    
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler()
-        ]
-    )
-    
+    configurar_logging()
     return logging.getLogger(__name__)
 
 def require_auth(func):
@@ -66,13 +51,17 @@ def show_success(message):
     st.success(message)
     logger.info(message)
 
-def audit_action(action, details=None):
-    """Registra uma ação no log de auditoria"""
-    if 'user_id' in st.session_state:
+def audit_action(action, details=None, entidade=None, entidade_id=None):
+    """Registra uma ação do usuário logado na trilha de auditoria"""
+    # Sessões do SecurityManager usam user_id; as da classe Auth, usuario_id
+    user_id = st.session_state.get('user_id', st.session_state.get('usuario_id'))
+    if user_id is not None:
         security_manager.audit_log(
-            st.session_state.user_id,
+            user_id,
             action,
-            details
+            details,
+            entidade,
+            entidade_id
         )
 
 def format_datetime(dt):
@@ -1,3 +1,5 @@
+import os
+
 # Status dos veículos
 VEICULO_DISPONIVEL = 'disponivel'
 VEICULO_EM_USO = 'em_uso'
@@ -16,6 +18,10 @@ USUARIO_PADRAO = 'usuario'
 # Configurações do sistema
 MAX_TENTATIVAS_LOGIN = 3
 TEMPO_BLOQUEIO = 30  # minutos
+LOGIN_MAX_BALDES = 10000  # usuários com falhas recentes acompanhados pelo limitador
+HASH_SENHA_WORKERS = int(os.getenv('HASH_SENHA_WORKERS', '2'))  # threads de bcrypt
+HASH_SENHA_CUSTO = int(os.getenv('HASH_SENHA_CUSTO', '12'))  # rounds do bcrypt
+HASH_SENHA_TEMPO_ESPERA = 30  # segundos aguardando o pool de hash
 TOKEN_EXPIRY = 8  # horas
 TEMPO_EXPIRACAO_SESSAO = 3600  # 1 hora em segundos
 
@@ -23,17 +29,100 @@ TEMPO_EXPIRACAO_SESSAO = 3600  # 1 hora em segundos
 DIR_BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DIR_LOGS = os.path.join(DIR_BASE, 'logs')
 DIR_PDFS = os.path.join(DIR_BASE, 'pdfs')
+DIRETORIO_PDFS = DIR_PDFS
 DIR_DB = os.path.join(DIR_BASE, 'data')
+DIRETORIO_BLOBS = os.path.join(DIR_DB, 'blobs')
 
 # Banco de dados
 DB_PATH = os.path.join(DIR_DB, 'veiculo_control.db')
 
+# Pool de conexões
+POOL_MAX_CONEXOES = int(os.getenv('DB_POOL_MAX_CONEXOES', '10'))
+POOL_TEMPO_OCIOSO = int(os.getenv('DB_POOL_TEMPO_OCIOSO', '300'))  # segundos
+POOL_INTERVALO_VERIFICACAO = 30  # segundos entre verificações de saúde
+POOL_TEMPO_ESPERA = 10  # segundos aguardando uma conexão livre
+
+# Perfis de PRAGMA aplicados a cada nova conexão (a ordem importa:
+# busy_timeout vem antes para que a troca de journal_mode aguarde locks)
+PERFIS_PRAGMA = {
+    # WAL: leitores não bloqueiam escritores e vice-versa
+    'padrao': {
+        'busy_timeout': 5000,
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -20000,  # ~20 MB
+        'mmap_size': 268435456,  # 256 MB
+        'temp_store': 'MEMORY'
+    },
+    # WAL com fsync a cada commit, para discos sem proteção contra queda de energia
+    'seguro': {
+        'busy_timeout': 10000,
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -8000,
+        'mmap_size': 0,
+        'temp_store': 'MEMORY'
+    },
+    # Journal tradicional, para bancos em sistemas de arquivos de rede onde WAL não funciona
+    'compativel': {
+        'busy_timeout': 5000,
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'cache_size': -8000,
+        'mmap_size': 0,
+        'temp_store': 'MEMORY'
+    }
+}
+PERFIL_PRAGMA = os.getenv('DB_PERFIL_PRAGMA', 'padrao')
+
+# Formato único dos timestamps gravados no banco (hora local)
+FORMATO_DATA_HORA_DB = '%Y-%m-%d %H:%M:%S'
+
+# Cache
+TEMPO_CACHE_DASHBOARD = 30  # segundos
+
+# Fila de geração de PDFs
+FILA_PDF_WORKERS = 2
+FILA_PDF_MAX_TENTATIVAS = 3
+FILA_PDF_INTERVALO_VERIFICACAO = 2  # segundos entre buscas por novos trabalhos
+FILA_PDF_TEMPO_LIMITE = 300  # segundos em 'processando' até o trabalho ser retomado
+
+# Backup online (API de backup do SQLite)
+BACKUP_PAGINAS_POR_PASSO = int(os.getenv('BACKUP_PAGINAS_POR_PASSO', '1024'))
+BACKUP_PAUSA_ENTRE_PASSOS = float(os.getenv('BACKUP_PAUSA_ENTRE_PASSOS', '0.05'))  # segundos
+BACKUP_NIVEL_COMPRESSAO = 6  # gzip, de 1 (rápido) a 9 (menor)
+BACKUP_INCREMENTAIS_POR_COMPLETO = int(os.getenv('BACKUP_INCREMENTAIS_POR_COMPLETO', '24'))
+
+# Retenção GFS: quantos períodos de cada nível mantêm um backup
+BACKUP_RETENCAO = {
+    'horaria': int(os.getenv('BACKUP_RETENCAO_HORARIA', '24')),
+    'diaria': int(os.getenv('BACKUP_RETENCAO_DIARIA', '7')),
+    'semanal': int(os.getenv('BACKUP_RETENCAO_SEMANAL', '4')),
+    'mensal': int(os.getenv('BACKUP_RETENCAO_MENSAL', '12'))
+}
+
+# Logs (JSON, rotação diária com compactação)
+ARQUIVO_LOG = os.path.join(DIR_LOGS, 'app.log')
+NIVEL_LOG = os.getenv('NIVEL_LOG', 'INFO')
+LOG_DIAS_RETENCAO = int(os.getenv('LOG_DIAS_RETENCAO', '30'))
+LOG_LIMITE_POR_MINUTO = int(os.getenv('LOG_LIMITE_POR_MINUTO', '60'))  # por mensagem, abaixo de WARNING
+LOG_LINHAS_POR_PAGINA = 200
+
+# Auditoria (gravação em lotes)
+AUDITORIA_LOTE = 100  # registros acumulados antes de gravar
+AUDITORIA_INTERVALO_MS = 500  # tempo máximo de um registro no buffer
+AUDITORIA_LINHAS_POR_PAGINA = 50
+
+# Geração agendada de relatórios
+AGENDADOR_INTERVALO_VERIFICACAO = 30  # segundos entre verificações de agendamentos vencidos
+
 # Arquivos
 ARQUIVO_DB = os.path.join(DIR_DB, "veiculo_control.db")
 
 # Mensagens de erro
 ERRO_LOGIN = 'Usuário ou senha inválidos'
 ERRO_BLOQUEIO = 'Conta bloqueada. Tente novamente em {} minutos'
+ERRO_HASH_OCUPADO = 'Muitos acessos simultâneos. Tente novamente em instantes'
 ERRO_PERMISSAO = 'Você não tem permissão para acessar este recurso'
 ERRO_SESSAO = 'Sessão expirada. Por favor, faça login novamente'
 ERRO_CONEXAO_DB = "Erro ao conectar ao banco de dados"
@@ -45,6 +134,8 @@ ERRO_REGISTRO_DUPLICADO = "Registro já existe no sistema"
 ERRO_OPERACAO_NAO_PERMITIDA = "Operação não permitida"
 ERRO_EXECUCAO_DB = "Erro ao executar operação no banco de dados"
 ERRO_FECHAMENTO_DB = "Erro ao fechar conexão com o banco de dados"
+ERRO_POOL_ESGOTADO = "Nenhuma conexão disponível no pool do banco de dados"
+ERRO_CONFLITO_SAIDA = "{} não está mais disponível (registrado por outro operador). Atualize a página e tente novamente."
 ERRO_GERACAO_PDF = "Erro ao gerar PDF"
 ERRO_SALVAMENTO_PDF = "Erro ao salvar PDF"
 ERRO_CRIACAO_DIRETORIO = "Erro ao criar diretório"
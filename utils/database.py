@@ -1,22 +1,372 @@
+import os
 import sqlite3
 import logging
+import threading
+import time
+from contextlib import contextmanager
 from typing import List, Dict, Any, Optional, Tuple
 from utils.constants import (
     ERRO_CONEXAO_DB,
     ERRO_EXECUCAO_DB,
-    ERRO_FECHAMENTO_DB
+    ERRO_FECHAMENTO_DB,
+    ERRO_POOL_ESGOTADO,
+    POOL_MAX_CONEXOES,
+    POOL_TEMPO_OCIOSO,
+    POOL_INTERVALO_VERIFICACAO,
+    POOL_TEMPO_ESPERA,
+    PERFIS_PRAGMA,
+    PERFIL_PRAGMA,
+    VEICULO_DISPONIVEL
 )
 
 logger = logging.getLogger(__name__)
 
+class ConflitoConcorrencia(Exception):
+    """
+    Outra sessão alterou os dados entre a leitura e a escrita.
+    """
+
+def aplicar_pragmas(conn: sqlite3.Connection, perfil: Optional[str] = None) -> None:
+    """
+    Aplica o perfil de PRAGMAs configurado a uma conexão recém-aberta.
+    
+    Args:
+        conn: Conexão com o banco de dados
+        perfil: Nome do perfil em PERFIS_PRAGMA (padrão: PERFIL_PRAGMA)
+        
+    Raises:
+        ValueError: Se o perfil não existir
+    """
+    perfil = perfil or PERFIL_PRAGMA
+    if perfil not in PERFIS_PRAGMA:
+        raise ValueError(f"Perfil de PRAGMA inválido: {perfil}")
+        
+    for pragma, valor in PERFIS_PRAGMA[perfil].items():
+        conn.execute(f"PRAGMA {pragma} = {valor}").fetchall()
+
+class ConnectionPool:
+    """
+    Pool de conexões SQLite compartilhado entre as threads do Streamlit.
+    
+    Cada thread recebe uma conexão exclusiva enquanto a utiliza; chamadas
+    aninhadas na mesma thread reutilizam a conexão já emprestada. Ao ser
+    devolvida, a conexão volta para a lista de ociosas e é reaproveitada
+    pelos próximos reruns em vez de ser fechada.
+    """
+    
+    def __init__(
+        self,
+        db_path: str,
+        perfil: Optional[str] = None,
+        max_conexoes: int = POOL_MAX_CONEXOES,
+        tempo_ocioso: float = POOL_TEMPO_OCIOSO,
+        intervalo_verificacao: float = POOL_INTERVALO_VERIFICACAO,
+        tempo_espera: float = POOL_TEMPO_ESPERA
+    ):
+        self.db_path = db_path
+        self.perfil = perfil
+        self.max_conexoes = max_conexoes
+        self.tempo_ocioso = tempo_ocioso
+        self.intervalo_verificacao = intervalo_verificacao
+        self.tempo_espera = tempo_espera
+        
+        self._lock = threading.Condition()
+        self._ociosas: List[Tuple[sqlite3.Connection, float, float]] = []
+        self._total = 0
+        # Conexões abertas fora do pool (utils.db.get_connection) ainda em uso
+        self._externas = 0
+        self._drenando = False
+        self._local = threading.local()
+        
+    def _criar_conexao(self) -> sqlite3.Connection:
+        """
+        Abre uma nova conexão configurada para uso pelo pool.
+        
+        Returns:
+            Conexão com o banco de dados
+        """
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        aplicar_pragmas(conn, self.perfil)
+        return conn
+        
+    def _conexao_saudavel(self, conn: sqlite3.Connection) -> bool:
+        """
+        Verifica se a conexão ainda responde.
+        
+        Args:
+            conn: Conexão a ser verificada
+            
+        Returns:
+            True se a conexão estiver utilizável, False caso contrário
+        """
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+            
+    def _descartar(self, conn: sqlite3.Connection) -> None:
+        """
+        Fecha uma conexão e a remove da contagem do pool.
+        
+        Args:
+            conn: Conexão a ser descartada
+        """
+        try:
+            conn.close()
+        except Exception as e:
+            logger.error(f"{ERRO_FECHAMENTO_DB}: {str(e)}")
+        with self._lock:
+            self._total -= 1
+            # Acorda também quem aguarda em drenar()
+            self._lock.notify_all()
+            
+    def _obter_ociosa(self) -> Optional[sqlite3.Connection]:
+        """
+        Retira uma conexão ociosa válida, descartando as expiradas.
+        
+        Returns:
+            Conexão ociosa ou None se não houver nenhuma utilizável
+        """
+        agora = time.monotonic()
+        while True:
+            with self._lock:
+                # Durante drenar() nenhuma conexão é entregue
+                if self._drenando or not self._ociosas:
+                    return None
+                conn, ultimo_uso, ultima_verificacao = self._ociosas.pop()
+                
+            if agora - ultimo_uso > self.tempo_ocioso:
+                self._descartar(conn)
+                continue
+                
+            if agora - ultima_verificacao > self.intervalo_verificacao:
+                if not self._conexao_saudavel(conn):
+                    logger.warning("Conexão inválida descartada do pool")
+                    self._descartar(conn)
+                    continue
+                    
+            return conn
+            
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Empresta uma conexão para a thread atual.
+        
+        Returns:
+            Conexão com o banco de dados
+            
+        Raises:
+            Exception: Se não houver conexão disponível dentro do tempo de espera
+        """
+        emprestada = getattr(self._local, 'conexao', None)
+        if emprestada is not None:
+            self._local.profundidade += 1
+            return emprestada
+            
+        limite = time.monotonic() + self.tempo_espera
+        while True:
+            conn = self._obter_ociosa()
+            if conn is not None:
+                break
+                
+            with self._lock:
+                while self._drenando or (not self._ociosas and self._total >= self.max_conexoes):
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        logger.error(ERRO_POOL_ESGOTADO)
+                        raise Exception(ERRO_POOL_ESGOTADO)
+                    self._lock.wait(restante)
+                if self._ociosas:
+                    continue
+                self._total += 1
+                
+            try:
+                conn = self._criar_conexao()
+            except Exception:
+                with self._lock:
+                    self._total -= 1
+                    self._lock.notify()
+                raise
+            break
+            
+        self._local.conexao = conn
+        self._local.profundidade = 1
+        return conn
+        
+    def release(self, conn: sqlite3.Connection) -> None:
+        """
+        Devolve ao pool uma conexão emprestada com acquire().
+        
+        Args:
+            conn: Conexão a ser devolvida
+        """
+        if getattr(self._local, 'conexao', None) is conn:
+            self._local.profundidade -= 1
+            if self._local.profundidade > 0:
+                return
+            self._local.conexao = None
+            
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._descartar(conn)
+            return
+            
+        agora = time.monotonic()
+        expiradas = []
+        with self._lock:
+            # Verificado no mesmo bloco da devolução: um drenar() concorrente
+            # nunca deixa passar uma conexão ociosa
+            drenando = self._drenando
+            if not drenando:
+                self._ociosas.append((conn, agora, agora))
+            
+            # As conexões mais antigas ficam no início da lista
+            while self._ociosas and agora - self._ociosas[0][1] > self.tempo_ocioso:
+                expiradas.append(self._ociosas.pop(0)[0])
+            self._lock.notify()
+            
+        if drenando:
+            self._descartar(conn)
+        for antiga in expiradas:
+            self._descartar(antiga)
+            
+    def registrar_externa(self) -> None:
+        """
+        Registra uma conexão aberta fora do pool para o mesmo banco.
+        
+        Assim drenar() também aguarda o fechamento dela. Enquanto o pool
+        estiver drenado, aguarda retomar() (até o tempo de espera do pool).
+        
+        Raises:
+            Exception: Se o pool continuar drenado além do tempo de espera
+        """
+        limite = time.monotonic() + self.tempo_espera
+        with self._lock:
+            while self._drenando:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    logger.error(ERRO_POOL_ESGOTADO)
+                    raise Exception(ERRO_POOL_ESGOTADO)
+                self._lock.wait(restante)
+            self._externas += 1
+            
+    def liberar_externa(self) -> None:
+        """
+        Informa que uma conexão registrada com registrar_externa() foi fechada.
+        """
+        with self._lock:
+            self._externas -= 1
+            self._lock.notify_all()
+            
+    def close_all(self) -> None:
+        """
+        Fecha todas as conexões ociosas do pool.
+        """
+        with self._lock:
+            ociosas, self._ociosas = self._ociosas, []
+        for conn, _, _ in ociosas:
+            self._descartar(conn)
+            
+    def drenar(self, timeout: float) -> bool:
+        """
+        Bloqueia novos empréstimos e fecha todas as conexões do pool.
+        
+        As conexões ociosas são fechadas na hora; as emprestadas, ao serem
+        devolvidas. Também aguarda o fechamento das conexões externas
+        (registrar_externa()). Enquanto o pool estiver drenado, acquire() e
+        registrar_externa() aguardam retomar() (até o tempo de espera do pool).
+        
+        Args:
+            timeout: Tempo máximo, em segundos, aguardando as devoluções
+            
+        Returns:
+            True se todas as conexões foram fechadas, False se o tempo acabou
+        """
+        with self._lock:
+            self._drenando = True
+        self.close_all()
+        
+        limite = time.monotonic() + timeout
+        with self._lock:
+            while self._total > 0 or self._externas > 0:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    return False
+                self._lock.wait(restante)
+        return True
+        
+    def retomar(self) -> None:
+        """
+        Libera novamente os empréstimos após drenar().
+        """
+        with self._lock:
+            self._drenando = False
+            self._lock.notify_all()
+            
+    def estatisticas(self) -> Dict[str, int]:
+        """
+        Retorna a ocupação atual do pool.
+        
+        Returns:
+            Dicionário com o total de conexões abertas e ociosas
+        """
+        with self._lock:
+            return {'total': self._total, 'ociosas': len(self._ociosas)}
+
+_pools: Dict[Tuple[str, str], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+def get_pool(db_path: str, perfil: Optional[str] = None) -> ConnectionPool:
+    """
+    Retorna o pool de conexões do processo para o banco informado.
+    
+    Args:
+        db_path: Caminho do arquivo do banco de dados
+        perfil: Perfil de PRAGMA das conexões (padrão: PERFIL_PRAGMA)
+        
+    Returns:
+        Pool de conexões compartilhado
+    """
+    chave = (db_path, perfil or PERFIL_PRAGMA)
+    pool = _pools.get(chave)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(chave)
+            if pool is None:
+                pool = ConnectionPool(db_path, chave[1])
+                _pools[chave] = pool
+    return pool
+
+def pools_do_banco(db_path: str) -> List[ConnectionPool]:
+    """
+    Retorna os pools abertos para um arquivo de banco, em qualquer perfil.
+    
+    Args:
+        db_path: Caminho do arquivo do banco de dados
+        
+    Returns:
+        Lista de pools
+    """
+    caminho = os.path.abspath(db_path)
+    with _pools_lock:
+        return [pool for (chave, _), pool in _pools.items() if os.path.abspath(chave) == caminho]
+
 class Database:
-    def __init__(self, db_path: str = "database.db"):
+    def __init__(self, db_path: str = "database.db", perfil: Optional[str] = None):
         self.db_path = db_path
+        self.perfil = perfil
+        self.pool = get_pool(db_path, perfil)
         
     def get_connection(self) -> sqlite3.Connection:
         """
         Estabelece conexão com o banco de dados.
         
+        A conexão retornada não pertence ao pool e deve ser fechada
+        por quem a solicitou. Prefira connection() no código novo.
+        
         Returns:
             Conexão com o banco de dados
             
@@ -26,11 +376,60 @@ class Database:
         try:
             conn = sqlite3.connect(self.db_path)
             conn.row_factory = sqlite3.Row
+            aplicar_pragmas(conn, self.perfil)
             return conn
         except Exception as e:
             logger.error(f"{ERRO_CONEXAO_DB}: {str(e)}")
             raise Exception(ERRO_CONEXAO_DB)
             
+    @contextmanager
+    def connection(self):
+        """
+        Empresta uma conexão do pool durante o bloco with.
+        
+        Yields:
+            Conexão com o banco de dados
+            
+        Raises:
+            Exception: Se não conseguir obter uma conexão
+        """
+        try:
+            conn = self.pool.acquire()
+        except Exception as e:
+            logger.error(f"{ERRO_CONEXAO_DB}: {str(e)}")
+            raise Exception(ERRO_CONEXAO_DB)
+        try:
+            yield conn
+        finally:
+            self.pool.release(conn)
+            
+    @contextmanager
+    def transaction(self):
+        """
+        Executa o bloco with em uma transação BEGIN IMMEDIATE.
+        
+        O lock de escrita é obtido já no início, então leituras feitas
+        dentro do bloco não mudam até o commit. Chamadas de execute_query
+        dentro do bloco usam a mesma conexão e não fazem commit próprio.
+        Se o bloco levantar uma exceção, a transação é desfeita.
+        
+        Yields:
+            Conexão com a transação aberta
+        """
+        with self.connection() as conn:
+            # Transação já aberta por um bloco externo na mesma thread
+            if conn.in_transaction:
+                yield conn
+                return
+                
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+                
     def execute_query(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
         """
         Executa uma query e retorna os resultados.
@@ -45,22 +444,23 @@ class Database:
         Raises:
             Exception: Se houver erro na execução
         """
-        conn = None
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            results = [dict(row) for row in cursor.fetchall()]
-            return results
-        except Exception as e:
-            logger.error(f"{ERRO_EXECUCAO_DB}: {str(e)}")
-            raise Exception(ERRO_EXECUCAO_DB)
-        finally:
-            if conn:
-                try:
-                    conn.close()
-                except Exception as e:
-                    logger.error(f"{ERRO_FECHAMENTO_DB}: {str(e)}")
+        with self.connection() as conn:
+            # Dentro de transaction() o commit fica a cargo do bloco externo
+            transacao_externa = conn.in_transaction
+            try:
+                cursor = conn.cursor()
+                cursor.execute(query, params)
+                results = [dict(row) for row in cursor.fetchall()]
+                
+                # Confirma escritas feitas por INSERT/UPDATE/DELETE
+                if conn.in_transaction and not transacao_externa:
+                    conn.commit()
+                return results
+            except Exception as e:
+                if conn.in_transaction and not transacao_externa:
+                    conn.rollback()
+                logger.error(f"{ERRO_EXECUCAO_DB}: {str(e)}")
+                raise Exception(ERRO_EXECUCAO_DB)
                     
     def execute_many(self, query: str, params: List[tuple]) -> None:
         """
@@ -73,21 +473,19 @@ class Database:
         Raises:
             Exception: Se houver erro na execução
         """
-        conn = None
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.executemany(query, params)
-            conn.commit()
-        except Exception as e:
-            logger.error(f"{ERRO_EXECUCAO_DB}: {str(e)}")
-            raise Exception(ERRO_EXECUCAO_DB)
-        finally:
-            if conn:
-                try:
-                    conn.close()
-                except Exception as e:
-                    logger.error(f"{ERRO_FECHAMENTO_DB}: {str(e)}")
+        with self.connection() as conn:
+            # Dentro de transaction() o commit fica a cargo do bloco externo
+            transacao_externa = conn.in_transaction
+            try:
+                cursor = conn.cursor()
+                cursor.executemany(query, params)
+                if conn.in_transaction and not transacao_externa:
+                    conn.commit()
+            except Exception as e:
+                if conn.in_transaction and not transacao_externa:
+                    conn.rollback()
+                logger.error(f"{ERRO_EXECUCAO_DB}: {str(e)}")
+                raise Exception(ERRO_EXECUCAO_DB)
                     
     def execute_transaction(self, queries: List[Tuple[str, tuple]]) -> None:
         """
@@ -99,26 +497,23 @@ class Database:
         Raises:
             Exception: Se houver erro na execução
         """
-        conn = None
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            for query, params in queries:
-                cursor.execute(query, params)
+        with self.connection() as conn:
+            # Dentro de transaction() as queries passam a fazer parte da
+            # transação externa, que decide o commit ou o rollback
+            transacao_externa = conn.in_transaction
+            try:
+                cursor = conn.cursor()
                 
-            conn.commit()
-        except Exception as e:
-            if conn:
-                conn.rollback()
-            logger.error(f"{ERRO_EXECUCAO_DB}: {str(e)}")
-            raise Exception(ERRO_EXECUCAO_DB)
-        finally:
-            if conn:
-                try:
-                    conn.close()
-                except Exception as e:
-                    logger.error(f"{ERRO_FECHAMENTO_DB}: {str(e)}")
+                for query, params in queries:
+                    cursor.execute(query, params)
+                    
+                if conn.in_transaction and not transacao_externa:
+                    conn.commit()
+            except Exception as e:
+                if conn.in_transaction and not transacao_externa:
+                    conn.rollback()
+                logger.error(f"{ERRO_EXECUCAO_DB}: {str(e)}")
+                raise Exception(ERRO_EXECUCAO_DB)
                     
     def get_condutor(self, cnh: str) -> Optional[Dict[str, Any]]:
         """
@@ -157,41 +552,66 @@ class Database:
         """
         query = """
             SELECT v.*, c.nome as condutor_nome, c.cnh as condutor_cnh
-            FROM veiculos v
-            LEFT JOIN registros r ON v.id = r.veiculo_id
-            LEFT JOIN condutores c ON r.condutor_id = c.id
+            FROM registros r
+            JOIN veiculos v ON v.id = r.veiculo_id
+            JOIN condutores c ON c.id = r.condutor_id
             WHERE r.data_entrada IS NULL
+            ORDER BY v.marca, v.modelo
         """
         return self.execute_query(query)
         
-    def get_condutores_disponiveis(self) -> List[Dict[str, Any]]:
+    def get_condutores_disponiveis(self, condutor_id: Optional[int] = None) -> List[Dict[str, Any]]:
         """
-        Busca todos os condutores disponíveis.
+        Busca os condutores sem viagem em aberto.
         
+        A verificação usa NOT EXISTS sobre o índice parcial de viagens em
+        aberto, então o custo não cresce com o histórico de registros.
+        
+        Args:
+            condutor_id: Restringe a busca a um condutor (opcional)
+            
         Returns:
             Lista de condutores disponíveis
         """
         query = """
             SELECT c.*
             FROM condutores c
-            LEFT JOIN registros r ON c.id = r.condutor_id
-            WHERE r.data_entrada IS NULL
-            OR r.id IS NULL
+            WHERE NOT EXISTS (
+                SELECT 1 FROM registros r
+                WHERE r.condutor_id = c.id
+                AND r.data_entrada IS NULL
+            )
         """
-        return self.execute_query(query)
+        params = ()
+        if condutor_id is not None:
+            query += " AND c.id = ?"
+            params = (condutor_id,)
+        query += " ORDER BY c.nome"
+        return self.execute_query(query, params)
         
-    def get_veiculos_disponiveis(self) -> List[Dict[str, Any]]:
+    def get_veiculos_disponiveis(self, veiculo_id: Optional[int] = None) -> List[Dict[str, Any]]:
         """
-        Busca todos os veículos disponíveis.
+        Busca os veículos disponíveis e sem viagem em aberto.
         
+        Args:
+            veiculo_id: Restringe a busca a um veículo (opcional)
+            
         Returns:
             Lista de veículos disponíveis
         """
         query = """
             SELECT v.*
             FROM veiculos v
-            LEFT JOIN registros r ON v.id = r.veiculo_id
-            WHERE r.data_entrada IS NULL
-            OR r.id IS NULL
+            WHERE v.status = ?
+            AND NOT EXISTS (
+                SELECT 1 FROM registros r
+                WHERE r.veiculo_id = v.id
+                AND r.data_entrada IS NULL
+            )
         """
-        return self.execute_query(query) 
\ No newline at end of file
+        params = (VEICULO_DISPONIVEL,)
+        if veiculo_id is not None:
+            query += " AND v.id = ?"
+            params += (veiculo_id,)
+        query += " ORDER BY v.marca, v.modelo"
+        return self.execute_query(query, params)
@@ -1,91 +1,76 @@
 import sqlite3
 import os
 import logging
+import threading
+import weakref
 from datetime import datetime
+from utils.database import aplicar_pragmas, get_pool
+from utils.migrations import aplicar_migracoes
+from utils.constants import VEICULO_DISPONIVEL
 
-# Configuração de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("app.log"),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
 # Caminho do banco de dados
 DB_PATH = os.path.join('data', 'veiculos.db')
 
+# Inicialização preguiçosa: feita na primeira conexão do processo
+_inicializado = False
+_init_lock = threading.Lock()
+
+def _garantir_inicializado():
+    """Cria o diretório e aplica as migrações uma única vez por processo"""
+    global _inicializado
+    if _inicializado:
+        return
+        
+    with _init_lock:
+        if not _inicializado:
+            os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+            init_db()
+            _inicializado = True
+
+class ConexaoDireta(sqlite3.Connection):
+    """
+    Conexão aberta fora do pool, registrada no pool do mesmo banco.
+    
+    Uma restauração de backup drena o pool e, com isso, também espera estas
+    conexões serem fechadas (ou coletadas, se o chamador não fechar) antes
+    de trocar o arquivo do banco.
+    """
+    
+    def close(self):
+        super().close()
+        self._liberar()
+
 def get_connection():
     """Cria uma conexão com o banco de dados"""
     try:
-        # Garantir que o diretório data existe
-        os.makedirs('data', exist_ok=True)
+        _garantir_inicializado()
         
-        conn = sqlite3.connect(DB_PATH)
-        logger.info(f"Conexão com o banco de dados estabelecida em {DB_PATH}")
+        # Aguarda uma restauração em andamento antes de abrir o arquivo
+        pool = get_pool(DB_PATH)
+        pool.registrar_externa()
+        try:
+            conn = sqlite3.connect(DB_PATH, factory=ConexaoDireta)
+        except Exception:
+            pool.liberar_externa()
+            raise
+        # Executado uma única vez: no close() ou quando a conexão for coletada
+        conn._liberar = weakref.finalize(conn, pool.liberar_externa)
+        aplicar_pragmas(conn)
         return conn
     except Exception as e:
         logger.error(f"Erro ao conectar ao banco de dados: {str(e)}")
         raise
 
 def init_db():
-    """Inicializa o banco de dados com as tabelas necessárias"""
+    """Inicializa o banco de dados aplicando as migrações pendentes"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Criar tabela de condutores
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS condutores (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL,
-            cnh_numero TEXT NOT NULL,
-            cnh_validade DATE NOT NULL,
-            telefone TEXT NOT NULL,
-            cnh_arquivo TEXT NOT NULL
-        )
-        ''')
-        
-        # Criar tabela de veículos
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS veiculos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            marca TEXT NOT NULL,
-            modelo TEXT NOT NULL,
-            placa TEXT UNIQUE NOT NULL,
-            quilometragem_atual INTEGER NOT NULL,
-            status TEXT NOT NULL CHECK(status IN ('disponivel', 'em uso'))
-        )
-        ''')
-        
-        # Criar tabela de registros
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS registros (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            condutor_id INTEGER NOT NULL,
-            veiculo_id INTEGER NOT NULL,
-            data_saida DATETIME NOT NULL,
-            data_entrada DATETIME,
-            km_saida INTEGER NOT NULL,
-            km_entrada INTEGER,
-            checklist_saida TEXT NOT NULL,
-            checklist_entrada TEXT,
-            observacoes TEXT,
-            pdf_saida TEXT NOT NULL,
-            FOREIGN KEY (condutor_id) REFERENCES condutores (id),
-            FOREIGN KEY (veiculo_id) REFERENCES veiculos (id)
-        )
-        ''')
-        
-        conn.commit()
-        logger.info("Banco de dados inicializado com sucesso")
+        if aplicar_migracoes(DB_PATH):
+            logger.info(f"Banco de dados inicializado com sucesso em {DB_PATH}")
     except Exception as e:
         logger.error(f"Erro ao inicializar o banco de dados: {str(e)}")
         raise
-    finally:
-        conn.close()
 
 def verificar_condutor_disponivel(condutor_id):
     """Verifica se um condutor tem algum registro em aberto"""
@@ -114,14 +99,9 @@ def verificar_veiculo_disponivel(veiculo_id):
         
         cursor.execute('SELECT status FROM veiculos WHERE id = ?', (veiculo_id,))
         status = cursor.fetchone()[0]
-        return status == 'disponivel'
+        return status == VEICULO_DISPONIVEL
     except Exception as e:
         logger.error(f"Erro ao verificar disponibilidade do veículo: {str(e)}")
         return False
     finally:
         conn.close()
-
-# Inicializar o banco de dados quando o módulo for importado
-if not os.path.exists('data'):
-    os.makedirs('data')
-init_db() 
\ No newline at end of file
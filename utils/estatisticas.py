@@ -0,0 +1,101 @@
+import logging
+from typing import Any, Dict
+from utils.cache import CacheTTL
+from utils.database import Database
+from utils.periodos import filtro_dias, filtro_periodo, intervalo_mes, intervalo_ultimos_dias
+from utils.constants import TEMPO_CACHE_DASHBOARD
+
+logger = logging.getLogger(__name__)
+
+# Cache compartilhado por todas as sessões do processo
+_cache_dashboard = CacheTTL()
+
+def _calcular_dados_dashboard(db: Database) -> Dict[str, Any]:
+    """
+    Consulta todos os dados do dashboard usando uma única conexão.
+    
+    Args:
+        db: Instância do banco de dados
+        
+    Returns:
+        Dicionário com as estatísticas gerais e as séries dos gráficos
+    """
+    filtro_mes, params_mes = filtro_periodo('data_saida', intervalo_mes())
+    filtro_30_dias, params_30_dias = filtro_dias('dia', intervalo_ultimos_dias(30))
+    
+    with db.connection():
+        # Indicadores gerais em uma só consulta
+        estatisticas = db.execute_query(f"""
+            SELECT
+                (SELECT COUNT(*) FROM condutores) as total_condutores,
+                (SELECT COUNT(*) FROM veiculos) as total_veiculos,
+                (SELECT COUNT(*) FROM registros WHERE data_entrada IS NULL) as veiculos_em_uso,
+                (SELECT COUNT(*) FROM registros WHERE {filtro_mes}) as registros_mes
+        """, params_mes)[0]
+        
+        # Séries lidas da consolidação diária (uso_diario)
+        registros_por_dia = db.execute_query(f"""
+            SELECT 
+                dia as data,
+                SUM(viagens) as total
+            FROM uso_diario
+            WHERE {filtro_30_dias}
+            GROUP BY dia
+            ORDER BY dia
+        """, params_30_dias)
+        
+        veiculos_mais_utilizados = db.execute_query("""
+            SELECT 
+                v.marca || ' ' || v.modelo as veiculo,
+                v.placa,
+                COALESCE(SUM(u.viagens), 0) as total_usos
+            FROM veiculos v
+            LEFT JOIN uso_diario u ON v.id = u.veiculo_id
+            GROUP BY v.id
+            ORDER BY total_usos DESC
+            LIMIT 5
+        """)
+        
+        condutores_mais_ativos = db.execute_query("""
+            SELECT 
+                c.nome,
+                COALESCE(SUM(u.viagens), 0) as total_usos
+            FROM condutores c
+            LEFT JOIN uso_diario u ON c.id = u.condutor_id
+            GROUP BY c.id
+            ORDER BY total_usos DESC
+            LIMIT 5
+        """)
+        
+    return {
+        'estatisticas': estatisticas,
+        'registros_por_dia': registros_por_dia,
+        'veiculos_mais_utilizados': veiculos_mais_utilizados,
+        'condutores_mais_ativos': condutores_mais_ativos
+    }
+
+def obter_dados_dashboard(db: Database) -> Dict[str, Any]:
+    """
+    Retorna os dados do dashboard, consultando o banco no máximo uma vez
+    a cada TEMPO_CACHE_DASHBOARD segundos para todas as sessões.
+    
+    Args:
+        db: Instância do banco de dados
+        
+    Returns:
+        Dicionário com as estatísticas gerais e as séries dos gráficos
+    """
+    return _cache_dashboard.obter_ou_calcular(
+        db.db_path,
+        lambda: _calcular_dados_dashboard(db),
+        TEMPO_CACHE_DASHBOARD
+    )
+
+def invalidar_cache_dashboard() -> None:
+    """
+    Descarta os dados do dashboard em cache.
+    
+    Deve ser chamada após registrar uma saída ou entrada.
+    """
+    _cache_dashboard.limpar()
+    logger.debug("Cache do dashboard invalidado")
@@ -0,0 +1,277 @@
+import argparse
+import ast
+import logging
+import multiprocessing
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+from utils.database import Database
+from utils.pdf_generator import PDFGenerator
+from utils.periodos import intervalo_datas
+
+logger = logging.getLogger(__name__)
+
+# Registros lidos por consulta (paginação por chave)
+TAMANHO_PAGINA = 200
+
+# Comprovantes renderizados por tarefa enviada a um processo
+TAMANHO_LOTE = 50
+
+# Lotes em andamento por processo; limita a memória usada pelos resultados
+LOTES_POR_PROCESSO = 2
+
+CONSULTA_REGISTROS = """
+    SELECT
+        r.id, r.data_saida, r.km_saida, r.checklist_saida, r.observacoes_saida,
+        r.data_entrada, r.km_entrada, r.checklist_entrada, r.observacoes_entrada,
+        c.nome as condutor_nome, c.cnh as condutor_cnh,
+        v.placa, v.marca, v.modelo
+    FROM registros r
+    JOIN condutores c ON r.condutor_id = c.id
+    JOIN veiculos v ON r.veiculo_id = v.id
+    WHERE r.data_saida >= ? AND r.data_saida < ?
+    AND (r.data_saida, r.id) > (?, ?)
+    {filtros}
+    ORDER BY r.data_saida, r.id
+    LIMIT ?
+"""
+
+def ler_checklist(texto: Optional[str]) -> Dict[str, bool]:
+    """
+    Converte o checklist gravado em registros para dicionário.
+
+    A saída grava str(dict); a entrada e os registros antigos gravam os
+    itens marcados separados por quebra de linha.
+
+    Args:
+        texto: Valor da coluna checklist_saida/checklist_entrada
+
+    Returns:
+        Dicionário item -> marcado
+    """
+    if not texto:
+        return {}
+    texto = texto.strip()
+    if texto.startswith('{'):
+        try:
+            return {str(item): bool(status) for item, status in ast.literal_eval(texto).items()}
+        except (ValueError, SyntaxError):
+            pass
+    return {item.strip(): True for item in texto.splitlines() if item.strip()}
+
+def _comprovantes_do_registro(registro: Dict[str, Any]) -> Iterator[Tuple[str, int, Dict[str, Any]]]:
+    """
+    Monta os dados dos comprovantes (saída e, se houver, entrada) de um registro.
+
+    Args:
+        registro: Linha de CONSULTA_REGISTROS
+
+    Yields:
+        Tuplas (tipo, registro_id, dados do PDF)
+    """
+    veiculo_modelo = f"{registro['marca']} {registro['modelo']}"
+    yield 'saida', registro['id'], {
+        'condutor_nome': registro['condutor_nome'],
+        'condutor_cnh': registro['condutor_cnh'],
+        'veiculo_placa': registro['placa'],
+        'veiculo_modelo': veiculo_modelo,
+        'quilometragem': registro['km_saida'],
+        'checklist': ler_checklist(registro['checklist_saida']),
+        'observacoes': registro['observacoes_saida'],
+        'data_hora': registro['data_saida']
+    }
+    if registro['data_entrada']:
+        yield 'entrada', registro['id'], {
+            'veiculo_placa': registro['placa'],
+            'veiculo_modelo': veiculo_modelo,
+            'quilometragem': registro['km_entrada'],
+            'checklist': ler_checklist(registro['checklist_entrada']),
+            'observacoes': registro['observacoes_entrada'],
+            'data_hora': registro['data_entrada']
+        }
+
+def iterar_comprovantes(
+    db: Database,
+    inicio: date,
+    fim: date,
+    veiculo_id: Optional[int] = None,
+    condutor_id: Optional[int] = None
+) -> Iterator[Tuple[str, int, Dict[str, Any]]]:
+    """
+    Percorre os comprovantes de um período, uma página de registros por vez.
+
+    Args:
+        db: Instância do banco de dados
+        inicio: Primeiro dia do período
+        fim: Último dia do período, inclusive
+        veiculo_id: Filtra por veículo (opcional)
+        condutor_id: Filtra por condutor (opcional)
+
+    Yields:
+        Tuplas (tipo, registro_id, dados do PDF)
+    """
+    inicio_ts, fim_ts = intervalo_datas(inicio, fim)
+    filtros = ""
+    params_filtros: List[Any] = []
+    if veiculo_id:
+        filtros += " AND r.veiculo_id = ?"
+        params_filtros.append(veiculo_id)
+    if condutor_id:
+        filtros += " AND r.condutor_id = ?"
+        params_filtros.append(condutor_id)
+    consulta = CONSULTA_REGISTROS.format(filtros=filtros)
+
+    ultima_data, ultimo_id = "", 0
+    while True:
+        registros = db.execute_query(
+            consulta,
+            (inicio_ts, fim_ts, ultima_data, ultimo_id, *params_filtros, TAMANHO_PAGINA)
+        )
+        for registro in registros:
+            yield from _comprovantes_do_registro(registro)
+        if len(registros) < TAMANHO_PAGINA:
+            return
+        ultima_data, ultimo_id = registros[-1]['data_saida'], registros[-1]['id']
+
+_gerador: Optional[PDFGenerator] = None
+
+def _renderizar_lote(lote: List[Tuple[str, int, Dict[str, Any]]]) -> List[Tuple[str, bytes]]:
+    """
+    Renderiza um lote de comprovantes (executado nos processos de trabalho).
+
+    Precisa continuar no nível do módulo, com argumentos serializáveis por
+    pickle: os processos são criados com 'spawn' e importam esta função.
+
+    Args:
+        lote: Tuplas (tipo, registro_id, dados do PDF)
+
+    Returns:
+        Lista de (nome do arquivo, conteúdo do PDF)
+    """
+    global _gerador
+    if _gerador is None:
+        _gerador = PDFGenerator()
+
+    resultado = []
+    for tipo, registro_id, dados in lote:
+        nome = _gerador.nome_comprovante(tipo, dados)
+        # O ID do registro evita nomes repetidos no mesmo segundo
+        nome = f"{nome[:-4]}_{registro_id}.pdf"
+        resultado.append((nome, _gerador.gerar_bytes(tipo, dados)))
+    return resultado
+
+def _em_lotes(itens: Iterator, tamanho: int) -> Iterator[list]:
+    """
+    Agrupa um iterador em listas de até `tamanho` itens.
+    """
+    lote = []
+    for item in itens:
+        lote.append(item)
+        if len(lote) == tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+def renderizar_comprovantes(
+    comprovantes: Iterator[Tuple[str, int, Dict[str, Any]]],
+    processos: Optional[int] = None
+) -> Iterator[Tuple[str, bytes]]:
+    """
+    Renderiza comprovantes em paralelo, preservando a ordem de entrada.
+
+    No máximo processos * LOTES_POR_PROCESSO lotes ficam em andamento, de
+    forma que a memória não cresce com o tamanho do período.
+
+    Args:
+        comprovantes: Iterador de (tipo, registro_id, dados do PDF)
+        processos: Número de processos (padrão: número de CPUs; 1 renderiza no próprio processo)
+
+    Yields:
+        Tuplas (nome do arquivo, conteúdo do PDF)
+    """
+    processos = processos or os.cpu_count() or 1
+    lotes = _em_lotes(comprovantes, TAMANHO_LOTE)
+
+    if processos == 1:
+        for lote in lotes:
+            yield from _renderizar_lote(lote)
+        return
+
+    # 'spawn': um fork do processo do Streamlit copiaria locks mantidos por
+    # suas threads (fila de PDFs, agendador, auditoria, logging) e o filho
+    # poderia travar neles. Os processos novos só importam este módulo.
+    with ProcessPoolExecutor(
+        max_workers=processos,
+        mp_context=multiprocessing.get_context('spawn')
+    ) as executor:
+        pendentes = deque()
+        for lote in lotes:
+            pendentes.append(executor.submit(_renderizar_lote, lote))
+            if len(pendentes) >= processos * LOTES_POR_PROCESSO:
+                yield from pendentes.popleft().result()
+        while pendentes:
+            yield from pendentes.popleft().result()
+
+def exportar_comprovantes(
+    db_path: str,
+    destino: Union[str, BinaryIO],
+    inicio: date,
+    fim: date,
+    veiculo_id: Optional[int] = None,
+    condutor_id: Optional[int] = None,
+    processos: Optional[int] = None
+) -> int:
+    """
+    Exporta os comprovantes de um período para um arquivo ZIP.
+
+    Os PDFs são gravados no ZIP à medida que ficam prontos.
+
+    Args:
+        db_path: Caminho do banco de dados
+        destino: Caminho do ZIP ou arquivo binário aberto para escrita
+        inicio: Primeiro dia do período
+        fim: Último dia do período, inclusive
+        veiculo_id: Filtra por veículo (opcional)
+        condutor_id: Filtra por condutor (opcional)
+        processos: Número de processos de renderização
+
+    Returns:
+        Quantidade de comprovantes exportados
+    """
+    db = Database(db_path)
+    comprovantes = iterar_comprovantes(db, inicio, fim, veiculo_id, condutor_id)
+
+    total = 0
+    # PDFs já são comprimidos; ZIP_STORED evita recomprimir
+    with zipfile.ZipFile(destino, 'w', zipfile.ZIP_STORED) as arquivo_zip:
+        for nome, conteudo in renderizar_comprovantes(comprovantes, processos):
+            arquivo_zip.writestr(nome, conteudo)
+            total += 1
+
+    logger.info(f"{total} comprovantes exportados de {inicio} a {fim}")
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta comprovantes de saída/entrada para um ZIP")
+    parser.add_argument('--db', default='database.db', help="Caminho do banco de dados")
+    parser.add_argument('--inicio', type=date.fromisoformat, required=True, help="Primeiro dia (AAAA-MM-DD)")
+    parser.add_argument('--fim', type=date.fromisoformat, required=True, help="Último dia (AAAA-MM-DD)")
+    parser.add_argument('--veiculo', type=int, help="ID do veículo")
+    parser.add_argument('--condutor', type=int, help="ID do condutor")
+    parser.add_argument('--processos', type=int, help="Processos de renderização (padrão: CPUs)")
+    parser.add_argument('--saida', required=True, help="Arquivo ZIP de destino")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    total = exportar_comprovantes(
+        args.db, args.saida, args.inicio, args.fim,
+        args.veiculo, args.condutor, args.processos
+    )
+    print(f"{total} comprovantes exportados para {args.saida}")
+
+if __name__ == "__main__":
+    main()
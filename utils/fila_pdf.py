@@ -0,0 +1,311 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from utils.blobs import BlobStore
+from utils.database import Database
+from utils.migrations import aplicar_migracoes
+from utils.pdf_generator import PDFGenerator
+from utils.periodos import agora, formatar_timestamp
+from utils.constants import (
+    FILA_PDF_WORKERS,
+    FILA_PDF_MAX_TENTATIVAS,
+    FILA_PDF_INTERVALO_VERIFICACAO,
+    FILA_PDF_TEMPO_LIMITE
+)
+
+logger = logging.getLogger(__name__)
+
+# Situações de um trabalho na fila
+PDF_PENDENTE = 'pendente'
+PDF_PROCESSANDO = 'processando'
+PDF_CONCLUIDO = 'concluido'
+PDF_ERRO = 'erro'
+
+class FilaPDF:
+    """
+    Fila persistente de geração de comprovantes em PDF.
+
+    Os trabalhos ficam na tabela fila_pdfs e são consumidos por threads em
+    segundo plano, fora do ciclo da requisição. Trabalhos interrompidos por
+    uma reinicialização voltam para a fila ao iniciar; os que ficam em
+    'processando' por mais de FILA_PDF_TEMPO_LIMITE segundos (por exemplo,
+    se a gravação do resultado falhou) são retomados pelas próprias threads.
+    """
+
+    def __init__(self, db_path: str, num_workers: int = FILA_PDF_WORKERS):
+        self.db_path = db_path
+        self.db = Database(db_path)
+        self.blobs = BlobStore(db_path)
+        self.num_workers = num_workers
+        self._novo_trabalho = threading.Event()
+        self._parar = threading.Event()
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def iniciar(self):
+        """
+        Inicia as threads de processamento (apenas uma vez por processo).
+        """
+        with self._lock:
+            if self._workers:
+                return
+
+            aplicar_migracoes(self.db_path)
+
+            # Retoma trabalhos interrompidos por uma parada do processo
+            with self.db.transaction() as conn:
+                cursor = conn.execute(
+                    "UPDATE fila_pdfs SET status = ?, atualizado_em = ? WHERE status = ?",
+                    (PDF_PENDENTE, agora(), PDF_PROCESSANDO)
+                )
+                if cursor.rowcount:
+                    logger.info(f"{cursor.rowcount} trabalho(s) de PDF retomado(s)")
+
+            self._parar.clear()
+            for i in range(self.num_workers):
+                worker = threading.Thread(
+                    target=self._executar,
+                    name=f"fila-pdf-{i}",
+                    daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def parar(self, timeout: Optional[float] = None):
+        """
+        Sinaliza as threads para encerrar e aguarda o término.
+
+        Args:
+            timeout: Tempo máximo de espera por thread, em segundos
+        """
+        with self._lock:
+            self._parar.set()
+            self._novo_trabalho.set()
+            for worker in self._workers:
+                worker.join(timeout)
+            self._workers = []
+
+    def enfileirar(self, tipo: str, dados: Dict[str, Any], registro_id: Optional[int] = None) -> int:
+        """
+        Adiciona a geração de um PDF à fila.
+
+        Chamado dentro de db.transaction(), o trabalho é gravado na mesma
+        transação do registro.
+
+        Args:
+            tipo: 'saida' ou 'entrada'
+            dados: Dados do comprovante (serializáveis em JSON)
+            registro_id: ID do registro de uso (opcional)
+
+        Returns:
+            ID do trabalho criado
+        """
+        momento = agora()
+        with self.db.transaction() as conn:
+            cursor = conn.execute("""
+                INSERT INTO fila_pdfs (
+                    tipo, registro_id, dados, status, criado_em, atualizado_em
+                ) VALUES (?, ?, ?, ?, ?, ?)
+            """, (
+                tipo,
+                registro_id,
+                json.dumps(dados, ensure_ascii=False),
+                PDF_PENDENTE,
+                momento,
+                momento
+            ))
+            trabalho_id = cursor.lastrowid
+
+        self.iniciar()
+        self._novo_trabalho.set()
+        return trabalho_id
+
+    def obter(self, trabalho_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Consulta a situação de um trabalho.
+
+        Args:
+            trabalho_id: ID do trabalho
+
+        Returns:
+            Dicionário com id, tipo, status, caminho, erro e nome_original, ou None se não existir
+        """
+        resultado = self.db.execute_query("""
+            SELECT f.id, f.tipo, f.registro_id, f.status, f.caminho, f.erro, b.nome_original
+            FROM fila_pdfs f
+            LEFT JOIN blobs b ON b.hash = f.blob
+            WHERE f.id = ?
+        """, (trabalho_id,))
+        return dict(resultado[0]) if resultado else None
+
+    def _reservar(self) -> Optional[Dict[str, Any]]:
+        """
+        Reserva o próximo trabalho pendente.
+
+        Trabalhos presos em 'processando' há mais de FILA_PDF_TEMPO_LIMITE
+        segundos também são reservados de novo (ou marcados como erro, se
+        já esgotaram as tentativas).
+
+        Returns:
+            Trabalho reservado ou None se a fila estiver vazia
+        """
+        limite = formatar_timestamp(datetime.now() - timedelta(seconds=FILA_PDF_TEMPO_LIMITE))
+        with self.db.transaction() as conn:
+            # Trabalhos presos em 'processando' têm prioridade: já esperaram mais
+            while True:
+                trabalho = conn.execute("""
+                    SELECT id, tipo, registro_id, dados, tentativas FROM fila_pdfs
+                    WHERE status = ? AND atualizado_em < ?
+                    ORDER BY atualizado_em
+                    LIMIT 1
+                """, (PDF_PROCESSANDO, limite)).fetchone()
+                if trabalho is None or trabalho['tentativas'] < FILA_PDF_MAX_TENTATIVAS:
+                    break
+
+                logger.error(f"Trabalho de PDF {trabalho['id']} abandonado após {trabalho['tentativas']} tentativa(s)")
+                conn.execute("""
+                    UPDATE fila_pdfs
+                    SET status = ?, erro = ?, atualizado_em = ?
+                    WHERE id = ?
+                """, (PDF_ERRO, "Tempo limite de processamento excedido", agora(), trabalho['id']))
+
+            if trabalho is not None:
+                logger.warning(f"Trabalho de PDF {trabalho['id']} retomado após exceder o tempo limite")
+            else:
+                trabalho = conn.execute("""
+                    SELECT id, tipo, registro_id, dados, tentativas FROM fila_pdfs
+                    WHERE status = ?
+                    ORDER BY id
+                    LIMIT 1
+                """, (PDF_PENDENTE,)).fetchone()
+                if trabalho is None:
+                    return None
+
+            conn.execute("""
+                UPDATE fila_pdfs
+                SET status = ?, tentativas = tentativas + 1, atualizado_em = ?
+                WHERE id = ?
+            """, (PDF_PROCESSANDO, agora(), trabalho['id']))
+            return dict(trabalho)
+
+    def _processar(self, trabalho: Dict[str, Any]):
+        """
+        Gera o PDF de um trabalho e grava o resultado.
+
+        Args:
+            trabalho: Trabalho reservado
+        """
+        try:
+            tipo = trabalho['tipo']
+            dados = json.loads(trabalho['dados'])
+            gerador = PDFGenerator()
+            hash_blob = self.blobs.salvar(
+                gerador.gerar_bytes(tipo, dados),
+                'application/pdf',
+                gerador.nome_comprovante(tipo, dados)
+            )
+
+            with self.db.transaction() as conn:
+                conn.execute("""
+                    UPDATE fila_pdfs
+                    SET status = ?, blob = ?, caminho = ?, erro = NULL, atualizado_em = ?
+                    WHERE id = ?
+                """, (PDF_CONCLUIDO, hash_blob, self.blobs.caminho(hash_blob), agora(), trabalho['id']))
+                if trabalho['registro_id']:
+                    coluna = 'pdf_saida_blob' if tipo == 'saida' else 'pdf_entrada_blob'
+                    conn.execute(
+                        f"UPDATE registros SET {coluna} = ? WHERE id = ?",
+                        (hash_blob, trabalho['registro_id'])
+                    )
+
+        except Exception as e:
+            tentativas = trabalho['tentativas'] + 1
+            status = PDF_PENDENTE if tentativas < FILA_PDF_MAX_TENTATIVAS else PDF_ERRO
+            logger.error(f"Erro ao gerar PDF do trabalho {trabalho['id']} (tentativa {tentativas}): {str(e)}")
+            self.db.execute_query("""
+                UPDATE fila_pdfs
+                SET status = ?, erro = ?, atualizado_em = ?
+                WHERE id = ?
+            """, (status, str(e), agora(), trabalho['id']))
+
+    def _executar(self):
+        """
+        Laço das threads de processamento.
+        """
+        while not self._parar.is_set():
+            try:
+                trabalho = self._reservar()
+            except Exception as e:
+                logger.error(f"Erro ao consultar a fila de PDFs: {str(e)}")
+                trabalho = None
+
+            if trabalho is None:
+                self._novo_trabalho.wait(FILA_PDF_INTERVALO_VERIFICACAO)
+                self._novo_trabalho.clear()
+                continue
+
+            try:
+                self._processar(trabalho)
+            except Exception as e:
+                # Falha ao gravar o erro do trabalho (ex.: banco bloqueado): o
+                # trabalho fica em 'processando' e é retomado por _reservar()
+                # após FILA_PDF_TEMPO_LIMITE; a thread continua atendendo a fila
+                logger.error(f"Erro ao registrar o resultado do trabalho {trabalho['id']}: {str(e)}")
+                self._parar.wait(FILA_PDF_INTERVALO_VERIFICACAO)
+
+# Uma fila por arquivo de banco de dados
+_filas: Dict[str, FilaPDF] = {}
+_filas_lock = threading.Lock()
+
+def get_fila_pdf(db_path: str = "database.db") -> FilaPDF:
+    """
+    Obtém a fila de PDFs do banco informado, iniciando-a se necessário.
+
+    Args:
+        db_path: Caminho do banco de dados
+
+    Returns:
+        Fila compartilhada pelo processo
+    """
+    chave = os.path.abspath(db_path)
+    with _filas_lock:
+        fila = _filas.get(chave)
+        if fila is None:
+            fila = FilaPDF(db_path)
+            _filas[chave] = fila
+    fila.iniciar()
+    return fila
+
+def exibir_status_pdf(fila: FilaPDF, trabalho_id: int, chave: str):
+    """
+    Exibe a situação de um comprovante e, quando pronto, o botão de download.
+
+    Args:
+        fila: Fila de PDFs
+        trabalho_id: ID do trabalho
+        chave: Chave usada nos widgets do Streamlit
+    """
+    import streamlit as st
+
+    trabalho = fila.obter(trabalho_id)
+    if trabalho is None:
+        return
+
+    if trabalho['status'] == PDF_CONCLUIDO and os.path.exists(trabalho['caminho']):
+        with open(trabalho['caminho'], 'rb') as arquivo:
+            st.download_button(
+                "Baixar comprovante (PDF)",
+                data=arquivo.read(),
+                file_name=trabalho['nome_original'] or os.path.basename(trabalho['caminho']),
+                mime="application/pdf",
+                key=f"{chave}_download"
+            )
+    elif trabalho['status'] == PDF_ERRO:
+        st.error(f"Não foi possível gerar o comprovante: {trabalho['erro']}")
+    else:
+        st.info("Comprovante em geração...")
+        if st.button("Atualizar", key=f"{chave}_atualizar"):
+            st.rerun()
@@ -0,0 +1,284 @@
+import gzip
+import json
+import os
+import threading
+from array import array
+from datetime import date
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from utils.constants import LOG_LINHAS_POR_PAGINA
+
+NIVEIS_LOG = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+PREFIXO_JSON = b'{"ts": "'
+PREFIXO_NIVEL_JSON = b'"nivel": "'
+
+# Quantidade de bytes lidos por vez ao indexar
+TAMANHO_BLOCO = 1024 * 1024
+
+@lru_cache(maxsize=1024)
+def _dia(prefixo: bytes) -> Optional[date]:
+    """Converte o prefixo AAAA-MM-DD de uma linha em data (None se não for data)."""
+    if len(prefixo) < 10 or prefixo[4:5] != b'-' or prefixo[7:8] != b'-':
+        return None
+    try:
+        return date(int(prefixo[0:4]), int(prefixo[5:7]), int(prefixo[8:10]))
+    except ValueError:
+        return None
+
+def _interpretar(linha: bytes) -> Optional[Tuple[date, str]]:
+    """
+    Extrai dia e nível do início de um registro de log.
+
+    Formatos aceitos: JSON ({"ts": "AAAA-MM-DD HH:MM:SS,mmm", "nivel": "INFO", ...},
+    ver utils.logger.FormatadorJSON) e o texto das versões anteriores
+    ("AAAA-MM-DD HH:MM:SS,mmm - nome - NIVEL - mensagem").
+
+    Args:
+        linha: Linha do arquivo (bytes)
+
+    Returns:
+        Tupla (dia, nível) ou None se a linha continua o registro anterior
+        (por exemplo, um traceback)
+    """
+    if linha.startswith(PREFIXO_JSON):
+        dia = _dia(linha[len(PREFIXO_JSON):len(PREFIXO_JSON) + 10])
+        inicio = linha.find(PREFIXO_NIVEL_JSON)
+        if dia is None or inicio < 0:
+            return None
+        inicio += len(PREFIXO_NIVEL_JSON)
+        nivel = linha[inicio:linha.find(b'"', inicio)].decode('ascii', 'replace')
+    else:
+        dia = _dia(linha[:10])
+        if dia is None:
+            return None
+        partes = linha.split(b' - ', 3)
+        nivel = partes[2].decode('ascii', 'replace') if len(partes) > 2 else ''
+    return dia, nivel if nivel in NIVEIS_LOG else 'INFO'
+
+def formatar_registro(texto: str) -> str:
+    """
+    Converte um registro JSON em texto legível (registros em texto passam inalterados).
+
+    Args:
+        texto: Registro como lido do arquivo
+
+    Returns:
+        "data - logger - NIVEL - mensagem", seguido do traceback, se houver
+    """
+    if not texto.startswith(PREFIXO_JSON.decode()):
+        return texto
+    try:
+        dados = json.loads(texto)
+    except ValueError:
+        return texto
+    linha = f"{dados.get('ts')} - {dados.get('logger')} - {dados.get('nivel')} - {dados.get('msg')}"
+    if dados.get('suprimidos'):
+        linha += f" ({dados['suprimidos']} registros semelhantes suprimidos)"
+    if dados.get('exc'):
+        linha += f"\n{dados['exc']}"
+    return linha
+
+class IndiceLog:
+    """
+    Índice de um arquivo de log por dia e nível, com a posição em bytes de
+    cada registro.
+
+    O arquivo é lido uma única vez; a cada consulta só os bytes acrescentados
+    desde a última leitura são indexados. As páginas são lidas com seek, sem
+    carregar o arquivo inteiro. Se o arquivo for truncado ou substituído
+    (rotação), o índice é refeito. Arquivos .gz (dias já rotacionados) são
+    lidos pelas posições descompactadas.
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._limpar()
+
+    def _abrir(self):
+        """Abre o arquivo para leitura binária, descompactando se for .gz."""
+        if self.caminho.endswith('.gz'):
+            return gzip.open(self.caminho, 'rb')
+        return open(self.caminho, 'rb')
+
+    def _limpar(self):
+        """Descarta o índice."""
+        self._inode = None
+        self._posicao = 0
+        # Início de cada registro, em ordem
+        self._inicios = array('Q')
+        # Registros (posição em _inicios) por dia e por (dia, nível)
+        self._por_dia: Dict[date, array] = {}
+        self._por_nivel: Dict[Tuple[date, str], array] = {}
+
+    def atualizar(self):
+        """
+        Indexa os registros acrescentados ao arquivo desde a última leitura.
+        """
+        with self._lock:
+            if not os.path.exists(self.caminho):
+                self._limpar()
+                return
+
+            estado = os.stat(self.caminho)
+            compactado = self.caminho.endswith('.gz')
+            if estado.st_ino != self._inode or (not compactado and estado.st_size < self._posicao):
+                self._limpar()
+                self._inode = estado.st_ino
+            elif compactado or estado.st_size == self._posicao:
+                # Arquivos compactados não crescem: indexados uma única vez
+                return
+
+            with self._abrir() as arquivo:
+                arquivo.seek(self._posicao)
+                posicao = self._posicao
+                resto = b''
+                while True:
+                    bloco = arquivo.read(TAMANHO_BLOCO)
+                    if not bloco:
+                        break
+                    linhas = (resto + bloco).split(b'\n')
+                    # A última parte pode ser uma linha ainda incompleta
+                    resto = linhas.pop()
+                    for linha in linhas:
+                        self._indexar(linha, posicao)
+                        posicao += len(linha) + 1
+            self._posicao = posicao
+
+    def _indexar(self, linha: bytes, posicao: int):
+        """Registra o início de um registro, se a linha começar um."""
+        cabecalho = _interpretar(linha)
+        if cabecalho is None:
+            return
+        dia, nivel = cabecalho
+        numero = len(self._inicios)
+        self._inicios.append(posicao)
+        self._por_dia.setdefault(dia, array('I')).append(numero)
+        self._por_nivel.setdefault((dia, nivel), array('I')).append(numero)
+
+    def _registros(self, dia: date, nivel: Optional[str]) -> array:
+        """Posições dos registros de um dia, opcionalmente de um só nível."""
+        if nivel is None:
+            return self._por_dia.get(dia, array('I'))
+        return self._por_nivel.get((dia, nivel), array('I'))
+
+    def dias(self) -> List[date]:
+        """
+        Lista os dias presentes no log, do mais recente ao mais antigo.
+
+        Returns:
+            Lista de datas
+        """
+        self.atualizar()
+        return sorted(self._por_dia, reverse=True)
+
+    def contar(self, dia: date, nivel: Optional[str] = None) -> int:
+        """
+        Conta os registros de um dia.
+
+        Args:
+            dia: Data dos registros
+            nivel: Nível (None para todos)
+
+        Returns:
+            Quantidade de registros
+        """
+        self.atualizar()
+        return len(self._registros(dia, nivel))
+
+    def pagina(
+        self,
+        dia: date,
+        nivel: Optional[str] = None,
+        pagina: int = 0,
+        por_pagina: int = LOG_LINHAS_POR_PAGINA
+    ) -> List[str]:
+        """
+        Lê uma página de registros de um dia, dos mais recentes aos mais antigos.
+
+        Args:
+            dia: Data dos registros
+            nivel: Nível (None para todos)
+            pagina: Número da página, a partir de 0
+            por_pagina: Registros por página
+
+        Returns:
+            Textos dos registros (com linhas de continuação, como tracebacks)
+        """
+        self.atualizar()
+        with self._lock:
+            registros = self._registros(dia, nivel)
+            fim = len(registros) - pagina * por_pagina
+            selecionados = registros[max(fim - por_pagina, 0):max(fim, 0)]
+            trechos = []
+            for numero in selecionados:
+                inicio = self._inicios[numero]
+                termino = self._inicios[numero + 1] if numero + 1 < len(self._inicios) else self._posicao
+                trechos.append((inicio, termino))
+            limite = self._posicao
+
+        # Lê em ordem crescente: num .gz, voltar atrás descompacta desde o início
+        resultado = []
+        with self._abrir() as arquivo:
+            for inicio, termino in trechos:
+                arquivo.seek(inicio)
+                resultado.append(arquivo.read(min(termino, limite) - inicio).decode('utf-8', 'replace').rstrip('\n'))
+        resultado.reverse()
+        return resultado
+
+def arquivo_do_dia(caminho: str, dia: date) -> str:
+    """
+    Retorna o arquivo que contém os registros de um dia.
+
+    Args:
+        caminho: Arquivo de log atual (ex.: logs/app.log)
+        dia: Data desejada
+
+    Returns:
+        Arquivo rotacionado do dia (caminho.AAAA-MM-DD.gz), se existir, ou o atual
+    """
+    rotacionado = f"{caminho}.{dia.isoformat()}.gz"
+    return rotacionado if os.path.exists(rotacionado) else caminho
+
+def dias_disponiveis(caminho: str) -> List[date]:
+    """
+    Lista os dias com registros no arquivo atual e nos rotacionados.
+
+    Args:
+        caminho: Arquivo de log atual
+
+    Returns:
+        Datas, da mais recente à mais antiga
+    """
+    dias = set(get_indice_log(caminho).dias())
+    diretorio, nome = os.path.split(caminho)
+    if os.path.isdir(diretorio or '.'):
+        for arquivo in os.listdir(diretorio or '.'):
+            if arquivo.startswith(f"{nome}.") and arquivo.endswith('.gz'):
+                dia = _dia(arquivo[len(nome) + 1:len(nome) + 11].encode())
+                if dia is not None:
+                    dias.add(dia)
+    return sorted(dias, reverse=True)
+
+# Um índice por arquivo de log
+_indices: Dict[str, IndiceLog] = {}
+_indices_lock = threading.Lock()
+
+def get_indice_log(caminho: str) -> IndiceLog:
+    """
+    Obtém o índice compartilhado de um arquivo de log.
+
+    Args:
+        caminho: Caminho do arquivo de log
+
+    Returns:
+        Índice do arquivo, mantido entre as execuções da página
+    """
+    chave = os.path.abspath(caminho)
+    with _indices_lock:
+        indice = _indices.get(chave)
+        if indice is None:
+            indice = IndiceLog(caminho)
+            _indices[chave] = indice
+    return indice
@@ -1,50 +1,169 @@
+import atexit
+import copy
+import gzip
+import json
 import logging
 import os
-from datetime import datetime
-from utils.constants import DIR_LOGS
+import queue
+import shutil
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+from typing import Dict, Optional, Tuple
+from utils.constants import (
+    DIR_LOGS,
+    ARQUIVO_LOG,
+    NIVEL_LOG,
+    LOG_DIAS_RETENCAO,
+    LOG_LIMITE_POR_MINUTO
+)
 
-def setup_logger(name: str) -> logging.Logger:
+# Formato do console (o arquivo usa JSON)
+FORMATO_TEXTO = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+class FormatadorJSON(logging.Formatter):
     """
-    Configura e retorna um logger com as configurações padrão.
+    Formata cada registro como um objeto JSON em uma linha.
     
-    Args:
-        name: Nome do logger (geralmente __name__ do módulo)
+    As chaves ts e nivel vêm sempre primeiro, nessa ordem, para que o índice
+    da aba Logs leia dia e nível sem decodificar a linha inteira.
+    """
+    
+    def format(self, record: logging.LogRecord) -> str:
+        dados = {
+            'ts': self.formatTime(record),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'thread': record.threadName
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            dados['exc'] = record.exc_text
+        suprimidos = getattr(record, 'suprimidos', 0)
+        if suprimidos:
+            dados['suprimidos'] = suprimidos
+        return json.dumps(dados, ensure_ascii=False)
+
+class LimitadorTaxa(logging.Filter):
+    """
+    Limita registros repetidos da mesma linha de código (balde de fichas).
+    
+    Cada ponto de log abaixo de WARNING pode emitir até `limite` registros
+    por minuto; os excedentes são descartados antes de entrar na fila, e a
+    quantidade descartada é informada no próximo registro aceito.
+    """
+    
+    def __init__(self, limite: int = LOG_LIMITE_POR_MINUTO):
+        super().__init__()
+        self.limite = limite
+        self._baldes: Dict[Tuple[str, int], list] = {}
+        self._lock = threading.Lock()
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.limite <= 0:
+            return True
         
-    Returns:
-        Logger configurado
+        chave = (record.pathname, record.lineno)
+        agora = time.monotonic()
+        with self._lock:
+            # [fichas, último reabastecimento, descartados]
+            balde = self._baldes.setdefault(chave, [float(self.limite), agora, 0])
+            balde[0] = min(self.limite, balde[0] + (agora - balde[1]) * self.limite / 60)
+            balde[1] = agora
+            if balde[0] < 1:
+                balde[2] += 1
+                return False
+            balde[0] -= 1
+            if balde[2]:
+                record.suprimidos = balde[2]
+                balde[2] = 0
+        return True
+
+class ManipuladorFila(QueueHandler):
+    """
+    Envia os registros para a fila sem formatá-los.
+    
+    A mensagem e o traceback são resolvidos aqui, na thread que registrou o
+    log; a formatação e a escrita ficam para a thread do QueueListener.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class RotacaoDiaria(TimedRotatingFileHandler):
     """
-    # Cria o diretório de logs se não existir
-    if not os.path.exists(DIR_LOGS):
-        os.makedirs(DIR_LOGS)
+    Arquivo de log rotacionado à meia-noite; o dia encerrado é compactado
+    (app.log.AAAA-MM-DD.gz) e só os últimos `dias` arquivos são mantidos.
+    """
+    
+    def __init__(self, arquivo: str, dias: int = LOG_DIAS_RETENCAO):
+        super().__init__(arquivo, when='midnight', backupCount=dias, encoding='utf-8', delay=True)
+        self.namer = lambda nome: f"{nome}.gz"
+        self.rotator = self._compactar
+    
+    @staticmethod
+    def _compactar(origem: str, destino: str):
+        with open(origem, 'rb') as entrada, gzip.open(destino, 'wb') as saida:
+            shutil.copyfileobj(entrada, saida)
+        os.remove(origem)
+
+_listener: Optional[QueueListener] = None
+_listener_lock = threading.Lock()
+
+def configurar_logging() -> None:
+    """
+    Configura o logging da aplicação (apenas uma vez por processo).
+    
+    O logger raiz recebe um único handler que coloca os registros em uma
+    fila; uma thread (QueueListener) grava o arquivo JSON e o console, de
+    modo que as threads das requisições nunca esperam por disco.
+    """
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return
         
-    # Configura o logger
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    
-    # Evita duplicação de handlers
-    if not logger.handlers:
-        # Handler para arquivo
-        log_file = os.path.join(DIR_LOGS, f"{datetime.now().strftime('%Y-%m-%d')}.log")
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
-        file_handler.setLevel(logging.INFO)
+        os.makedirs(DIR_LOGS, exist_ok=True)
         
-        # Handler para console
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
+        arquivo = RotacaoDiaria(ARQUIVO_LOG)
+        arquivo.setFormatter(FormatadorJSON())
+        console = logging.StreamHandler()
+        console.setFormatter(logging.Formatter(FORMATO_TEXTO))
         
-        # Formato do log
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
+        fila = queue.SimpleQueue()
+        manipulador = ManipuladorFila(fila)
+        manipulador.addFilter(LimitadorTaxa())
         
-        file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
+        raiz = logging.getLogger()
+        for handler in raiz.handlers[:]:
+            raiz.removeHandler(handler)
+        raiz.addHandler(manipulador)
+        raiz.setLevel(NIVEL_LOG)
         
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+        _listener = QueueListener(fila, arquivo, console, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+def setup_logger(name: str) -> logging.Logger:
+    """
+    Configura e retorna um logger com as configurações padrão.
+    
+    Args:
+        name: Nome do logger (geralmente __name__ do módulo)
     
-    return logger
+    Returns:
+        Logger configurado
+    """
+    configurar_logging()
+    return logging.getLogger(name)
 
 def log_error(logger: logging.Logger, error: Exception, context: str = "") -> None:
     """
@@ -92,8 +211,8 @@ def get_logger(nome: str) -> logging.Logger:
     
     Args:
         nome: Nome do logger
-        
+    
     Returns:
         Logger configurado
     """
-    return logging.getLogger(nome) 
\ No newline at end of file
+    return logging.getLogger(nome)
\ No newline at end of file
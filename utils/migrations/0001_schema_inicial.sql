@@ -0,0 +1,70 @@
+-- Esquema inicial da aplicação
+
+-- Tabela de usuários
+CREATE TABLE IF NOT EXISTS usuarios (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome TEXT NOT NULL,
+    email TEXT NOT NULL UNIQUE,
+    senha TEXT NOT NULL,
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Tabela de condutores
+CREATE TABLE IF NOT EXISTS condutores (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome TEXT NOT NULL,
+    cnh TEXT NOT NULL UNIQUE,
+    categoria TEXT NOT NULL,
+    validade_cnh DATE NOT NULL,
+    telefone TEXT NOT NULL,
+    email TEXT NOT NULL,
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Tabela de veículos
+CREATE TABLE IF NOT EXISTS veiculos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    marca TEXT NOT NULL,
+    modelo TEXT NOT NULL,
+    ano INTEGER NOT NULL,
+    placa TEXT NOT NULL UNIQUE,
+    quilometragem INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'disponível',
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Tabela de registros
+CREATE TABLE IF NOT EXISTS registros (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    condutor_id INTEGER NOT NULL,
+    veiculo_id INTEGER NOT NULL,
+    data_saida TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    km_saida INTEGER NOT NULL,
+    checklist_saida TEXT NOT NULL,
+    observacoes_saida TEXT,
+    data_entrada TIMESTAMP,
+    km_entrada INTEGER,
+    checklist_entrada TEXT,
+    observacoes_entrada TEXT,
+    FOREIGN KEY (condutor_id) REFERENCES condutores(id),
+    FOREIGN KEY (veiculo_id) REFERENCES veiculos(id)
+);
+
+-- Triggers para atualização automática de data_atualizacao
+CREATE TRIGGER IF NOT EXISTS atualizar_condutor_data
+AFTER UPDATE ON condutores
+BEGIN
+    UPDATE condutores 
+    SET data_atualizacao = CURRENT_TIMESTAMP
+    WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS atualizar_veiculo_data
+AFTER UPDATE ON veiculos
+BEGIN
+    UPDATE veiculos 
+    SET data_atualizacao = CURRENT_TIMESTAMP
+    WHERE id = NEW.id;
+END;
@@ -0,0 +1,161 @@
+"""
+Converte as tabelas criadas pelo antigo utils.db.init_db para o esquema
+da aplicação e garante as colunas de arquivo (CNH e PDF de saída) que só
+existiam nesse esquema.
+"""
+import sqlite3
+from typing import List
+
+CONDUTORES_SQL = """
+CREATE TABLE condutores_novo (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome TEXT NOT NULL,
+    cnh TEXT NOT NULL UNIQUE,
+    categoria TEXT NOT NULL,
+    validade_cnh DATE NOT NULL,
+    telefone TEXT NOT NULL,
+    email TEXT NOT NULL,
+    cnh_arquivo TEXT,
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+VEICULOS_SQL = """
+CREATE TABLE veiculos_novo (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    marca TEXT NOT NULL,
+    modelo TEXT NOT NULL,
+    ano INTEGER NOT NULL,
+    placa TEXT NOT NULL UNIQUE,
+    quilometragem INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'disponível',
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+REGISTROS_SQL = """
+CREATE TABLE registros_novo (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    condutor_id INTEGER NOT NULL,
+    veiculo_id INTEGER NOT NULL,
+    data_saida TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    km_saida INTEGER NOT NULL,
+    checklist_saida TEXT NOT NULL,
+    observacoes_saida TEXT,
+    data_entrada TIMESTAMP,
+    km_entrada INTEGER,
+    checklist_entrada TEXT,
+    observacoes_entrada TEXT,
+    pdf_saida TEXT,
+    FOREIGN KEY (condutor_id) REFERENCES condutores(id),
+    FOREIGN KEY (veiculo_id) REFERENCES veiculos(id)
+)
+"""
+
+TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS atualizar_condutor_data
+    AFTER UPDATE ON condutores
+    BEGIN
+        UPDATE condutores
+        SET data_atualizacao = CURRENT_TIMESTAMP
+        WHERE id = NEW.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS atualizar_veiculo_data
+    AFTER UPDATE ON veiculos
+    BEGIN
+        UPDATE veiculos
+        SET data_atualizacao = CURRENT_TIMESTAMP
+        WHERE id = NEW.id;
+    END
+    """
+]
+
+def _colunas(conn: sqlite3.Connection, tabela: str) -> List[str]:
+    """
+    Lista as colunas de uma tabela.
+    
+    Args:
+        conn: Conexão com o banco de dados
+        tabela: Nome da tabela
+        
+    Returns:
+        Lista com os nomes das colunas
+    """
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({tabela})")]
+
+def _reconstruir(conn: sqlite3.Connection, tabela: str, ddl: str, mapeamento: dict) -> None:
+    """
+    Recria uma tabela com o novo DDL copiando os dados existentes.
+    
+    Args:
+        conn: Conexão com o banco de dados
+        tabela: Nome da tabela
+        ddl: CREATE TABLE da tabela temporária <tabela>_novo
+        mapeamento: Coluna de destino -> expressão sobre a tabela antiga
+    """
+    conn.execute(ddl)
+    destino = ", ".join(mapeamento.keys())
+    origem = ", ".join(mapeamento.values())
+    conn.execute(f"INSERT INTO {tabela}_novo ({destino}) SELECT {origem} FROM {tabela}")
+    conn.execute(f"DROP TABLE {tabela}")
+    conn.execute(f"ALTER TABLE {tabela}_novo RENAME TO {tabela}")
+
+def migrar(conn: sqlite3.Connection) -> None:
+    """
+    Aplica a migração.
+    
+    Args:
+        conn: Conexão com o banco de dados, já dentro de uma transação
+    """
+    colunas = _colunas(conn, 'condutores')
+    if 'cnh_numero' in colunas:
+        _reconstruir(conn, 'condutores', CONDUTORES_SQL, {
+            'id': 'id',
+            'nome': 'nome',
+            'cnh': 'cnh_numero',
+            'categoria': "''",
+            'validade_cnh': 'cnh_validade',
+            'telefone': 'telefone',
+            'email': "''",
+            'cnh_arquivo': 'cnh_arquivo'
+        })
+    elif 'cnh_arquivo' not in colunas:
+        conn.execute("ALTER TABLE condutores ADD COLUMN cnh_arquivo TEXT")
+        
+    if 'quilometragem_atual' in _colunas(conn, 'veiculos'):
+        _reconstruir(conn, 'veiculos', VEICULOS_SQL, {
+            'id': 'id',
+            'marca': 'marca',
+            'modelo': 'modelo',
+            'ano': '0',
+            'placa': 'placa',
+            'quilometragem': 'quilometragem_atual',
+            'status': 'status'
+        })
+        
+    colunas = _colunas(conn, 'registros')
+    if 'observacoes_saida' not in colunas:
+        _reconstruir(conn, 'registros', REGISTROS_SQL, {
+            'id': 'id',
+            'condutor_id': 'condutor_id',
+            'veiculo_id': 'veiculo_id',
+            'data_saida': 'data_saida',
+            'km_saida': 'km_saida',
+            'checklist_saida': 'checklist_saida',
+            'observacoes_saida': 'observacoes',
+            'data_entrada': 'data_entrada',
+            'km_entrada': 'km_entrada',
+            'checklist_entrada': 'checklist_entrada',
+            'pdf_saida': 'pdf_saida'
+        })
+    elif 'pdf_saida' not in colunas:
+        conn.execute("ALTER TABLE registros ADD COLUMN pdf_saida TEXT")
+        
+    # DROP TABLE remove os triggers da tabela antiga
+    for trigger in TRIGGERS_SQL:
+        conn.execute(trigger)
@@ -0,0 +1,23 @@
+-- Índices gerenciados pela aplicação
+
+-- Viagens em aberto: disponibilidade de veículos e condutores
+CREATE INDEX IF NOT EXISTS idx_registros_abertos_veiculo
+ON registros(veiculo_id) WHERE data_entrada IS NULL;
+CREATE INDEX IF NOT EXISTS idx_registros_abertos_condutor
+ON registros(condutor_id) WHERE data_entrada IS NULL;
+
+-- Histórico por veículo/condutor (exclusões, rankings)
+CREATE INDEX IF NOT EXISTS idx_registros_veiculo
+ON registros(veiculo_id, data_saida);
+CREATE INDEX IF NOT EXISTS idx_registros_condutor
+ON registros(condutor_id, data_saida);
+
+-- Cobre os filtros por período do dashboard e dos relatórios
+CREATE INDEX IF NOT EXISTS idx_registros_data_saida
+ON registros(data_saida, veiculo_id, km_saida, km_entrada);
+CREATE INDEX IF NOT EXISTS idx_veiculos_status
+ON veiculos(status);
+CREATE INDEX IF NOT EXISTS idx_veiculos_marca_modelo
+ON veiculos(marca, modelo);
+CREATE INDEX IF NOT EXISTS idx_condutores_nome
+ON condutores(nome);
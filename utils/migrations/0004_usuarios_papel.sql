@@ -0,0 +1,12 @@
+-- Papel (perfil de acesso) dos usuários
+
+ALTER TABLE usuarios ADD COLUMN papel TEXT NOT NULL DEFAULT 'usuario';
+
+-- Visão usada por auth/login.py, que espera a tabela users
+CREATE VIEW IF NOT EXISTS users AS
+SELECT
+    id,
+    email AS username,
+    senha AS password,
+    papel AS role
+FROM usuarios;
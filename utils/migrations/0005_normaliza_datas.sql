@@ -0,0 +1,10 @@
+-- Normaliza os timestamps de registros para 'YYYY-MM-DD HH:MM:SS'
+-- (a entrada gravava objetos datetime, com microssegundos)
+
+UPDATE registros
+SET data_saida = substr(replace(data_saida, 'T', ' '), 1, 19)
+WHERE length(data_saida) > 19 OR instr(data_saida, 'T') > 0;
+
+UPDATE registros
+SET data_entrada = substr(replace(data_entrada, 'T', ' '), 1, 19)
+WHERE length(data_entrada) > 19 OR instr(data_entrada, 'T') > 0;
@@ -0,0 +1,100 @@
+-- Consolidação diária de uso por veículo e condutor
+--
+-- Cada viagem é atribuída ao dia da saída. km e horas_uso só passam a
+-- contar quando a entrada é registrada.
+
+CREATE TABLE IF NOT EXISTS uso_diario (
+    dia TEXT NOT NULL,
+    veiculo_id INTEGER NOT NULL,
+    condutor_id INTEGER NOT NULL,
+    viagens INTEGER NOT NULL DEFAULT 0,
+    km INTEGER NOT NULL DEFAULT 0,
+    horas_uso REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (dia, veiculo_id, condutor_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_uso_diario_veiculo ON uso_diario(veiculo_id, dia);
+CREATE INDEX IF NOT EXISTS idx_uso_diario_condutor ON uso_diario(condutor_id, dia);
+
+CREATE TRIGGER IF NOT EXISTS uso_diario_registro_inserido
+AFTER INSERT ON registros
+BEGIN
+    INSERT INTO uso_diario (dia, veiculo_id, condutor_id, viagens, km, horas_uso)
+    VALUES (
+        substr(NEW.data_saida, 1, 10),
+        NEW.veiculo_id,
+        NEW.condutor_id,
+        1,
+        COALESCE(NEW.km_entrada - NEW.km_saida, 0),
+        COALESCE((julianday(NEW.data_entrada) - julianday(NEW.data_saida)) * 24, 0)
+    )
+    ON CONFLICT (dia, veiculo_id, condutor_id) DO UPDATE SET
+        viagens = viagens + excluded.viagens,
+        km = km + excluded.km,
+        horas_uso = horas_uso + excluded.horas_uso;
+END;
+
+CREATE TRIGGER IF NOT EXISTS uso_diario_registro_atualizado
+AFTER UPDATE OF data_saida, data_entrada, km_saida, km_entrada, veiculo_id, condutor_id
+ON registros
+BEGIN
+    UPDATE uso_diario SET
+        viagens = viagens - 1,
+        km = km - COALESCE(OLD.km_entrada - OLD.km_saida, 0),
+        horas_uso = horas_uso - COALESCE((julianday(OLD.data_entrada) - julianday(OLD.data_saida)) * 24, 0)
+    WHERE dia = substr(OLD.data_saida, 1, 10)
+    AND veiculo_id = OLD.veiculo_id
+    AND condutor_id = OLD.condutor_id;
+    
+    DELETE FROM uso_diario
+    WHERE dia = substr(OLD.data_saida, 1, 10)
+    AND veiculo_id = OLD.veiculo_id
+    AND condutor_id = OLD.condutor_id
+    AND viagens <= 0;
+    
+    INSERT INTO uso_diario (dia, veiculo_id, condutor_id, viagens, km, horas_uso)
+    VALUES (
+        substr(NEW.data_saida, 1, 10),
+        NEW.veiculo_id,
+        NEW.condutor_id,
+        1,
+        COALESCE(NEW.km_entrada - NEW.km_saida, 0),
+        COALESCE((julianday(NEW.data_entrada) - julianday(NEW.data_saida)) * 24, 0)
+    )
+    ON CONFLICT (dia, veiculo_id, condutor_id) DO UPDATE SET
+        viagens = viagens + excluded.viagens,
+        km = km + excluded.km,
+        horas_uso = horas_uso + excluded.horas_uso;
+END;
+
+CREATE TRIGGER IF NOT EXISTS uso_diario_registro_excluido
+AFTER DELETE ON registros
+BEGIN
+    UPDATE uso_diario SET
+        viagens = viagens - 1,
+        km = km - COALESCE(OLD.km_entrada - OLD.km_saida, 0),
+        horas_uso = horas_uso - COALESCE((julianday(OLD.data_entrada) - julianday(OLD.data_saida)) * 24, 0)
+    WHERE dia = substr(OLD.data_saida, 1, 10)
+    AND veiculo_id = OLD.veiculo_id
+    AND condutor_id = OLD.condutor_id;
+    
+    DELETE FROM uso_diario
+    WHERE dia = substr(OLD.data_saida, 1, 10)
+    AND veiculo_id = OLD.veiculo_id
+    AND condutor_id = OLD.condutor_id
+    AND viagens <= 0;
+END;
+
+-- Carga inicial a partir do histórico existente
+DELETE FROM uso_diario;
+
+INSERT INTO uso_diario (dia, veiculo_id, condutor_id, viagens, km, horas_uso)
+SELECT
+    substr(data_saida, 1, 10),
+    veiculo_id,
+    condutor_id,
+    COUNT(*),
+    SUM(COALESCE(km_entrada - km_saida, 0)),
+    SUM(COALESCE((julianday(data_entrada) - julianday(data_saida)) * 24, 0))
+FROM registros
+GROUP BY substr(data_saida, 1, 10), veiculo_id, condutor_id;
@@ -0,0 +1,18 @@
+-- Padroniza veiculos.status com as constantes VEICULO_* e o sincroniza
+-- com as viagens em aberto
+
+UPDATE veiculos SET status = 'disponivel' WHERE status IN ('disponível', 'Disponível');
+UPDATE veiculos SET status = 'em_uso' WHERE status IN ('em uso', 'Em uso', 'em_uso');
+
+UPDATE veiculos SET status = 'em_uso'
+WHERE EXISTS (
+    SELECT 1 FROM registros r
+    WHERE r.veiculo_id = veiculos.id AND r.data_entrada IS NULL
+);
+
+UPDATE veiculos SET status = 'disponivel'
+WHERE status = 'em_uso'
+AND NOT EXISTS (
+    SELECT 1 FROM registros r
+    WHERE r.veiculo_id = veiculos.id AND r.data_entrada IS NULL
+);
@@ -0,0 +1,22 @@
+-- Fila persistente de geração de PDFs (comprovantes de saída/entrada)
+
+CREATE TABLE IF NOT EXISTS fila_pdfs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tipo TEXT NOT NULL CHECK (tipo IN ('saida', 'entrada')),
+    registro_id INTEGER,
+    dados TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pendente'
+        CHECK (status IN ('pendente', 'processando', 'concluido', 'erro')),
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    caminho TEXT,
+    erro TEXT,
+    criado_em TIMESTAMP NOT NULL,
+    atualizado_em TIMESTAMP NOT NULL,
+    FOREIGN KEY (registro_id) REFERENCES registros(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_fila_pdfs_pendentes
+ON fila_pdfs(id) WHERE status = 'pendente';
+
+CREATE INDEX IF NOT EXISTS idx_fila_pdfs_registro
+ON fila_pdfs(registro_id);
@@ -0,0 +1,15 @@
+-- Armazenamento de arquivos por conteúdo (SHA-256), em diretórios particionados
+
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    tamanho INTEGER NOT NULL,
+    tipo_conteudo TEXT,
+    nome_original TEXT,
+    criado_em TIMESTAMP NOT NULL
+) WITHOUT ROWID;
+
+-- Comprovantes e documentos vinculados aos seus arquivos
+ALTER TABLE registros ADD COLUMN pdf_saida_blob TEXT REFERENCES blobs(hash);
+ALTER TABLE registros ADD COLUMN pdf_entrada_blob TEXT REFERENCES blobs(hash);
+ALTER TABLE condutores ADD COLUMN cnh_blob TEXT REFERENCES blobs(hash);
+ALTER TABLE fila_pdfs ADD COLUMN blob TEXT REFERENCES blobs(hash);
@@ -0,0 +1,20 @@
+-- Geração agendada de relatórios
+
+CREATE TABLE IF NOT EXISTS agendamentos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tipo TEXT NOT NULL UNIQUE CHECK (tipo IN ('diario', 'semanal', 'mensal')),
+    expressao TEXT NOT NULL,              -- cron: minuto hora dia mês dia_da_semana
+    ativo INTEGER NOT NULL DEFAULT 1,
+    proxima_execucao TIMESTAMP,
+    ultima_execucao TIMESTAMP,
+    assinatura TEXT,                      -- assinatura dos dados do último relatório gerado
+    ultimo_blob TEXT REFERENCES blobs(hash),
+    gerado_em TIMESTAMP,
+    ultimo_erro TEXT
+);
+
+-- Horários fora do expediente
+INSERT OR IGNORE INTO agendamentos (tipo, expressao) VALUES
+    ('diario', '0 2 * * *'),
+    ('semanal', '30 2 * * 1'),
+    ('mensal', '0 3 1 * *');
@@ -0,0 +1,23 @@
+-- Trilha de auditoria consultável (quem fez o quê, sobre qual registro e quando)
+
+CREATE TABLE IF NOT EXISTS auditoria (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    momento TIMESTAMP NOT NULL,
+    usuario_id INTEGER,
+    acao TEXT NOT NULL,
+    entidade TEXT,                        -- ex.: 'veiculo', 'registro'
+    entidade_id INTEGER,
+    detalhes TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_auditoria_usuario
+ON auditoria(usuario_id, momento);
+
+CREATE INDEX IF NOT EXISTS idx_auditoria_acao
+ON auditoria(acao, momento);
+
+CREATE INDEX IF NOT EXISTS idx_auditoria_momento
+ON auditoria(momento);
+
+CREATE INDEX IF NOT EXISTS idx_auditoria_entidade
+ON auditoria(entidade, entidade_id, momento);
@@ -0,0 +1,4 @@
+-- Trabalhos de PDF em processamento, para retomar os que excederam o tempo limite
+
+CREATE INDEX IF NOT EXISTS idx_fila_pdfs_processando
+ON fila_pdfs(atualizado_em) WHERE status = 'processando';
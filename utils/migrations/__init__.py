@@ -0,0 +1,192 @@
+"""
+Migrações versionadas do banco de dados.
+
+Cada arquivo NNNN_descricao.sql ou NNNN_descricao.py deste diretório é
+uma migração, aplicada em ordem numérica dentro de uma transação e
+registrada na tabela schema_version. Migrações em Python devem definir
+migrar(conn).
+"""
+import os
+import re
+import sqlite3
+import logging
+import threading
+import importlib.util
+from typing import List, Tuple
+from utils.database import aplicar_pragmas
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO_MIGRACOES = os.path.dirname(os.path.abspath(__file__))
+PADRAO_ARQUIVO = re.compile(r'^(\d{4})_(\w+)\.(sql|py)$')
+
+SCHEMA_VERSION_SQL = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    versao INTEGER PRIMARY KEY,
+    nome TEXT NOT NULL,
+    aplicada_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+# Bancos já migrados neste processo
+_bancos_atualizados = set()
+_lock = threading.Lock()
+
+def listar_migracoes() -> List[Tuple[int, str, str]]:
+    """
+    Lista as migrações disponíveis em ordem de versão.
+    
+    Returns:
+        Lista de tuplas (versão, nome, caminho do arquivo)
+        
+    Raises:
+        ValueError: Se duas migrações tiverem a mesma versão
+    """
+    migracoes = []
+    for arquivo in os.listdir(DIRETORIO_MIGRACOES):
+        match = PADRAO_ARQUIVO.match(arquivo)
+        if match:
+            migracoes.append((
+                int(match.group(1)),
+                match.group(2),
+                os.path.join(DIRETORIO_MIGRACOES, arquivo)
+            ))
+            
+    migracoes.sort()
+    versoes = [versao for versao, _, _ in migracoes]
+    if len(versoes) != len(set(versoes)):
+        raise ValueError("Existem migrações com a mesma versão")
+        
+    return migracoes
+
+def versao_atual(conn: sqlite3.Connection) -> int:
+    """
+    Retorna a versão do esquema registrada no banco.
+    
+    Args:
+        conn: Conexão com o banco de dados
+        
+    Returns:
+        Última versão aplicada (0 se nenhuma)
+    """
+    existe = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+    ).fetchone()
+    if not existe:
+        return 0
+    return conn.execute("SELECT COALESCE(MAX(versao), 0) FROM schema_version").fetchone()[0]
+
+def dividir_sql(sql: str) -> List[str]:
+    """
+    Divide um script SQL em comandos individuais.
+    
+    Args:
+        sql: Script com um ou mais comandos terminados por ponto e vírgula
+        
+    Returns:
+        Lista de comandos, preservando blocos BEGIN...END de triggers
+    """
+    comandos = []
+    atual = ""
+    for linha in sql.splitlines(keepends=True):
+        atual += linha
+        if sqlite3.complete_statement(atual):
+            comandos.append(atual.strip())
+            atual = ""
+            
+    # Sobra sem ponto e vírgula final (comentários são descartados)
+    restante = "\n".join(
+        l for l in atual.splitlines() if not l.strip().startswith('--')
+    ).strip()
+    if restante:
+        comandos.append(restante)
+    return comandos
+
+def _executar_migracao(conn: sqlite3.Connection, versao: int, nome: str, caminho: str) -> bool:
+    """
+    Aplica uma migração e registra sua versão na mesma transação.
+    
+    Args:
+        conn: Conexão em modo autocommit
+        versao: Versão da migração
+        nome: Nome da migração
+        caminho: Caminho do arquivo da migração
+        
+    Returns:
+        True se a migração foi aplicada, False se outro processo já a aplicou
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    if versao <= versao_atual(conn):
+        conn.execute("ROLLBACK")
+        return False
+        
+    if caminho.endswith('.sql'):
+        with open(caminho, 'r', encoding='utf-8') as f:
+            for comando in dividir_sql(f.read()):
+                conn.execute(comando)
+    else:
+        spec = importlib.util.spec_from_file_location(f"migracao_{versao:04d}", caminho)
+        modulo = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(modulo)
+        modulo.migrar(conn)
+        
+    conn.execute(
+        "INSERT INTO schema_version (versao, nome) VALUES (?, ?)",
+        (versao, nome)
+    )
+    conn.execute("COMMIT")
+    return True
+
+def aplicar_migracoes(db_path: str) -> int:
+    """
+    Leva o banco até a última versão do esquema.
+    
+    Executa no máximo uma vez por processo para cada banco; as chamadas
+    seguintes retornam imediatamente.
+    
+    Args:
+        db_path: Caminho do arquivo do banco de dados
+        
+    Returns:
+        Quantidade de migrações aplicadas
+        
+    Raises:
+        Exception: Se alguma migração falhar
+    """
+    if db_path in _bancos_atualizados:
+        return 0
+        
+    with _lock:
+        if db_path in _bancos_atualizados:
+            return 0
+            
+        migracoes = listar_migracoes()
+        ultima = migracoes[-1][0] if migracoes else 0
+        aplicadas = 0
+        
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        try:
+            aplicar_pragmas(conn)
+            
+            if versao_atual(conn) < ultima:
+                conn.execute(SCHEMA_VERSION_SQL)
+                for versao, nome, caminho in migracoes:
+                    try:
+                        if not _executar_migracao(conn, versao, nome, caminho):
+                            continue
+                    except Exception as e:
+                        if conn.in_transaction:
+                            conn.execute("ROLLBACK")
+                        logger.error(f"Erro na migração {versao:04d}_{nome}: {str(e)}")
+                        raise
+                        
+                    aplicadas += 1
+                    logger.info(f"Migração {versao:04d}_{nome} aplicada")
+                    
+                # Atualiza as estatísticas usadas pelo planejador de consultas
+                conn.execute("PRAGMA optimize")
+        finally:
+            conn.close()
+            
+        _bancos_atualizados.add(db_path)
+        return aplicadas
@@ -0,0 +1,177 @@
+import copy
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from fpdf import FPDF
+
+# Quantidade máxima de modelos mantidos em memória por processo
+MAX_MODELOS = 64
+
+FONTE = "Arial"
+
+class DocumentoPDF(FPDF):
+    """
+    FPDF com data de criação fixa.
+
+    Com data_criacao definida, o mesmo conteúdo gera sempre os mesmos bytes,
+    o que permite deduplicar arquivos regerados.
+    """
+
+    data_criacao: Optional[datetime] = None
+
+    def _putinfo(self):
+        inicio = len(self.buffer)
+        super()._putinfo()
+        if self.data_criacao is not None:
+            info, _, _ = self.buffer[inicio:].rpartition('/CreationDate ')
+            self.buffer = (
+                self.buffer[:inicio] + info + '/CreationDate '
+                + self._textstring('D:' + self.data_criacao.strftime('%Y%m%d%H%M%S')) + '\n'
+            )
+
+class ModeloPDF:
+    """
+    Página com a parte estática de um documento já diagramada.
+
+    Títulos, seções e rótulos são escritos uma única vez na montagem; cada
+    documento parte de uma cópia do modelo e recebe apenas os valores dos
+    campos, nas posições registradas durante a montagem.
+    """
+
+    def __init__(self):
+        self._pdf = DocumentoPDF()
+        self._pdf.add_page()
+        # nome do campo -> (página, início do operador de texto já posicionado)
+        self._campos: Dict[str, Tuple[int, str]] = {}
+        self._fonte_campos = ""
+        
+    def titulo(self, texto: str, tamanho: int = 16):
+        """
+        Escreve o título centralizado.
+
+        Args:
+            texto: Texto do título
+            tamanho: Tamanho da fonte
+        """
+        self._pdf.set_font(FONTE, "B", tamanho)
+        self._pdf.cell(0, 10, texto, ln=True, align="C")
+
+    def secao(self, texto: str):
+        """
+        Escreve o cabeçalho de uma seção.
+
+        Args:
+            texto: Texto do cabeçalho
+        """
+        self._pdf.set_font(FONTE, "B", 12)
+        self._pdf.cell(0, 10, texto, ln=True)
+
+    def campo(self, nome: str, rotulo: str):
+        """
+        Escreve o rótulo de um campo e reserva a posição do valor.
+
+        Args:
+            nome: Nome usado para preencher o campo
+            rotulo: Texto fixo exibido antes do valor (ex.: "Placa: ")
+        """
+        pdf = self._pdf
+        pdf.set_font(FONTE, "", 12)
+        # Quebra a página antes de registrar a posição, como cell() faria
+        if pdf.y + 10 > pdf.page_break_trigger:
+            pdf.add_page()
+        # Mesmo posicionamento que cell(0, 10, valor) usaria após o rótulo
+        x = pdf.l_margin + pdf.get_string_width(rotulo) + pdf.c_margin
+        y = pdf.y + 5 + 0.3 * pdf.font_size
+        self._fonte_campos = "BT /F%d %.2f Tf ET\n" % (pdf.current_font['i'], pdf.font_size_pt)
+        self._campos[nome] = (
+            pdf.page,
+            "BT %.2f %.2f Td (" % (x * pdf.k, (pdf.h - y) * pdf.k)
+        )
+        pdf.cell(0, 10, rotulo, ln=True)
+
+    def espaco(self, altura: float):
+        """
+        Avança verticalmente.
+
+        Args:
+            altura: Espaço em milímetros
+        """
+        self._pdf.ln(altura)
+
+    def preencher(self, valores: Dict[str, Any]) -> DocumentoPDF:
+        """
+        Cria um documento a partir do modelo com os valores informados.
+
+        Os valores são anexados diretamente ao conteúdo das páginas com os
+        operadores pré-calculados na montagem. O documento retornado fica
+        posicionado logo após o conteúdo do modelo, pronto para receber
+        conteúdo variável (observações, tabelas).
+
+        Args:
+            valores: Valores dos campos, por nome
+
+        Returns:
+            Documento independente do modelo
+        """
+        pdf = copy.copy(self._pdf)
+        for atributo, valor in vars(self._pdf).items():
+            if isinstance(valor, (dict, list)):
+                setattr(pdf, atributo, copy.copy(valor))
+
+        # Seleção de fonte declarada uma vez por página preenchida
+        trechos: Dict[int, list] = {}
+        for nome, valor in valores.items():
+            pagina, operador = self._campos[nome]
+            trechos.setdefault(pagina, [self._fonte_campos]).append(
+                operador + _escapar(str(valor)) + ") Tj ET\n"
+            )
+        for pagina, linhas in trechos.items():
+            pdf.pages[pagina] += "".join(linhas)
+
+        # Restaura a fonte corrente ao final da última página
+        pdf.font_family = ""
+        pdf.set_font(FONTE, "", 12)
+        return pdf
+
+def _escapar(texto: str) -> str:
+    """
+    Escapa um texto para uso em um operador de texto do PDF.
+
+    Args:
+        texto: Texto a escapar
+
+    Returns:
+        Texto com \\, ( e ) escapados
+    """
+    return texto.replace('\\', '\\\\').replace(')', '\\)').replace('(', '\\(').replace('\r', '\\r')
+
+_modelos: "OrderedDict[Hashable, ModeloPDF]" = OrderedDict()
+_modelos_lock = threading.Lock()
+
+def obter_modelo(chave: Hashable, montar: Callable[[ModeloPDF], None]) -> ModeloPDF:
+    """
+    Obtém um modelo do cache do processo, montando-o na primeira vez.
+
+    Args:
+        chave: Identifica o layout (ex.: tipo do documento e itens do checklist)
+        montar: Função que diagrama a parte estática no modelo
+
+    Returns:
+        Modelo pronto para preenchimento
+    """
+    with _modelos_lock:
+        modelo = _modelos.get(chave)
+        if modelo is not None:
+            _modelos.move_to_end(chave)
+            return modelo
+
+    modelo = ModeloPDF()
+    montar(modelo)
+
+    with _modelos_lock:
+        _modelos[chave] = modelo
+        _modelos.move_to_end(chave)
+        while len(_modelos) > MAX_MODELOS:
+            _modelos.popitem(last=False)
+    return modelo
@@ -1,13 +1,19 @@
 import os
 from datetime import datetime
-from fpdf import FPDF
+from utils.modelo_pdf import ModeloPDF, obter_modelo
 from utils.constants import (
     DIRETORIO_PDFS,
     ERRO_GERACAO_PDF,
     ERRO_SALVAMENTO_PDF,
-    ERRO_CRIACAO_DIRETORIO
+    ERRO_CRIACAO_DIRETORIO,
+    FORMATO_DATA_HORA_DB
 )
 
+TITULOS_COMPROVANTE = {
+    'saida': "Registro de Saída de Veículo",
+    'entrada': "Registro de Entrada de Veículo"
+}
+
 class PDFGenerator:
     def __init__(self):
         self._criar_diretorio_pdfs()
@@ -20,71 +26,162 @@ class PDFGenerator:
             Exception: Se não conseguir criar o diretório
         """
         try:
-            if not os.path.exists(DIRETORIO_PDFS):
-                os.makedirs(DIRETORIO_PDFS)
+            os.makedirs(DIRETORIO_PDFS, exist_ok=True)
         except Exception as e:
             raise Exception(f"{ERRO_CRIACAO_DIRETORIO}: {str(e)}")
             
-    def gerar_pdf_saida(self, dados: dict) -> str:
+    def _data_hora(self, dados: dict) -> datetime:
         """
-        Gera um PDF com os dados da saída do veículo.
+        Obtém a data/hora do registro a partir dos dados do PDF.
         
         Args:
-            dados: Dicionário com os dados da saída
+            dados: Dicionário com os dados do registro
             
         Returns:
-            Caminho do arquivo PDF gerado
+            Data/hora informada em 'data_hora' ou o momento atual
+        """
+        data_hora = dados.get('data_hora')
+        if not data_hora:
+            return datetime.now()
+        if isinstance(data_hora, str):
+            return datetime.strptime(data_hora[:19], FORMATO_DATA_HORA_DB)
+        return data_hora
+        
+    def _montar_modelo(self, titulo: str, com_condutor: bool, itens: tuple):
+        """
+        Retorna a função que diagrama a parte estática de um comprovante.
+        
+        Args:
+            titulo: Título do comprovante
+            com_condutor: Se inclui a seção de dados do condutor
+            itens: Itens do checklist, na ordem de exibição
             
-        Raises:
-            Exception: Se houver erro na geração do PDF
+        Returns:
+            Função de montagem para obter_modelo()
         """
-        try:
-            pdf = FPDF()
-            pdf.add_page()
+        def montar(modelo: ModeloPDF):
+            modelo.titulo(titulo)
             
-            # Configurações
-            pdf.set_font("Arial", "B", 16)
-            pdf.cell(0, 10, "Registro de Saída de Veículo", ln=True, align="C")
+            if com_condutor:
+                modelo.secao("Dados do Condutor")
+                modelo.campo("condutor_nome", "Nome: ")
+                modelo.campo("condutor_cnh", "CNH: ")
+                
+            modelo.secao("Dados do Veículo")
+            modelo.campo("veiculo_placa", "Placa: ")
+            modelo.campo("veiculo_modelo", "Modelo: ")
+            modelo.campo("quilometragem", "Quilometragem: ")
+            modelo.campo("data_hora", "Data/Hora: ")
+            
+            modelo.secao("Checklist")
+            for i, item in enumerate(itens):
+                modelo.campo(f"checklist_{i}", f"{item}: ")
+                
+        return montar
+        
+    def _montar_comprovante(self, tipo: str, dados: dict):
+        """
+        Monta um comprovante a partir do modelo em cache do seu layout.
+        
+        Args:
+            tipo: 'saida' ou 'entrada'
+            dados: Dicionário com os dados do registro
             
-            # Dados do condutor
+        Returns:
+            Documento FPDF pronto para saída
+        """
+        com_condutor = tipo == 'saida'
+        itens = tuple(dados['checklist'].keys())
+        modelo = obter_modelo(
+            (tipo, itens),
+            self._montar_modelo(TITULOS_COMPROVANTE[tipo], com_condutor, itens)
+        )
+        
+        # Data e hora do registro (o PDF pode ser gerado depois)
+        data_hora = self._data_hora(dados)
+        valores = {}
+        if com_condutor:
+            valores['condutor_nome'] = dados['condutor_nome']
+            valores['condutor_cnh'] = dados['condutor_cnh']
+        valores['veiculo_placa'] = dados['veiculo_placa']
+        valores['veiculo_modelo'] = dados['veiculo_modelo']
+        valores['quilometragem'] = dados['quilometragem']
+        valores['data_hora'] = data_hora.strftime('%d/%m/%Y %H:%M:%S')
+        for i, status in enumerate(dados['checklist'].values()):
+            valores[f"checklist_{i}"] = 'OK' if status else 'NOK'
+            
+        pdf = modelo.preencher(valores)
+        # Mesmos dados, mesmos bytes: permite deduplicar comprovantes regerados
+        pdf.data_criacao = data_hora
+        
+        # Observações
+        if dados.get('observacoes'):
             pdf.set_font("Arial", "B", 12)
-            pdf.cell(0, 10, "Dados do Condutor", ln=True)
+            pdf.cell(0, 10, "Observações", ln=True)
             pdf.set_font("Arial", "", 12)
-            pdf.cell(0, 10, f"Nome: {dados['condutor_nome']}", ln=True)
-            pdf.cell(0, 10, f"CNH: {dados['condutor_cnh']}", ln=True)
+            pdf.multi_cell(0, 10, dados['observacoes'])
             
-            # Dados do veículo
-            pdf.set_font("Arial", "B", 12)
-            pdf.cell(0, 10, "Dados do Veículo", ln=True)
-            pdf.set_font("Arial", "", 12)
-            pdf.cell(0, 10, f"Placa: {dados['veiculo_placa']}", ln=True)
-            pdf.cell(0, 10, f"Modelo: {dados['veiculo_modelo']}", ln=True)
-            pdf.cell(0, 10, f"Quilometragem: {dados['quilometragem']}", ln=True)
+        return pdf
+        
+    def nome_comprovante(self, tipo: str, dados: dict) -> str:
+        """
+        Monta o nome de arquivo de um comprovante.
+        
+        Args:
+            tipo: 'saida' ou 'entrada'
+            dados: Dicionário com os dados do registro
             
-            # Data e hora
-            pdf.cell(0, 10, f"Data/Hora: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}", ln=True)
+        Returns:
+            Nome no formato {tipo}_{placa}_{AAAAMMDD_HHMMSS}.pdf
+        """
+        data_hora = self._data_hora(dados)
+        return f"{tipo}_{dados['veiculo_placa']}_{data_hora.strftime('%Y%m%d_%H%M%S')}.pdf"
+        
+    def gerar_bytes(self, tipo: str, dados: dict) -> bytes:
+        """
+        Gera um comprovante em memória, sem gravar arquivo.
+        
+        Args:
+            tipo: 'saida' ou 'entrada'
+            dados: Dicionário com os dados do registro
             
-            # Checklist
-            pdf.set_font("Arial", "B", 12)
-            pdf.cell(0, 10, "Checklist", ln=True)
-            pdf.set_font("Arial", "", 12)
-            for item, status in dados['checklist'].items():
-                pdf.cell(0, 10, f"{item}: {'OK' if status else 'NOK'}", ln=True)
-                
-            # Observações
-            if dados.get('observacoes'):
-                pdf.set_font("Arial", "B", 12)
-                pdf.cell(0, 10, "Observações", ln=True)
-                pdf.set_font("Arial", "", 12)
-                pdf.multi_cell(0, 10, dados['observacoes'])
-                
-            # Salva o PDF
-            nome_arquivo = f"saida_{dados['veiculo_placa']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-            caminho_arquivo = os.path.join(DIRETORIO_PDFS, nome_arquivo)
-            pdf.output(caminho_arquivo)
+        Returns:
+            Conteúdo do PDF
+        """
+        return self._montar_comprovante(tipo, dados).output(dest='S').encode('latin-1')
+        
+    def _gerar_comprovante(self, tipo: str, dados: dict) -> str:
+        """
+        Gera um comprovante e grava em DIRETORIO_PDFS.
+        
+        Args:
+            tipo: 'saida' ou 'entrada'
+            dados: Dicionário com os dados do registro
+            
+        Returns:
+            Caminho do arquivo PDF gerado
+        """
+        pdf = self._montar_comprovante(tipo, dados)
+        caminho_arquivo = os.path.join(DIRETORIO_PDFS, self.nome_comprovante(tipo, dados))
+        pdf.output(caminho_arquivo)
+        
+        return caminho_arquivo
+        
+    def gerar_pdf_saida(self, dados: dict) -> str:
+        """
+        Gera um PDF com os dados da saída do veículo.
+        
+        Args:
+            dados: Dicionário com os dados da saída
             
-            return caminho_arquivo
+        Returns:
+            Caminho do arquivo PDF gerado
             
+        Raises:
+            Exception: Se houver erro na geração do PDF
+        """
+        try:
+            return self._gerar_comprovante('saida', dados)
         except Exception as e:
             raise Exception(f"{ERRO_GERACAO_PDF}: {str(e)}")
             
@@ -102,44 +199,6 @@ class PDFGenerator:
             Exception: Se houver erro na geração do PDF
         """
         try:
-            pdf = FPDF()
-            pdf.add_page()
-            
-            # Configurações
-            pdf.set_font("Arial", "B", 16)
-            pdf.cell(0, 10, "Registro de Entrada de Veículo", ln=True, align="C")
-            
-            # Dados do veículo
-            pdf.set_font("Arial", "B", 12)
-            pdf.cell(0, 10, "Dados do Veículo", ln=True)
-            pdf.set_font("Arial", "", 12)
-            pdf.cell(0, 10, f"Placa: {dados['veiculo_placa']}", ln=True)
-            pdf.cell(0, 10, f"Modelo: {dados['veiculo_modelo']}", ln=True)
-            pdf.cell(0, 10, f"Quilometragem: {dados['quilometragem']}", ln=True)
-            
-            # Data e hora
-            pdf.cell(0, 10, f"Data/Hora: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}", ln=True)
-            
-            # Checklist
-            pdf.set_font("Arial", "B", 12)
-            pdf.cell(0, 10, "Checklist", ln=True)
-            pdf.set_font("Arial", "", 12)
-            for item, status in dados['checklist'].items():
-                pdf.cell(0, 10, f"{item}: {'OK' if status else 'NOK'}", ln=True)
-                
-            # Observações
-            if dados.get('observacoes'):
-                pdf.set_font("Arial", "B", 12)
-                pdf.cell(0, 10, "Observações", ln=True)
-                pdf.set_font("Arial", "", 12)
-                pdf.multi_cell(0, 10, dados['observacoes'])
-                
-            # Salva o PDF
-            nome_arquivo = f"entrada_{dados['veiculo_placa']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-            caminho_arquivo = os.path.join(DIRETORIO_PDFS, nome_arquivo)
-            pdf.output(caminho_arquivo)
-            
-            return caminho_arquivo
-            
+            return self._gerar_comprovante('entrada', dados)
         except Exception as e:
-            raise Exception(f"{ERRO_GERACAO_PDF}: {str(e)}") 
\ No newline at end of file
+            raise Exception(f"{ERRO_GERACAO_PDF}: {str(e)}")
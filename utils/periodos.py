@@ -0,0 +1,142 @@
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple, Union
+from utils.constants import FORMATO_DATA_HORA_DB
+
+# Intervalo semiaberto [início, fim) em timestamps no formato do banco
+Intervalo = Tuple[str, str]
+
+def formatar_timestamp(valor: Union[datetime, date]) -> str:
+    """
+    Converte uma data/hora para o formato gravado no banco.
+    
+    Todos os timestamps de registros devem passar por aqui para que a
+    comparação textual feita pelo SQLite preserve a ordem cronológica.
+    
+    Args:
+        valor: Data ou data/hora (hora local)
+        
+    Returns:
+        Timestamp no formato FORMATO_DATA_HORA_DB
+    """
+    if not isinstance(valor, datetime):
+        valor = datetime(valor.year, valor.month, valor.day)
+    return valor.strftime(FORMATO_DATA_HORA_DB)
+
+def agora() -> str:
+    """
+    Retorna o momento atual no formato gravado no banco.
+    
+    Returns:
+        Timestamp atual
+    """
+    return formatar_timestamp(datetime.now())
+
+def _data(referencia: Optional[Union[datetime, date]]) -> date:
+    """
+    Normaliza a data de referência (padrão: hoje).
+    """
+    if referencia is None:
+        return date.today()
+    if isinstance(referencia, datetime):
+        return referencia.date()
+    return referencia
+
+def intervalo_datas(inicio: date, fim: date) -> Intervalo:
+    """
+    Intervalo que cobre os dias de inicio até fim, inclusive.
+    
+    Args:
+        inicio: Primeiro dia
+        fim: Último dia
+        
+    Returns:
+        Tupla (início, fim) com fim exclusivo
+    """
+    return formatar_timestamp(inicio), formatar_timestamp(fim + timedelta(days=1))
+
+def intervalo_dia(referencia: Optional[Union[datetime, date]] = None) -> Intervalo:
+    """
+    Intervalo do dia de referência.
+    
+    Args:
+        referencia: Dia desejado (padrão: hoje)
+        
+    Returns:
+        Tupla (início, fim) com fim exclusivo
+    """
+    dia = _data(referencia)
+    return intervalo_datas(dia, dia)
+
+def intervalo_ultimos_dias(dias: int, referencia: Optional[Union[datetime, date]] = None) -> Intervalo:
+    """
+    Intervalo dos últimos N dias, incluindo o dia de referência.
+    
+    Args:
+        dias: Quantidade de dias anteriores ao dia de referência
+        referencia: Último dia do intervalo (padrão: hoje)
+        
+    Returns:
+        Tupla (início, fim) com fim exclusivo
+    """
+    dia = _data(referencia)
+    return intervalo_datas(dia - timedelta(days=dias), dia)
+
+def intervalo_semana(referencia: Optional[Union[datetime, date]] = None) -> Intervalo:
+    """
+    Intervalo da semana ISO (segunda a domingo) do dia de referência.
+    
+    Args:
+        referencia: Qualquer dia da semana desejada (padrão: hoje)
+        
+    Returns:
+        Tupla (início, fim) com fim exclusivo
+    """
+    dia = _data(referencia)
+    segunda = dia - timedelta(days=dia.weekday())
+    return intervalo_datas(segunda, segunda + timedelta(days=6))
+
+def intervalo_mes(referencia: Optional[Union[datetime, date]] = None) -> Intervalo:
+    """
+    Intervalo do mês de referência.
+    
+    Args:
+        referencia: Qualquer dia do mês desejado (padrão: hoje)
+        
+    Returns:
+        Tupla (início, fim) com fim exclusivo
+    """
+    dia = _data(referencia)
+    inicio = dia.replace(day=1)
+    proximo = (inicio + timedelta(days=32)).replace(day=1)
+    return formatar_timestamp(inicio), formatar_timestamp(proximo)
+
+def filtro_periodo(coluna: str, intervalo: Intervalo) -> Tuple[str, Tuple[str, str]]:
+    """
+    Monta o predicado semiaberto de um intervalo sobre uma coluna.
+    
+    O predicado compara a coluna diretamente (sem DATE()/strftime()), de
+    modo que o SQLite pode usar um índice sobre ela.
+    
+    Args:
+        coluna: Coluna de data/hora, por exemplo 'r.data_saida'
+        intervalo: Tupla (início, fim) com fim exclusivo
+        
+    Returns:
+        Tupla (trecho SQL, parâmetros)
+    """
+    return f"{coluna} >= ? AND {coluna} < ?", intervalo
+
+def filtro_dias(coluna: str, intervalo: Intervalo) -> Tuple[str, Tuple[str, str]]:
+    """
+    Versão de filtro_periodo() para colunas que guardam só a data
+    ('YYYY-MM-DD'), como uso_diario.dia.
+    
+    Args:
+        coluna: Coluna de data, por exemplo 'u.dia'
+        intervalo: Tupla (início, fim) com fim exclusivo
+        
+    Returns:
+        Tupla (trecho SQL, parâmetros)
+    """
+    inicio, fim = intervalo
+    return f"{coluna} >= ? AND {coluna} < ?", (inicio[:10], fim[:10])
@@ -1,328 +1,458 @@
 import pandas as pd
-from datetime import datetime, timedelta
-from utils.db import get_connection
+from datetime import date, datetime, timedelta
+from utils.blobs import BlobStore
+from utils.db import get_connection, DB_PATH
 from utils.common import logger
-import plotly.express as px
-import plotly.graph_objects as go
-from fpdf import FPDF
+from utils.constants import VEICULO_DISPONIVEL, VEICULO_EM_USO
+from utils.periodos import filtro_dias, filtro_periodo, intervalo_dia, intervalo_mes, intervalo_semana, intervalo_ultimos_dias
+from utils.modelo_pdf import obter_modelo
+from utils.tabela_pdf import Coluna, escrever_tabela, formatar_inteiros, formatar_textos
 import os
+import tempfile
+
+NOMES_RELATORIOS = {
+    'diario': 'diário',
+    'semanal': 'semanal',
+    'mensal': 'mensal'
+}
 
 class ReportGenerator:
-    def __init__(self, output_dir='data/relatorios'):
-        self.output_dir = output_dir
-        self._ensure_output_dir()
-    
-    def _ensure_output_dir(self):
-        """Garante que o diretório de relatórios existe"""
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
-            logger.info(f"Diretório de relatórios criado: {self.output_dir}")
-    
+    def __init__(self, blobs=None):
+        self.blobs = blobs or BlobStore(DB_PATH)
+        self.output_dir = self.blobs.diretorio
+
     def _get_report_filename(self, tipo):
         """Gera nome do arquivo de relatório com timestamp"""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         return f"relatorio_{tipo}_{timestamp}.pdf"
-    
-    def gerar_relatorio_diario(self):
-        """Gera relatório diário com estatísticas"""
+
+    def _novo_pdf(self, titulo, rotulo, valor):
+        """Cria o PDF a partir do cabeçalho em cache (título e período)"""
+        def montar(modelo):
+            modelo.titulo(titulo)
+            modelo.espaco(10)
+            modelo.campo('periodo', rotulo)
+            modelo.espaco(5)
+
+        modelo = obter_modelo(('relatorio', titulo, rotulo), montar)
+        pdf = modelo.preencher({'periodo': valor})
+        # Data de criação fixa no dia: relatórios regerados com os mesmos dados são deduplicados
+        pdf.data_criacao = datetime.combine(date.today(), datetime.min.time())
+        return pdf
+
+    def _salvar_pdf(self, pdf, tipo):
+        """Grava o PDF no armazenamento de blobs e retorna o caminho"""
+        hash_blob = self.blobs.salvar(
+            pdf.output(dest='S').encode('latin-1'),
+            'application/pdf',
+            self._get_report_filename(tipo)
+        )
+        return self.blobs.caminho(hash_blob)
+
+    def _gerar(self, tipo, extrair, graficos, montar, incluir_graficos, referencia=None):
+        """
+        Executa as etapas de um relatório: extração dos dados, renderização
+        dos gráficos (apenas se solicitada) e montagem do PDF.
+
+        `referencia` (um dia do período desejado; None para o período atual)
+        é repassada à extração e à montagem.
+        """
+        nome = NOMES_RELATORIOS[tipo]
+        conn = None
         try:
             conn = get_connection()
-            
-            # Estatísticas gerais
-            stats = pd.read_sql("""
-                SELECT 
-                    COUNT(*) as total_veiculos,
-                    SUM(CASE WHEN status = 'disponivel' THEN 1 ELSE 0 END) as veiculos_disponiveis,
-                    SUM(CASE WHEN status = 'em uso' THEN 1 ELSE 0 END) as veiculos_em_uso
-                FROM veiculos
-            """, conn)
-            
-            # Saídas do dia
-            saidas = pd.read_sql("""
-                SELECT 
-                    v.placa,
-                    c.nome as condutor,
-                    r.data_saida,
-                    r.km_saida,
-                    r.km_entrada,
-                    (r.km_entrada - r.km_saida) as km_percorridos
-                FROM registros r
-                JOIN veiculos v ON r.veiculo_id = v.id
-                JOIN condutores c ON r.condutor_id = c.id
-                WHERE DATE(r.data_saida) = DATE('now')
-            """, conn)
-            
-            # Gerar gráficos
-            fig_uso = px.pie(
-                stats,
-                values=[stats['veiculos_disponiveis'][0], stats['veiculos_em_uso'][0]],
-                names=['Disponíveis', 'Em Uso'],
-                title='Status dos Veículos'
-            )
-            
-            if not saidas.empty:
-                fig_km = px.bar(
-                    saidas,
-                    x='placa',
-                    y='km_percorridos',
-                    title='Quilometragem por Veículo',
-                    labels={'placa': 'Placa', 'km_percorridos': 'KM Percorridos'}
-                )
-            else:
-                fig_km = None
-            
-            # Gerar PDF
-            pdf = FPDF()
-            pdf.add_page()
-            
-            # Título
-            pdf.set_font('Arial', 'B', 16)
-            pdf.cell(0, 10, 'Relatório Diário - Controle de Veículos', ln=True, align='C')
-            pdf.ln(10)
-            
-            # Data
-            pdf.set_font('Arial', '', 12)
-            pdf.cell(0, 10, f'Data: {datetime.now().strftime("%d/%m/%Y")}', ln=True)
-            pdf.ln(5)
-            
-            # Estatísticas
-            pdf.set_font('Arial', 'B', 12)
-            pdf.cell(0, 10, 'Estatísticas Gerais', ln=True)
-            pdf.set_font('Arial', '', 12)
-            pdf.cell(0, 10, f'Total de Veículos: {stats["total_veiculos"][0]}', ln=True)
-            pdf.cell(0, 10, f'Veículos Disponíveis: {stats["veiculos_disponiveis"][0]}', ln=True)
-            pdf.cell(0, 10, f'Veículos em Uso: {stats["veiculos_em_uso"][0]}', ln=True)
-            pdf.ln(5)
-            
-            # Saídas do dia
-            if not saidas.empty:
-                pdf.set_font('Arial', 'B', 12)
-                pdf.cell(0, 10, 'Saídas do Dia', ln=True)
-                pdf.set_font('Arial', '', 12)
-                
-                for _, row in saidas.iterrows():
-                    pdf.cell(0, 10, f'Placa: {row["placa"]}', ln=True)
-                    pdf.cell(0, 10, f'Condutor: {row["condutor"]}', ln=True)
-                    pdf.cell(0, 10, f'KM Percorridos: {row["km_percorridos"]}', ln=True)
-                    pdf.ln(5)
-            else:
-                pdf.set_font('Arial', '', 12)
-                pdf.cell(0, 10, 'Nenhuma saída registrada hoje.', ln=True)
-            
-            # Salvar PDF
-            filename = self._get_report_filename('diario')
-            pdf_path = os.path.join(self.output_dir, filename)
-            pdf.output(pdf_path)
-            
-            logger.info(f"Relatório diário gerado com sucesso: {pdf_path}")
+            dados = extrair(conn, referencia)
+            conn.close()
+            conn = None
+
+            imagens = self._renderizar_graficos(graficos(dados)) if incluir_graficos else []
+            pdf = montar(dados, referencia)
+            self._adicionar_graficos(pdf, imagens)
+
+            pdf_path = self._salvar_pdf(pdf, tipo)
+            logger.info(f"Relatório {nome} gerado com sucesso: {pdf_path}")
             return True, pdf_path
         except Exception as e:
-            logger.error(f"Erro ao gerar relatório diário: {str(e)}")
-            return False, f"Erro ao gerar relatório diário: {str(e)}"
+            logger.error(f"Erro ao gerar relatório {nome}: {str(e)}")
+            return False, f"Erro ao gerar relatório {nome}: {str(e)}"
         finally:
-            conn.close()
-    
-    def gerar_relatorio_semanal(self):
-        """Gera relatório semanal com estatísticas"""
+            if conn:
+                conn.close()
+
+    def _renderizar_graficos(self, graficos):
+        """
+        Renderiza os gráficos como imagens JPEG.
+
+        O Plotly só é importado aqui; a exportação de imagens depende do
+        pacote kaleido. Sem ele, o relatório é gerado sem gráficos.
+        """
+        if not graficos:
+            return []
         try:
-            conn = get_connection()
-            
-            # Estatísticas da semana
-            stats = pd.read_sql("""
-                SELECT 
-                    DATE(r.data_saida) as data,
-                    COUNT(*) as total_saidas,
-                    SUM(r.km_entrada - r.km_saida) as km_total
-                FROM registros r
-                WHERE DATE(r.data_saida) >= DATE('now', '-7 days')
-                GROUP BY DATE(r.data_saida)
-                ORDER BY data
-            """, conn)
-            
-            # Top condutores
-            top_condutores = pd.read_sql("""
-                SELECT 
-                    c.nome,
-                    COUNT(*) as total_saidas,
-                    SUM(r.km_entrada - r.km_saida) as km_total
-                FROM registros r
-                JOIN condutores c ON r.condutor_id = c.id
-                WHERE DATE(r.data_saida) >= DATE('now', '-7 days')
-                GROUP BY c.id, c.nome
-                ORDER BY km_total DESC
-                LIMIT 5
-            """, conn)
-            
-            # Gerar gráficos
-            if not stats.empty:
-                fig_saidas = px.line(
-                    stats,
-                    x='data',
-                    y='total_saidas',
-                    title='Saídas por Dia',
-                    labels={'data': 'Data', 'total_saidas': 'Total de Saídas'}
-                )
-                
-                fig_km = px.line(
-                    stats,
-                    x='data',
-                    y='km_total',
-                    title='Quilometragem por Dia',
-                    labels={'data': 'Data', 'km_total': 'KM Total'}
-                )
-            else:
-                fig_saidas = None
-                fig_km = None
-            
-            if not top_condutores.empty:
-                fig_condutores = px.bar(
-                    top_condutores,
-                    x='nome',
-                    y='km_total',
-                    title='Top 5 Condutores por Quilometragem',
-                    labels={'nome': 'Condutor', 'km_total': 'KM Total'}
-                )
-            else:
-                fig_condutores = None
-            
-            # Gerar PDF
-            pdf = FPDF()
-            pdf.add_page()
-            
-            # Título
-            pdf.set_font('Arial', 'B', 16)
-            pdf.cell(0, 10, 'Relatório Semanal - Controle de Veículos', ln=True, align='C')
-            pdf.ln(10)
-            
-            # Período
+            import plotly.express as px
+        except ImportError:
+            logger.warning("Plotly não instalado; relatório gerado sem gráficos")
+            return []
+
+        imagens = []
+        for funcao, parametros in graficos:
+            fig = getattr(px, funcao)(**parametros)
+            try:
+                imagens.append(fig.to_image(format='jpeg', width=900, height=500))
+            except (ImportError, ValueError) as e:
+                logger.warning(f"Não foi possível exportar gráfico (instale o kaleido): {str(e)}")
+                return []
+        return imagens
+
+    def _adicionar_graficos(self, pdf, imagens):
+        """Insere as imagens dos gráficos no PDF, uma por largura de página"""
+        for imagem in imagens:
+            # FPDF 1.7 só lê imagens de arquivo; o conteúdo é carregado em image()
+            fd, caminho = tempfile.mkstemp(suffix='.jpg')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(imagem)
+                pdf.image(caminho, w=pdf.w - pdf.l_margin - pdf.r_margin)
+                pdf.ln(5)
+            finally:
+                os.remove(caminho)
+
+    # Relatório diário
+
+    def _dados_diario(self, conn, referencia=None):
+        """Extrai os dados do relatório diário (do dia de referência; padrão: hoje)"""
+        # Estatísticas gerais
+        stats = pd.read_sql("""
+            SELECT
+                COUNT(*) as total_veiculos,
+                SUM(CASE WHEN status = ? THEN 1 ELSE 0 END) as veiculos_disponiveis,
+                SUM(CASE WHEN status = ? THEN 1 ELSE 0 END) as veiculos_em_uso
+            FROM veiculos
+        """, conn, params=(VEICULO_DISPONIVEL, VEICULO_EM_USO))
+
+        # Saídas do dia
+        filtro, params = filtro_periodo('r.data_saida', intervalo_dia(referencia))
+        saidas = pd.read_sql(f"""
+            SELECT
+                v.placa,
+                c.nome as condutor,
+                r.data_saida,
+                r.km_saida,
+                r.km_entrada,
+                (r.km_entrada - r.km_saida) as km_percorridos
+            FROM registros r
+            JOIN veiculos v ON r.veiculo_id = v.id
+            JOIN condutores c ON r.condutor_id = c.id
+            WHERE {filtro}
+        """, conn, params=params)
+
+        return {'stats': stats, 'saidas': saidas}
+
+    def _graficos_diario(self, dados):
+        """Define os gráficos do relatório diário"""
+        stats, saidas = dados['stats'], dados['saidas']
+        graficos = [('pie', dict(
+            values=[stats['veiculos_disponiveis'][0], stats['veiculos_em_uso'][0]],
+            names=['Disponíveis', 'Em Uso'],
+            title='Status dos Veículos'
+        ))]
+        if not saidas.empty:
+            graficos.append(('bar', dict(
+                data_frame=saidas,
+                x='placa',
+                y='km_percorridos',
+                title='Quilometragem por Veículo',
+                labels={'placa': 'Placa', 'km_percorridos': 'KM Percorridos'}
+            )))
+        return graficos
+
+    def _montar_diario(self, dados, referencia=None):
+        """Monta o PDF do relatório diário"""
+        stats, saidas = dados['stats'], dados['saidas']
+        pdf = self._novo_pdf(
+            'Relatório Diário - Controle de Veículos',
+            'Data: ',
+            (referencia or datetime.now()).strftime("%d/%m/%Y")
+        )
+
+        # Estatísticas
+        pdf.set_font('Arial', 'B', 12)
+        pdf.cell(0, 10, 'Estatísticas Gerais', ln=True)
+        pdf.set_font('Arial', '', 12)
+        pdf.cell(0, 10, f'Total de Veículos: {stats["total_veiculos"][0]}', ln=True)
+        pdf.cell(0, 10, f'Veículos Disponíveis: {stats["veiculos_disponiveis"][0]}', ln=True)
+        pdf.cell(0, 10, f'Veículos em Uso: {stats["veiculos_em_uso"][0]}', ln=True)
+        pdf.ln(5)
+
+        # Saídas do dia
+        if not saidas.empty:
+            pdf.set_font('Arial', 'B', 12)
+            pdf.cell(0, 10, 'Saídas do Dia', ln=True)
+
+            escrever_tabela(pdf, [
+                Coluna('Placa', 30),
+                Coluna('Condutor', 85),
+                Coluna('KM Saída', 25, 'R'),
+                Coluna('KM Entrada', 25, 'R'),
+                Coluna('KM Percorridos', 25, 'R')
+            ], [
+                formatar_textos(saidas['placa']),
+                formatar_textos(saidas['condutor']),
+                formatar_inteiros(saidas['km_saida']),
+                formatar_inteiros(saidas['km_entrada']),
+                formatar_inteiros(saidas['km_percorridos'])
+            ])
+        else:
+            pdf.set_font('Arial', '', 12)
+            pdf.cell(0, 10, 'Nenhuma saída registrada hoje.', ln=True)
+
+        return pdf
+
+    def gerar_relatorio_diario(self, incluir_graficos=False, referencia=None):
+        """Gera relatório diário com estatísticas (do dia de referência; padrão: hoje)"""
+        return self._gerar(
+            'diario', self._dados_diario, self._graficos_diario,
+            self._montar_diario, incluir_graficos, referencia
+        )
+
+    # Relatório semanal
+
+    def _intervalo_semanal(self, referencia=None):
+        """Semana ISO do dia de referência ou, sem referência, os últimos 7 dias"""
+        return intervalo_semana(referencia) if referencia else intervalo_ultimos_dias(7)
+
+    def _dados_semanal(self, conn, referencia=None):
+        """Extrai os dados do relatório semanal"""
+        # Estatísticas da semana (consolidação diária)
+        filtro, params = filtro_dias('u.dia', self._intervalo_semanal(referencia))
+        stats = pd.read_sql(f"""
+            SELECT
+                u.dia as data,
+                SUM(u.viagens) as total_saidas,
+                SUM(u.km) as km_total
+            FROM uso_diario u
+            WHERE {filtro}
+            GROUP BY u.dia
+            ORDER BY u.dia
+        """, conn, params=params)
+
+        # Top condutores
+        top_condutores = pd.read_sql(f"""
+            SELECT
+                c.nome,
+                SUM(u.viagens) as total_saidas,
+                SUM(u.km) as km_total
+            FROM uso_diario u
+            JOIN condutores c ON u.condutor_id = c.id
+            WHERE {filtro}
+            GROUP BY c.id, c.nome
+            ORDER BY km_total DESC
+            LIMIT 5
+        """, conn, params=params)
+
+        return {'stats': stats, 'top_condutores': top_condutores}
+
+    def _graficos_semanal(self, dados):
+        """Define os gráficos do relatório semanal"""
+        stats, top_condutores = dados['stats'], dados['top_condutores']
+        graficos = []
+        if not stats.empty:
+            graficos.append(('line', dict(
+                data_frame=stats,
+                x='data',
+                y='total_saidas',
+                title='Saídas por Dia',
+                labels={'data': 'Data', 'total_saidas': 'Total de Saídas'}
+            )))
+            graficos.append(('line', dict(
+                data_frame=stats,
+                x='data',
+                y='km_total',
+                title='Quilometragem por Dia',
+                labels={'data': 'Data', 'km_total': 'KM Total'}
+            )))
+        if not top_condutores.empty:
+            graficos.append(('bar', dict(
+                data_frame=top_condutores,
+                x='nome',
+                y='km_total',
+                title='Top 5 Condutores por Quilometragem',
+                labels={'nome': 'Condutor', 'km_total': 'KM Total'}
+            )))
+        return graficos
+
+    def _montar_semanal(self, dados, referencia=None):
+        """Monta o PDF do relatório semanal"""
+        stats, top_condutores = dados['stats'], dados['top_condutores']
+        if referencia:
+            segunda = referencia - timedelta(days=referencia.weekday())
+            periodo = (f'{segunda.strftime("%d/%m/%Y")} a '
+                       f'{(segunda + timedelta(days=6)).strftime("%d/%m/%Y")}')
+        else:
+            periodo = 'Últimos 7 dias'
+        pdf = self._novo_pdf(
+            'Relatório Semanal - Controle de Veículos',
+            'Período: ',
+            periodo
+        )
+
+        # Estatísticas
+        if not stats.empty:
+            pdf.set_font('Arial', 'B', 12)
+            pdf.cell(0, 10, 'Estatísticas da Semana', ln=True)
             pdf.set_font('Arial', '', 12)
-            pdf.cell(0, 10, f'Período: Últimos 7 dias', ln=True)
+            pdf.cell(0, 10, f'Total de Saídas: {stats["total_saidas"].sum()}', ln=True)
+            pdf.cell(0, 10, f'Quilometragem Total: {stats["km_total"].sum():.0f} km', ln=True)
             pdf.ln(5)
-            
-            # Estatísticas
-            if not stats.empty:
-                pdf.set_font('Arial', 'B', 12)
-                pdf.cell(0, 10, 'Estatísticas da Semana', ln=True)
-                pdf.set_font('Arial', '', 12)
-                pdf.cell(0, 10, f'Total de Saídas: {stats["total_saidas"].sum()}', ln=True)
-                pdf.cell(0, 10, f'Quilometragem Total: {stats["km_total"].sum():.0f} km', ln=True)
-                pdf.ln(5)
-            
-            # Top condutores
-            if not top_condutores.empty:
-                pdf.set_font('Arial', 'B', 12)
-                pdf.cell(0, 10, 'Top 5 Condutores', ln=True)
-                pdf.set_font('Arial', '', 12)
-                
-                for _, row in top_condutores.iterrows():
-                    pdf.cell(0, 10, f'Condutor: {row["nome"]}', ln=True)
-                    pdf.cell(0, 10, f'Saídas: {row["total_saidas"]}', ln=True)
-                    pdf.cell(0, 10, f'KM Total: {row["km_total"]:.0f}', ln=True)
-                    pdf.ln(5)
-            
-            # Salvar PDF
-            filename = self._get_report_filename('semanal')
-            pdf_path = os.path.join(self.output_dir, filename)
-            pdf.output(pdf_path)
-            
-            logger.info(f"Relatório semanal gerado com sucesso: {pdf_path}")
-            return True, pdf_path
-        except Exception as e:
-            logger.error(f"Erro ao gerar relatório semanal: {str(e)}")
-            return False, f"Erro ao gerar relatório semanal: {str(e)}"
-        finally:
-            conn.close()
-    
-    def gerar_relatorio_mensal(self):
-        """Gera relatório mensal com estatísticas"""
-        try:
-            conn = get_connection()
-            
-            # Estatísticas do mês
-            stats = pd.read_sql("""
-                SELECT 
-                    strftime('%Y-%m', r.data_saida) as mes,
-                    COUNT(*) as total_saidas,
-                    SUM(r.km_entrada - r.km_saida) as km_total,
-                    COUNT(DISTINCT r.condutor_id) as total_condutores,
-                    COUNT(DISTINCT r.veiculo_id) as total_veiculos
-                FROM registros r
-                WHERE strftime('%Y-%m', r.data_saida) = strftime('%Y-%m', 'now')
-                GROUP BY strftime('%Y-%m', r.data_saida)
-            """, conn)
-            
-            # Top veículos
-            top_veiculos = pd.read_sql("""
-                SELECT 
-                    v.placa,
-                    COUNT(*) as total_saidas,
-                    SUM(r.km_entrada - r.km_saida) as km_total
-                FROM registros r
-                JOIN veiculos v ON r.veiculo_id = v.id
-                WHERE strftime('%Y-%m', r.data_saida) = strftime('%Y-%m', 'now')
-                GROUP BY v.id, v.placa
-                ORDER BY km_total DESC
-                LIMIT 5
-            """, conn)
-            
-            # Gerar gráficos
-            if not top_veiculos.empty:
-                fig_veiculos = px.bar(
-                    top_veiculos,
-                    x='placa',
-                    y='km_total',
-                    title='Top 5 Veículos por Quilometragem',
-                    labels={'placa': 'Placa', 'km_total': 'KM Total'}
-                )
-            else:
-                fig_veiculos = None
-            
-            # Gerar PDF
-            pdf = FPDF()
-            pdf.add_page()
-            
-            # Título
-            pdf.set_font('Arial', 'B', 16)
-            pdf.cell(0, 10, 'Relatório Mensal - Controle de Veículos', ln=True, align='C')
-            pdf.ln(10)
-            
-            # Mês
+
+        # Top condutores
+        if not top_condutores.empty:
+            pdf.set_font('Arial', 'B', 12)
+            pdf.cell(0, 10, 'Top 5 Condutores', ln=True)
+
+            escrever_tabela(pdf, [
+                Coluna('Condutor', 110),
+                Coluna('Saídas', 30, 'R'),
+                Coluna('KM Total', 30, 'R')
+            ], [
+                formatar_textos(top_condutores['nome']),
+                formatar_inteiros(top_condutores['total_saidas']),
+                formatar_inteiros(top_condutores['km_total'])
+            ])
+
+        return pdf
+
+    def gerar_relatorio_semanal(self, incluir_graficos=False, referencia=None):
+        """Gera relatório semanal com estatísticas (da semana ISO da referência; padrão: últimos 7 dias)"""
+        return self._gerar(
+            'semanal', self._dados_semanal, self._graficos_semanal,
+            self._montar_semanal, incluir_graficos, referencia
+        )
+
+    # Relatório mensal
+
+    def _dados_mensal(self, conn, referencia=None):
+        """Extrai os dados do relatório mensal (do mês de referência; padrão: mês atual)"""
+        # Estatísticas do mês (consolidação diária)
+        filtro, params = filtro_dias('u.dia', intervalo_mes(referencia))
+        stats = pd.read_sql(f"""
+            SELECT
+                substr(u.dia, 1, 7) as mes,
+                SUM(u.viagens) as total_saidas,
+                SUM(u.km) as km_total,
+                COUNT(DISTINCT u.condutor_id) as total_condutores,
+                COUNT(DISTINCT u.veiculo_id) as total_veiculos
+            FROM uso_diario u
+            WHERE {filtro}
+            GROUP BY substr(u.dia, 1, 7)
+        """, conn, params=params)
+
+        # Top veículos
+        top_veiculos = pd.read_sql(f"""
+            SELECT
+                v.placa,
+                SUM(u.viagens) as total_saidas,
+                SUM(u.km) as km_total
+            FROM uso_diario u
+            JOIN veiculos v ON u.veiculo_id = v.id
+            WHERE {filtro}
+            GROUP BY v.id, v.placa
+            ORDER BY km_total DESC
+            LIMIT 5
+        """, conn, params=params)
+
+        # Viagens do mês (índice em registros.data_saida)
+        filtro_viagens, params_viagens = filtro_periodo('r.data_saida', intervalo_mes(referencia))
+        viagens = pd.read_sql(f"""
+            SELECT
+                r.data_saida,
+                v.placa,
+                c.nome as condutor,
+                r.km_saida,
+                (r.km_entrada - r.km_saida) as km_percorridos
+            FROM registros r
+            JOIN veiculos v ON r.veiculo_id = v.id
+            JOIN condutores c ON r.condutor_id = c.id
+            WHERE {filtro_viagens}
+            ORDER BY r.data_saida
+        """, conn, params=params_viagens)
+
+        return {'stats': stats, 'top_veiculos': top_veiculos, 'viagens': viagens}
+
+    def _graficos_mensal(self, dados):
+        """Define os gráficos do relatório mensal"""
+        top_veiculos = dados['top_veiculos']
+        if top_veiculos.empty:
+            return []
+        return [('bar', dict(
+            data_frame=top_veiculos,
+            x='placa',
+            y='km_total',
+            title='Top 5 Veículos por Quilometragem',
+            labels={'placa': 'Placa', 'km_total': 'KM Total'}
+        ))]
+
+    def _montar_mensal(self, dados, referencia=None):
+        """Monta o PDF do relatório mensal"""
+        stats, top_veiculos = dados['stats'], dados['top_veiculos']
+        pdf = self._novo_pdf(
+            'Relatório Mensal - Controle de Veículos',
+            'Mês: ',
+            (referencia or datetime.now()).strftime("%B/%Y")
+        )
+
+        # Estatísticas
+        if not stats.empty:
+            pdf.set_font('Arial', 'B', 12)
+            pdf.cell(0, 10, 'Estatísticas do Mês', ln=True)
             pdf.set_font('Arial', '', 12)
-            pdf.cell(0, 10, f'Mês: {datetime.now().strftime("%B/%Y")}', ln=True)
+            pdf.cell(0, 10, f'Total de Saídas: {stats["total_saidas"][0]}', ln=True)
+            pdf.cell(0, 10, f'Quilometragem Total: {stats["km_total"][0]:.0f} km', ln=True)
+            pdf.cell(0, 10, f'Total de Condutores: {stats["total_condutores"][0]}', ln=True)
+            pdf.cell(0, 10, f'Total de Veículos: {stats["total_veiculos"][0]}', ln=True)
             pdf.ln(5)
-            
-            # Estatísticas
-            if not stats.empty:
-                pdf.set_font('Arial', 'B', 12)
-                pdf.cell(0, 10, 'Estatísticas do Mês', ln=True)
-                pdf.set_font('Arial', '', 12)
-                pdf.cell(0, 10, f'Total de Saídas: {stats["total_saidas"][0]}', ln=True)
-                pdf.cell(0, 10, f'Quilometragem Total: {stats["km_total"][0]:.0f} km', ln=True)
-                pdf.cell(0, 10, f'Total de Condutores: {stats["total_condutores"][0]}', ln=True)
-                pdf.cell(0, 10, f'Total de Veículos: {stats["total_veiculos"][0]}', ln=True)
-                pdf.ln(5)
-            
-            # Top veículos
-            if not top_veiculos.empty:
-                pdf.set_font('Arial', 'B', 12)
-                pdf.cell(0, 10, 'Top 5 Veículos', ln=True)
-                pdf.set_font('Arial', '', 12)
-                
-                for _, row in top_veiculos.iterrows():
-                    pdf.cell(0, 10, f'Placa: {row["placa"]}', ln=True)
-                    pdf.cell(0, 10, f'Saídas: {row["total_saidas"]}', ln=True)
-                    pdf.cell(0, 10, f'KM Total: {row["km_total"]:.0f}', ln=True)
-                    pdf.ln(5)
-            
-            # Salvar PDF
-            filename = self._get_report_filename('mensal')
-            pdf_path = os.path.join(self.output_dir, filename)
-            pdf.output(pdf_path)
-            
-            logger.info(f"Relatório mensal gerado com sucesso: {pdf_path}")
-            return True, pdf_path
-        except Exception as e:
-            logger.error(f"Erro ao gerar relatório mensal: {str(e)}")
-            return False, f"Erro ao gerar relatório mensal: {str(e)}"
-        finally:
-            conn.close() 
\ No newline at end of file
+
+        # Top veículos
+        if not top_veiculos.empty:
+            pdf.set_font('Arial', 'B', 12)
+            pdf.cell(0, 10, 'Top 5 Veículos', ln=True)
+
+            escrever_tabela(pdf, [
+                Coluna('Placa', 110),
+                Coluna('Saídas', 30, 'R'),
+                Coluna('KM Total', 30, 'R')
+            ], [
+                formatar_textos(top_veiculos['placa']),
+                formatar_inteiros(top_veiculos['total_saidas']),
+                formatar_inteiros(top_veiculos['km_total'])
+            ])
+            pdf.ln(5)
+
+        # Viagens do mês
+        viagens = dados['viagens']
+        if not viagens.empty:
+            pdf.set_font('Arial', 'B', 12)
+            pdf.cell(0, 10, 'Viagens do Mês', ln=True)
+
+            escrever_tabela(pdf, [
+                Coluna('Saída', 35),
+                Coluna('Placa', 25),
+                Coluna('Condutor', 75),
+                Coluna('KM Saída', 27, 'R'),
+                Coluna('KM Percorridos', 28, 'R')
+            ], [
+                formatar_textos(viagens['data_saida'].str.slice(0, 16)),
+                formatar_textos(viagens['placa']),
+                formatar_textos(viagens['condutor']),
+                formatar_inteiros(viagens['km_saida']),
+                formatar_inteiros(viagens['km_percorridos'])
+            ])
+
+        return pdf
+
+    def gerar_relatorio_mensal(self, incluir_graficos=False, referencia=None):
+        """Gera relatório mensal com estatísticas (do mês de referência; padrão: mês atual)"""
+        return self._gerar(
+            'mensal', self._dados_mensal, self._graficos_mensal,
+            self._montar_mensal, incluir_graficos, referencia
+        )
@@ -1,38 +1,224 @@
 import bcrypt
 import jwt
 import datetime
+import hashlib
+import hmac
+import math
 import os
 import logging
-from typing import Dict, Any
-from utils.common import logger
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as TempoEsgotado
+from typing import Dict, Any, Hashable, List, Optional
+from utils.auditoria import get_auditoria
+from utils.cache import CacheTTL
+from utils.constants import (
+    MAX_TENTATIVAS_LOGIN,
+    TEMPO_BLOQUEIO,
+    LOGIN_MAX_BALDES,
+    HASH_SENHA_WORKERS,
+    HASH_SENHA_CUSTO,
+    HASH_SENHA_TEMPO_ESPERA,
+    ERRO_HASH_OCUPADO
+)
 
 logger = logging.getLogger(__name__)
 
+# Hashes SHA-256 sem salt gravados pelas versões anteriores da classe Auth
+_HASH_LEGADO = re.compile(r'^[0-9a-f]{64}$')
+
+# O bcrypt libera o GIL; limitar as threads que o executam impede que uma
+# rajada de logins ocupe todos os núcleos enquanto as outras sessões esperam.
+_pool_hash = ThreadPoolExecutor(
+    max_workers=max(HASH_SENHA_WORKERS, 1),
+    thread_name_prefix="hash-senha"
+)
+
+class HashIndisponivel(Exception):
+    """
+    O pool de hash não atendeu a tempo; a senha não chegou a ser verificada.
+    """
+
+def _no_pool_hash(funcao, *args):
+    """
+    Executa uma função de hash no pool e aguarda o resultado.
+    
+    Raises:
+        HashIndisponivel: se o pool não responder em HASH_SENHA_TEMPO_ESPERA
+            segundos (o trabalho é cancelado se ainda estiver na fila)
+    """
+    try:
+        futuro = _pool_hash.submit(funcao, *args)
+    except RuntimeError as e:
+        # Pool encerrado (fim do processo)
+        raise HashIndisponivel(ERRO_HASH_OCUPADO) from e
+    try:
+        return futuro.result(timeout=HASH_SENHA_TEMPO_ESPERA)
+    except TempoEsgotado as e:
+        futuro.cancel()
+        logger.warning("Pool de hash ocupado: verificação de senha cancelada")
+        raise HashIndisponivel(ERRO_HASH_OCUPADO) from e
+
+class LimitadorLogin:
+    """
+    Limita tentativas de login por usuário (balde de fichas).
+    
+    Cada usuário tem até `tentativas` fichas; cada falha consome uma e elas
+    são repostas ao longo de `bloqueio` minutos. Sem fichas, o login é
+    recusado antes de calcular qualquer hash. Um login bem-sucedido enche o
+    balde novamente.
+    
+    Só existem baldes para chaves com falhas recentes, e no máximo
+    `max_baldes`: tentativas com nomes aleatórios não fazem o limitador
+    crescer sem limite.
+    """
+    
+    def __init__(
+        self,
+        tentativas: int = MAX_TENTATIVAS_LOGIN,
+        bloqueio: int = TEMPO_BLOQUEIO,
+        max_baldes: int = LOGIN_MAX_BALDES
+    ):
+        self.tentativas = tentativas
+        self.bloqueio = bloqueio * 60
+        self.max_baldes = max_baldes
+        # chave -> [fichas, último reabastecimento]
+        self._baldes: Dict[Hashable, List[float]] = {}
+        self._lock = threading.Lock()
+    
+    def _reabastecer(self, chave: Hashable, agora: float) -> Optional[List[float]]:
+        balde = self._baldes.get(chave)
+        if balde is None:
+            return None
+        balde[0] = min(self.tentativas, balde[0] + (agora - balde[1]) * self.tentativas / self.bloqueio)
+        balde[1] = agora
+        if balde[0] >= self.tentativas:
+            # Balde cheio equivale a nenhuma falha recente
+            del self._baldes[chave]
+            return None
+        return balde
+    
+    def _fichas(self, balde: List[float], agora: float) -> float:
+        """Fichas de um balde no instante `agora`, sem alterá-lo."""
+        return balde[0] + (agora - balde[1]) * self.tentativas / self.bloqueio
+    
+    def _varrer(self, agora: float) -> None:
+        """
+        Remove os baldes já cheios e, se ainda passarem de max_baldes,
+        os mais próximos de cheios, até 90% do limite (chamado com o lock).
+        """
+        cheios = [
+            chave for chave, balde in self._baldes.items()
+            if self._fichas(balde, agora) >= self.tentativas
+        ]
+        for chave in cheios:
+            del self._baldes[chave]
+            
+        excesso = len(self._baldes) - int(self.max_baldes * 0.9)
+        if len(self._baldes) > self.max_baldes and excesso > 0:
+            ordenados = sorted(
+                self._baldes,
+                key=lambda chave: self._fichas(self._baldes[chave], agora),
+                reverse=True
+            )
+            for chave in ordenados[:excesso]:
+                del self._baldes[chave]
+    
+    def minutos_bloqueado(self, chave: Hashable) -> int:
+        """
+        Verifica se a chave pode tentar o login agora.
+        
+        Args:
+            chave: Identificação do usuário (ex.: email)
+            
+        Returns:
+            0 se a tentativa é permitida; senão, minutos até a próxima ficha
+        """
+        with self._lock:
+            balde = self._reabastecer(chave, time.monotonic())
+            if balde is None or balde[0] >= 1:
+                return 0
+            segundos = (1 - balde[0]) * self.bloqueio / self.tentativas
+        return max(math.ceil(segundos / 60), 1)
+    
+    def registrar_falha(self, chave: Hashable) -> None:
+        """Consome uma ficha da chave."""
+        with self._lock:
+            agora = time.monotonic()
+            balde = self._reabastecer(chave, agora)
+            if balde is None:
+                balde = self._baldes[chave] = [float(self.tentativas), agora]
+            balde[0] = max(balde[0] - 1, 0.0)
+            if len(self._baldes) > self.max_baldes:
+                self._varrer(agora)
+    
+    def registrar_sucesso(self, chave: Hashable) -> None:
+        """Descarta as falhas da chave."""
+        with self._lock:
+            self._baldes.pop(chave, None)
+
+# Compartilhado por todas as sessões do processo
+limitador_login = LimitadorLogin()
+
+# Tokens já verificados e tokens revogados, pelo SHA-256 do token. Os dois
+# são compartilhados por todas as instâncias e expiram junto com o token.
+_tokens_verificados = CacheTTL()
+_tokens_revogados = CacheTTL()
+
+def _chave_token(token) -> str:
+    """Chave de cache de um token (o token em si não fica em memória)."""
+    if isinstance(token, str):
+        token = token.encode('utf-8')
+    return hashlib.sha256(token).hexdigest()
+
 class SecurityManager:
     def __init__(self):
         self.secret_key = os.getenv('JWT_SECRET_KEY', 'sua_chave_secreta_aqui')
         self.token_expiry = datetime.timedelta(hours=8)
     
     def hash_password(self, password: str) -> str:
-        """Gera um hash seguro da senha usando bcrypt"""
+        """Gera um hash seguro da senha usando bcrypt (no pool de hash)"""
         try:
-            salt = bcrypt.gensalt()
-            return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+            salt = bcrypt.gensalt(rounds=HASH_SENHA_CUSTO)
+            return _no_pool_hash(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
         except Exception as e:
             logger.error(f"Erro ao gerar hash da senha: {str(e)}")
             raise
     
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        """Verifica se a senha em texto plano corresponde ao hash"""
+        """
+        Verifica se a senha em texto plano corresponde ao hash.
+        
+        Aceita também os hashes SHA-256 legados; use needs_rehash() para
+        substituí-los após um login bem-sucedido.
+        
+        Raises:
+            HashIndisponivel: se o pool de hash estiver ocupado; não é uma
+                senha incorreta e não deve contar como tentativa
+        """
         try:
-            return bcrypt.checkpw(
+            if _HASH_LEGADO.match(hashed_password):
+                legado = hashlib.sha256(plain_password.encode('utf-8')).hexdigest()
+                return hmac.compare_digest(legado, hashed_password)
+            return _no_pool_hash(
+                bcrypt.checkpw,
                 plain_password.encode('utf-8'),
                 hashed_password.encode('utf-8')
             )
+        except HashIndisponivel:
+            raise
         except Exception as e:
             logger.error(f"Erro ao verificar senha: {str(e)}")
             return False
     
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """Indica se o hash é legado (SHA-256) ou usa um custo de bcrypt diferente do atual"""
+        if _HASH_LEGADO.match(hashed_password):
+            return True
+        partes = hashed_password.split('$')
+        return len(partes) < 4 or partes[2] != f"{HASH_SENHA_CUSTO:02d}"
+    
     def generate_token(self, user_data):
         """Gera um token JWT com os dados do usuário."""
         try:
@@ -50,11 +236,26 @@ class SecurityManager:
             raise
     
     def verify_token(self, token):
-        """Verifica se um token JWT é válido."""
+        """
+        Verifica se um token JWT é válido.
+        
+        A assinatura é verificada uma única vez por token; depois disso, até o
+        `exp` do token, a verificação é uma consulta ao cache.
+        """
+        chave = _chave_token(token)
+        if _tokens_revogados.obter(chave):
+            raise jwt.InvalidTokenError("Token revogado")
+        
+        payload = _tokens_verificados.obter(chave)
+        if payload is not None:
+            return dict(payload)
+        
         try:
             payload = jwt.decode(token, self.secret_key, algorithms=['HS256'])
-            logger.info(f"Token verificado para o usuário {payload['username']}")
-            return payload
+            validade = payload.get('exp', 0) - time.time()
+            if validade > 0 and not _tokens_revogados.obter(chave):
+                _tokens_verificados.definir(chave, payload, validade)
+            return dict(payload)
         except jwt.ExpiredSignatureError:
             logger.warning("Token expirado")
             raise
@@ -62,6 +263,25 @@ class SecurityManager:
             logger.error(f"Token inválido: {str(e)}")
             raise
     
+    def revoke_token(self, token) -> None:
+        """Revoga um token (ex.: no logout) até o seu vencimento"""
+        try:
+            payload = jwt.decode(
+                token,
+                self.secret_key,
+                algorithms=['HS256'],
+                options={'verify_exp': False}
+            )
+        except jwt.InvalidTokenError:
+            # Tokens que não passam na verificação já são recusados
+            return
+        
+        validade = payload.get('exp', 0) - time.time()
+        chave = _chave_token(token)
+        if validade > 0:
+            _tokens_revogados.definir(chave, True, validade)
+        _tokens_verificados.invalidar(chave)
+    
     def validate_session(self, session_state) -> bool:
         """Valida a sessão do usuário"""
         try:
@@ -93,15 +313,10 @@ class SecurityManager:
         
         return user_level >= required_level
     
-    def audit_log(self, user_id, action, details=None):
-        """Registra uma ação no log de auditoria"""
+    def audit_log(self, user_id, action, details=None, entidade=None, entidade_id=None):
+        """Registra uma ação na tabela de auditoria (gravada em lotes)"""
         try:
-            timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            log_entry = f"{timestamp} - User ID: {user_id} - Action: {action}"
-            if details:
-                log_entry += f" - Details: {details}"
-            
-            logger.info(log_entry)
+            get_auditoria().registrar(user_id, action, details, entidade, entidade_id)
             return True
         except Exception as e:
             logger.error(f"Erro ao registrar log de auditoria: {str(e)}")
@@ -0,0 +1,175 @@
+import re
+from typing import List, NamedTuple
+import numpy as np
+import pandas as pd
+from fpdf import FPDF
+
+FONTE = "Arial"
+
+class Coluna(NamedTuple):
+    """Coluna de uma tabela: título, largura em mm e alinhamento ('L' ou 'R')."""
+    titulo: str
+    largura: float
+    alinhamento: str = 'L'
+
+def formatar_inteiros(serie: pd.Series) -> pd.Series:
+    """
+    Formata números como inteiros, sem laços em Python.
+
+    Args:
+        serie: Valores numéricos (nulos viram vazio)
+
+    Returns:
+        Série de textos
+    """
+    numeros = pd.to_numeric(serie, errors='coerce')
+    textos = numeros.round().astype('Int64').astype(str)
+    return textos.where(numeros.notna(), '')
+
+def formatar_textos(serie: pd.Series) -> pd.Series:
+    """
+    Converte valores para texto (nulos viram vazio).
+
+    Args:
+        serie: Valores quaisquer
+
+    Returns:
+        Série de textos
+    """
+    return serie.astype(object).where(serie.notna(), '').astype(str)
+
+def _larguras(pdf: FPDF, textos: pd.Series) -> np.ndarray:
+    """
+    Calcula a largura impressa de cada texto na fonte corrente.
+
+    Soma a largura de cada caractere distinto multiplicada pela quantidade
+    de ocorrências, uma operação vetorizada por caractere.
+    """
+    larguras = np.zeros(len(textos))
+    caracteres = set(''.join(textos.unique()))
+    for caractere in caracteres:
+        largura = pdf.current_font['cw'].get(caractere, 0)
+        if largura:
+            larguras += textos.str.count(re.escape(caractere)).to_numpy() * largura
+    return larguras * pdf.font_size / 1000
+
+def _escapar(textos: pd.Series) -> pd.Series:
+    """Escapa \\, ( e ) para operadores de texto do PDF."""
+    return (
+        textos.str.replace('\\', '\\\\', regex=False)
+        .str.replace('(', '\\(', regex=False)
+        .str.replace(')', '\\)', regex=False)
+    )
+
+def _truncar(pdf: FPDF, textos: pd.Series, largura: float) -> pd.Series:
+    """Corta os textos que não cabem na coluna."""
+    # Largura média de caractere da fonte (aproximação conservadora)
+    media = pdf.current_font['cw'].get('n', 556) * pdf.font_size / 1000
+    limite = max(int((largura - 2 * pdf.c_margin) / media), 1)
+    return textos.str.slice(0, limite)
+
+def _operadores(
+    pdf: FPDF,
+    colunas: List[Coluna],
+    valores: List[pd.Series],
+    y: pd.Series
+) -> pd.Series:
+    """
+    Monta, de uma só vez, os operadores de texto de todas as linhas.
+
+    Args:
+        pdf: Documento (fonte das linhas já selecionada)
+        colunas: Definição das colunas
+        valores: Textos de cada coluna
+        y: Coordenada y (em pontos PDF, já formatada) de cada linha
+
+    Returns:
+        Série com o conteúdo de cada linha da tabela
+    """
+    k = pdf.k
+    linhas = pd.Series([''] * len(y))
+    x = pdf.l_margin
+    for coluna, textos in zip(colunas, valores):
+        textos = _truncar(pdf, textos.reset_index(drop=True), coluna.largura)
+        if coluna.alinhamento == 'R':
+            posicoes = (x + coluna.largura - pdf.c_margin - _larguras(pdf, textos)) * k
+        else:
+            posicoes = np.full(len(textos), (x + pdf.c_margin) * k)
+        linhas = linhas + 'BT ' + pd.Series(np.char.mod('%.2f', posicoes)) + ' ' + y + ' Td (' + _escapar(textos) + ') Tj ET\n'
+        x += coluna.largura
+    return linhas
+
+def escrever_tabela(
+    pdf: FPDF,
+    colunas: List[Coluna],
+    valores: List[pd.Series],
+    altura_linha: float = 6,
+    tamanho_fonte: int = 10
+):
+    """
+    Escreve uma tabela com várias colunas, paginando e repetindo o cabeçalho.
+
+    Os textos e as posições de todas as linhas são calculados em operações
+    vetorizadas do pandas/NumPy e gravados diretamente no conteúdo das
+    páginas, sem uma chamada a cell() por célula.
+
+    Args:
+        pdf: Documento em que a tabela será escrita, a partir da posição atual
+        colunas: Definição das colunas
+        valores: Textos de cada coluna (ver formatar_inteiros/formatar_textos)
+        altura_linha: Altura de cada linha em mm
+        tamanho_fonte: Tamanho da fonte das linhas
+    """
+    total = len(valores[0]) if valores else 0
+
+    # Registra as fontes e prepara o cabeçalho
+    pdf.set_font(FONTE, 'B', tamanho_fonte)
+    fonte_cabecalho = "BT /F%d %.2f Tf ET\n" % (pdf.current_font['i'], pdf.font_size_pt)
+    deslocamento = 0.5 * altura_linha + 0.3 * pdf.font_size
+    # A altura do cabeçalho muda por página; fica como marcador {y}
+    cabecalho = _operadores(
+        pdf, colunas,
+        [pd.Series([coluna.titulo]) for coluna in colunas],
+        pd.Series(['{y}'])
+    )[0]
+    largura_total = sum(coluna.largura for coluna in colunas)
+
+    pdf.set_font(FONTE, '', tamanho_fonte)
+    fonte_linhas = "BT /F%d %.2f Tf ET\n" % (pdf.current_font['i'], pdf.font_size_pt)
+
+    # Linhas por página: a primeira começa na posição atual, as demais no topo
+    if pdf.y + 2 * altura_linha > pdf.page_break_trigger:
+        pdf.add_page()
+    por_pagina = int((pdf.page_break_trigger - pdf.t_margin) // altura_linha) - 1
+    primeira = int((pdf.page_break_trigger - pdf.y) // altura_linha) - 1
+
+    indices = np.arange(total)
+    pagina = np.where(indices < primeira, 0, (indices - primeira) // por_pagina + 1)
+    posicao = np.where(indices < primeira, indices, (indices - primeira) % por_pagina)
+    inicio = np.where(pagina == 0, pdf.y, pdf.t_margin)
+    topo = inicio + (posicao + 1) * altura_linha
+    baseline = (pdf.h - (topo + deslocamento)) * pdf.k
+    linhas = _operadores(pdf, colunas, valores, pd.Series(np.char.mod('%.2f', baseline)))
+
+    paginas = int(pagina[-1]) + 1 if total else 1
+    limites = np.searchsorted(pagina, np.arange(paginas + 1))
+    for p in range(paginas):
+        if p > 0:
+            pdf.add_page()
+        y0 = pdf.y
+        linha_cabecalho = cabecalho.replace('{y}', "%.2f" % ((pdf.h - (y0 + deslocamento)) * pdf.k))
+        sublinhado = "%.2f %.2f m %.2f %.2f l S\n" % (
+            pdf.l_margin * pdf.k, (pdf.h - y0 - altura_linha) * pdf.k,
+            (pdf.l_margin + largura_total) * pdf.k, (pdf.h - y0 - altura_linha) * pdf.k
+        )
+        conteudo = linhas.iloc[limites[p]:limites[p + 1]]
+        pdf.pages[pdf.page] += (
+            fonte_cabecalho + linha_cabecalho + sublinhado
+            + fonte_linhas + ''.join(conteudo.tolist())
+        )
+        pdf.y = y0 + (len(conteudo) + 1) * altura_linha
+
+    # Sincroniza o estado de fonte do FPDF com o conteúdo escrito
+    pdf.font_family = ''
+    pdf.set_font(FONTE, '', tamanho_fonte)
+    pdf.x = pdf.l_margin
@@ -0,0 +1,81 @@
+"""
+Manutenção da tabela uso_diario (consolidação diária de uso).
+
+A tabela é mantida automaticamente por triggers em registros. Use a
+recarga apenas após importações em massa ou correções feitas com os
+triggers desativados:
+
+    python -m utils.uso_diario --db data/veiculos.db --inicio 2025-01-01 --fim 2025-01-31
+"""
+import argparse
+import logging
+import sqlite3
+from datetime import date
+from typing import Optional
+from utils.database import aplicar_pragmas
+from utils.periodos import intervalo_datas
+
+logger = logging.getLogger(__name__)
+
+RECALCULO_SQL = """
+INSERT INTO uso_diario (dia, veiculo_id, condutor_id, viagens, km, horas_uso)
+SELECT
+    substr(data_saida, 1, 10),
+    veiculo_id,
+    condutor_id,
+    COUNT(*),
+    SUM(COALESCE(km_entrada - km_saida, 0)),
+    SUM(COALESCE((julianday(data_entrada) - julianday(data_saida)) * 24, 0))
+FROM registros
+WHERE data_saida >= ? AND data_saida < ?
+GROUP BY substr(data_saida, 1, 10), veiculo_id, condutor_id
+"""
+
+def recalcular_uso_diario(
+    conn: sqlite3.Connection,
+    inicio: Optional[date] = None,
+    fim: Optional[date] = None
+) -> int:
+    """
+    Recalcula a consolidação diária a partir de registros.
+    
+    Args:
+        conn: Conexão com o banco de dados
+        inicio: Primeiro dia a recalcular (padrão: todo o histórico)
+        fim: Último dia a recalcular, inclusive (padrão: todo o histórico)
+        
+    Returns:
+        Quantidade de linhas de uso_diario gravadas
+    """
+    inicio = inicio or date(1900, 1, 1)
+    fim = fim or date(9998, 12, 31)
+    inicio_ts, fim_ts = intervalo_datas(inicio, fim)
+    
+    with conn:
+        conn.execute(
+            "DELETE FROM uso_diario WHERE dia >= ? AND dia < ?",
+            (inicio_ts[:10], fim_ts[:10])
+        )
+        cursor = conn.execute(RECALCULO_SQL, (inicio_ts, fim_ts))
+        
+    logger.info(f"uso_diario recalculado de {inicio} a {fim}: {cursor.rowcount} linhas")
+    return cursor.rowcount
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcula a tabela uso_diario")
+    parser.add_argument('--db', default='database.db', help="Caminho do banco de dados")
+    parser.add_argument('--inicio', type=date.fromisoformat, help="Primeiro dia (AAAA-MM-DD)")
+    parser.add_argument('--fim', type=date.fromisoformat, help="Último dia (AAAA-MM-DD)")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    conn = sqlite3.connect(args.db)
+    try:
+        aplicar_pragmas(conn)
+        total = recalcular_uso_diario(conn, args.inicio, args.fim)
+        print(f"{total} linhas recalculadas")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()